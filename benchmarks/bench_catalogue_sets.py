@@ -0,0 +1,57 @@
+"""
+Measures comparing catalogues pairwise and combining them with the membership bitmaps,
+against building sets of events from the catalogues.
+
+Usage: python benchmarks/bench_catalogue_sets.py [number_of_events] [number_of_catalogues]
+"""
+
+import random
+import sys
+from itertools import combinations
+from time import perf_counter
+
+from cocat import DB
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    m = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    random.seed(0)
+    db = DB()
+    events = db.create_events(
+        [{"start": "2025-01-01", "stop": "2025-01-02", "author": "John"}] * n
+    )
+    catalogues = [
+        db.create_catalogue(
+            name=f"cat{idx}", author="John", events=random.sample(events, n // 2)
+        )
+        for idx in range(m)
+    ]
+
+    t0 = perf_counter()
+    sets = [catalogue.events.to_set() for catalogue in catalogues]
+    expected_counts = [len(set0 & set1) for set0, set1 in combinations(sets, 2)]
+    expected_union = set().union(*sets)
+    expected_intersection = sets[0].intersection(*sets[1:])
+    with_sets = perf_counter() - t0
+
+    t0 = perf_counter()
+    counts = [
+        catalogue0.overlap_count(catalogue1)
+        for catalogue0, catalogue1 in combinations(catalogues, 2)
+    ]
+    union = db.union(*catalogues)
+    intersection = db.intersection(*catalogues)
+    with_bitmaps = perf_counter() - t0
+
+    assert counts == expected_counts
+    assert union == expected_union
+    assert intersection == expected_intersection
+
+    print(f"{n} events, {m} catalogues of {n // 2} events")
+    print(f"sets:    {with_sets:.3f}s")
+    print(f"bitmaps: {with_bitmaps:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Compares creating events one by one with `DB.create_event`, and all at once
+with `DB.create_events`.
+
+Usage: python benchmarks/bench_create_events.py [number_of_events]
+"""
+
+import sys
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from cocat import DB
+
+
+def make_records(n: int) -> list[dict]:
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            "start": start + timedelta(minutes=i),
+            "stop": start + timedelta(minutes=i + 10),
+            "author": "John",
+            "tags": ["foo", "bar"],
+            "products": ["baz"],
+            "rating": i % 10,
+            "attributes": {"index": i, "note": f"event {i}"},
+        }
+        for i in range(n)
+    ]
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    records = make_records(n)
+
+    loop = bulk = float("inf")
+    for _ in range(3):
+        db = DB()
+        t0 = perf_counter()
+        for record in records:
+            db.create_event(**record)
+        loop = min(loop, perf_counter() - t0)
+
+        db = DB()
+        t0 = perf_counter()
+        db.create_events(records)
+        bulk = min(bulk, perf_counter() - t0)
+
+    print(f"{n} events")
+    print(f"create_event loop: {loop:.2f}s ({n / loop:.0f} events/s)")
+    print(f"create_events:     {bulk:.2f}s ({n / bulk:.0f} events/s)")
+
+
+if __name__ == "__main__":
+    main()
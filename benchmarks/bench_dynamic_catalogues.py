@@ -0,0 +1,71 @@
+"""
+Measures evaluating the dynamic filters of many catalogues in a single pass,
+against evaluating them one by one (both without cached values).
+
+Usage: python benchmarks/bench_dynamic_catalogues.py [number_of_events] [number_of_catalogues]
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from cocat import DB
+from cocat.query import Query
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    m = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    random.seed(0)
+    db = DB()
+    records = []
+    for _ in range(n):
+        start = datetime(2025, 1, 1) + timedelta(minutes=random.randrange(525_600))
+        records.append(
+            {
+                "start": start,
+                "stop": start + timedelta(hours=random.randrange(48)),
+                "author": random.choice(["John", "Paul"]),
+                "rating": random.choice([None, 1, 2, 3]),
+                "attributes": {"snr": random.random()},
+            }
+        )
+    db.create_events(records)
+    # dashboard-like filters, which share the rating conditions
+    # (and are not evaluated on a columnar snapshot)
+    conditions = [
+        f"event.rating is not None and event.rating >= 2 "
+        f"and event.attributes['snr'] * {m} > {idx}"
+        for idx in range(m)
+    ]
+    catalogues = [
+        db.create_catalogue(name=f"dyn{idx}", author="John") for idx in range(m)
+    ]
+
+    db._event_values.clear()
+    t0 = perf_counter()
+    expected = {}
+    for catalogue, condition in zip(catalogues, conditions):
+        expected[catalogue] = Query(condition).evaluate(db)
+    separate = perf_counter() - t0
+
+    for catalogue, condition in zip(catalogues, conditions):
+        db._dynamic_filters[str(catalogue.uuid)] = condition
+    db._event_values.clear()
+    t0 = perf_counter()
+    result = db.evaluate_dynamic_catalogues()
+    single_pass = perf_counter() - t0
+
+    assert {
+        catalogue: {str(event.uuid) for event in events}
+        for catalogue, events in result.items()
+    } == expected
+
+    print(f"{n} events, {m} dynamic catalogues")
+    print(f"one by one:  {separate:.3f}s")
+    print(f"single pass: {single_pass:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Measures evaluating a dynamic filter with the compiled query plan,
+against evaluating the condition for every event (both without cached values).
+
+Usage: python benchmarks/bench_dynamic_filter.py [number_of_events]
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from simpleeval import SimpleEval  # type: ignore[import-untyped]
+
+from cocat import DB
+from cocat.query import Query
+
+CONDITION = (
+    "event.start > datetime(2025, 3, 1) and event.stop < datetime(2025, 4, 1) "
+    "and 'a' in event.tags and event.rating is not None"
+)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    random.seed(0)
+    db = DB()
+    records = []
+    for _ in range(n):
+        start = datetime(2025, 1, 1) + timedelta(minutes=random.randrange(525_600))
+        records.append(
+            {
+                "start": start,
+                "stop": start + timedelta(hours=random.randrange(48)),
+                "author": "John",
+                "tags": random.sample(["a", "b", "c"], random.randrange(3)),
+                "rating": random.choice([None, 1, 2, 3]),
+            }
+        )
+    db.create_events(records)
+
+    t0 = perf_counter()
+    result = Query(CONDITION).evaluate(db)
+    compiled = perf_counter() - t0
+
+    db._event_values.clear()
+    t0 = perf_counter()
+    evaluator = SimpleEval()
+    evaluator.functions = {"datetime": datetime}
+    expected = set()
+    for event in db.events:
+        evaluator.names = {"event": event}
+        if evaluator.eval(CONDITION):
+            expected.add(str(event.uuid))
+    interpreted = perf_counter() - t0
+
+    assert result == expected
+
+    print(f"{n} events, {len(result)} matching")
+    print(f"interpreted: {interpreted:.3f}s")
+    print(f"compiled:    {compiled:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Measures reading `event.range` in a tight loop, with and without the decoded value cache.
+
+Usage: python benchmarks/bench_event_range.py [number_of_reads]
+"""
+
+import sys
+from time import perf_counter
+
+from cocat import DB
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    db = DB()
+    event = db.create_event(start="2025-01-31", stop="2026-01-31", author="John")
+
+    t0 = perf_counter()
+    for _ in range(n):
+        # drop the cache, as if every read had to decode the values
+        db._event_values.clear()
+        event.range
+    uncached = perf_counter() - t0
+
+    t0 = perf_counter()
+    for _ in range(n):
+        event.range
+    cached = perf_counter() - t0
+
+    print(f"{n} reads of event.range")
+    print(f"uncached: {uncached:.2f}s ({uncached / n * 1e6:.1f}µs per read)")
+    print(f"cached:   {cached:.2f}s ({cached / n * 1e6:.1f}µs per read)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Measures finding events by tag, author and attribute with the indexes,
+against scanning all the events.
+
+Usage: python benchmarks/bench_find_events.py [number_of_events]
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from cocat import DB
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    random.seed(0)
+    db = DB()
+    db.create_attribute_index("snr", kind="sorted")
+    records = []
+    for idx in range(n):
+        start = datetime(2025, 1, 1) + timedelta(minutes=idx)
+        records.append(
+            {
+                "start": start,
+                "stop": start + timedelta(hours=1),
+                "author": random.choice(["John", "Paul", "Mike"]),
+                "tags": random.sample([f"tag{tag}" for tag in range(100)], 2),
+                "attributes": {"snr": random.random()},
+            }
+        )
+    db.create_events(records)
+
+    t0 = perf_counter()
+    result = db.find_events(
+        tags="tag0", author="John", attributes={"snr": (0.5, None)}
+    ).to_set()
+    indexed = perf_counter() - t0
+
+    db._event_values.clear()
+    t0 = perf_counter()
+    expected = {
+        event
+        for event in db.events
+        if "tag0" in event.tags
+        and event.author == "John"
+        and event.attributes["snr"] >= 0.5
+    }
+    scanned = perf_counter() - t0
+
+    assert result == expected
+
+    print(f"{n} events, {len(result)} matching")
+    print(f"scan:    {scanned:.3f}s")
+    print(f"indexed: {indexed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Measures the time to compare two catalogues with the same events (through two
+synchronized databases), against comparing their dictionaries, and the time to
+find the duplicate events.
+
+Usage: python benchmarks/bench_fingerprints.py [number_of_events]
+"""
+
+import sys
+from time import perf_counter
+
+from cocat import DB
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    db0 = DB()
+    db1 = DB()
+    db0.sync(db1)
+    events = db0.create_events(
+        [
+            {
+                "start": "2025-01-01",
+                "stop": "2025-01-02",
+                "author": "John",
+                "tags": ["a", "b"],
+                "attributes": {"idx": idx % (n // 2), "snr": 1.5},
+            }
+            for idx in range(n)
+        ]
+    )
+    catalogue0 = db0.create_catalogue(name="cat", author="John", events=events)
+    catalogue1 = db1.get_catalogue(catalogue0.uuid)
+
+    t0 = perf_counter()
+    assert catalogue0.to_dict() == catalogue1.to_dict()
+    t1 = perf_counter()
+    assert catalogue0 == catalogue1
+    t2 = perf_counter()
+    assert catalogue0 == catalogue1
+    t3 = perf_counter()
+    events[0].author = "Paul"
+    t4 = perf_counter()
+    assert catalogue0 == catalogue1
+    t5 = perf_counter()
+    print(f"comparison of two catalogues of {n} events:")
+    print(f"  to_dict():                         {t1 - t0:.3f} s")
+    print(f"  fingerprints, first time:          {t2 - t1:.3f} s")
+    print(f"  fingerprints, cached:              {t3 - t2:.6f} s")
+    print(f"  fingerprints, after 1 event change: {t5 - t4:.3f} s")
+
+    t0 = perf_counter()
+    groups = db0.find_duplicates()
+    t1 = perf_counter()
+    print(
+        f"find_duplicates (cached fingerprints): {t1 - t0:.3f} s, {len(groups)} groups"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares exporting and importing a database as a single JSON string
+(`DB.to_json` and `DB.from_json`) and as JSON Lines (`DB.dump_jsonl` and `DB.load_jsonl`),
+in time and in peak memory allocated by Python objects.
+
+Usage: python benchmarks/bench_jsonl.py [number_of_events]
+"""
+
+import sys
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any
+
+from bench_create_events import make_records
+
+from cocat import DB
+
+
+def measure(name: str, function: Callable[[], Any]) -> Any:
+    # the memory is measured in a second run, which tracing slows down
+    t0 = perf_counter()
+    function()
+    t1 = perf_counter()
+    tracemalloc.start()
+    result = function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name}: {t1 - t0:.2f} s, {peak / 1e6:.0f} MB peak")
+    return result
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    db = DB()
+    events = db.create_events(make_records(n))
+    db.create_catalogue(name="cat", author="John", events=events[::2])
+    del events
+    print(f"{n} events")
+
+    with TemporaryDirectory() as tmp_dir:
+        json_path = Path(tmp_dir) / "db.json"
+        jsonl_path = Path(tmp_dir) / "db.jsonl"
+
+        measure("to_json", lambda: json_path.write_text(db.to_json()))
+
+        def dump() -> None:
+            with open(jsonl_path, "w") as f:
+                db.dump_jsonl(f)
+
+        measure("dump_jsonl", dump)
+        db1 = measure("from_json", lambda: DB.from_json(json_path.read_text()))
+        assert len(db1.events) == n
+        del db1
+
+        def load() -> DB:
+            db2 = DB()
+            with open(jsonl_path) as f:
+                db2.load_jsonl(f)
+            return db2
+
+        db2 = measure("load_jsonl", load)
+        assert len(db2.events) == n
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Measures full-text search of event notes with the text index,
+against substring matching on the events converted to dictionaries.
+
+Usage: python benchmarks/bench_search.py [number_of_events]
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from cocat import DB
+
+WORDS = [f"word{idx}" for idx in range(2_000)] + ["magnetopause", "magnetosheath"]
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    random.seed(0)
+    db = DB()
+    records = []
+    for idx in range(n):
+        start = datetime(2025, 1, 1) + timedelta(minutes=idx)
+        records.append(
+            {
+                "start": start,
+                "stop": start + timedelta(hours=1),
+                "author": "John",
+                "attributes": {"note": " ".join(random.choices(WORDS, k=8))},
+            }
+        )
+    db.create_events(records)
+
+    t0 = perf_counter()
+    db.search_events("magnetopause")
+    build = perf_counter() - t0
+
+    t0 = perf_counter()
+    result = db.search_events("magnetopause")
+    indexed = perf_counter() - t0
+
+    t0 = perf_counter()
+    expected = {
+        event
+        for event in db.events
+        if "magnetopause" in event.to_dict()["attributes"]["note"].lower().split()
+    }
+    scanned = perf_counter() - t0
+
+    assert set(result) == expected
+
+    print(f"{n} events, {len(result)} matching")
+    print(f"scan:        {scanned:.3f}s")
+    print(f"index build: {build:.3f}s")
+    print(f"indexed:     {indexed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
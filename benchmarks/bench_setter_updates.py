@@ -0,0 +1,90 @@
+"""
+Measures the size of the updates generated by the catalogue events setter and the
+event tags and attributes setters, against clearing and filling the maps again.
+
+Usage: python benchmarks/bench_setter_updates.py [number_of_events]
+"""
+
+import sys
+from collections.abc import Callable
+from typing import Any, cast
+
+from pycrdt import Map
+
+from cocat import DB, Catalogue, Event
+
+
+def update_size(db: DB, change: Callable[[], None]) -> int:
+    sizes = []
+    subscription = db.doc.observe(lambda event: sizes.append(len(event.update)))
+    change()
+    db.doc.unobserve(subscription)
+    return sum(sizes)
+
+
+def create_db(n: int) -> tuple[DB, Catalogue, list[Event]]:
+    db = DB()
+    events = db.create_events(
+        [
+            {
+                "start": "2025-01-01",
+                "stop": "2025-01-02",
+                "author": "John",
+                "tags": ["a", "b", "c"],
+                "attributes": {"note": "foo", "snr": 1.5},
+            }
+        ]
+        * (n + 1)
+    )
+    catalogue = db.create_catalogue(name="cat", author="John", events=events[:n])
+    return db, catalogue, events
+
+
+def clear_events(catalogue: Catalogue, value: list[Event]) -> None:
+    # what the events setter used to do
+    with catalogue._db.transaction():
+        cast(Map, catalogue._map["events"]).clear()
+        catalogue.add_events(value)
+
+
+def clear_map(event: Event, field: str, value: dict[str, Any]) -> None:
+    # what the tags and attributes setters used to do
+    with event._db.transaction():
+        map = cast(Map, event._map[field])
+        map.clear()
+        map.update(value)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    tags = {"a": True, "b": True, "c": True}
+    attributes = {"note": "bar", "snr": 1.5}
+    cases: dict[str, tuple[Callable[..., None], Callable[..., None]]] = {
+        f"catalogue.events, {n} unchanged events": (
+            lambda catalogue, events: clear_events(catalogue, events[:n]),
+            lambda catalogue, events: setattr(catalogue, "events", events[:n]),
+        ),
+        f"catalogue.events, 1 of {n} events changed": (
+            lambda catalogue, events: clear_events(catalogue, events[1:]),
+            lambda catalogue, events: setattr(catalogue, "events", events[1:]),
+        ),
+        "event.tags, unchanged": (
+            lambda catalogue, events: clear_map(events[0], "tags", tags),
+            lambda catalogue, events: setattr(events[0], "tags", set(tags)),
+        ),
+        "event.attributes, 1 of 2 changed": (
+            lambda catalogue, events: clear_map(events[0], "attributes", attributes),
+            lambda catalogue, events: setattr(events[0], "attributes", attributes),
+        ),
+    }
+    print(f"{'update bytes':44} {'clear':>8} {'diff':>8}")
+    for name, (clear, diff) in cases.items():
+        db, catalogue, events = create_db(n)
+        before = update_size(db, lambda: clear(catalogue, events))
+        db, catalogue, events = create_db(n)
+        after = update_size(db, lambda: diff(catalogue, events))
+        print(f"{name:44} {before:>8} {after:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Measures the time and the size of the update generated by importing the same data
+again into a database, when replacing the existing records or upserting them.
+
+Usage: python benchmarks/bench_upsert_import.py [number_of_events]
+"""
+
+import json
+import sys
+from time import perf_counter
+from typing import Any
+
+from cocat import DB
+from cocat.db import OnConflict
+
+
+def create_dict(n: int) -> dict[str, Any]:
+    db = DB()
+    events = db.create_events(
+        [
+            {
+                "start": f"2025-01-01T{idx % 24:02}:00:00",
+                "stop": "2025-01-02",
+                "author": "John",
+                "tags": ["a", "b"],
+                "attributes": {"idx": idx, "snr": 1.5},
+            }
+            for idx in range(n)
+        ]
+    )
+    db.create_catalogue(name="cat", author="John", events=events)
+    return json.loads(db.to_json())
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    db_dict = create_dict(n)
+    changed = json.loads(json.dumps(db_dict))
+    for record in changed["events"][: n // 100]:
+        record["attributes"]["snr"] = 2.5
+    modes: list[OnConflict] = ["replace", "upsert"]
+    print(f"{'import of ' + str(n) + ' events':32} {'time (s)':>10} {'bytes':>10}")
+    for name, data in {"same data": db_dict, "1% of events changed": changed}.items():
+        for mode in modes:
+            db = DB.from_dict(json.loads(json.dumps(db_dict)))
+            sizes: list[int] = []
+            db.doc.observe(lambda event: sizes.append(len(event.update)))
+            t0 = perf_counter()
+            counts = db.import_dict(json.loads(json.dumps(data)), on_conflict=mode)
+            t1 = perf_counter()
+            print(f"{name + ', ' + mode:32} {t1 - t0:>10.3f} {sum(sizes):>10}")
+            print(f"    {counts}")
+
+
+if __name__ == "__main__":
+    main()
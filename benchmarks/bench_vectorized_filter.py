@@ -0,0 +1,64 @@
+"""
+Measures evaluating a dynamic filter which cannot be answered from the indexes,
+on a columnar snapshot with NumPy, against evaluating it for every event.
+The snapshot is only used when it is already built, so building it is timed separately.
+
+Usage: python benchmarks/bench_vectorized_filter.py [number_of_events]
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from cocat import DB
+from cocat.query import Query
+
+CONDITION = (
+    "event.rating is not None and event.rating >= 2 and event.attributes['snr'] > 0.5"
+)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    random.seed(0)
+    db = DB()
+    records = []
+    for _ in range(n):
+        start = datetime(2025, 1, 1) + timedelta(minutes=random.randrange(525_600))
+        records.append(
+            {
+                "start": start,
+                "stop": start + timedelta(hours=random.randrange(48)),
+                "author": random.choice(["John", "Paul"]),
+                "rating": random.choice([None, 1, 2, 3]),
+                "attributes": {"snr": random.random()},
+            }
+        )
+    db.create_events(records)
+
+    # without a snapshot, the filter is evaluated event by event
+    t0 = perf_counter()
+    expected = Query(CONDITION).evaluate(db)
+    per_event = perf_counter() - t0
+
+    # building the snapshot is timed from a cold start
+    t0 = perf_counter()
+    db.to_columns()
+    snapshot = perf_counter() - t0
+
+    t0 = perf_counter()
+    result = Query(CONDITION).evaluate(db)
+    vectorized = perf_counter() - t0
+
+    assert result == expected
+
+    print(f"{n} events, {len(result)} matching")
+    print(f"per event:                    {per_event:.3f}s")
+    print(f"columnar snapshot (cold):     {snapshot:.3f}s")
+    print(f"vectorized (snapshot built):  {vectorized:.3f}s")
+    print(f"snapshot + vectorized:        {snapshot + vectorized:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Measures the time and the peak memory (traced by Python) of exporting a catalogue
+to a VOTable file, by building the whole table with astropy or by writing the
+events by chunks.
+
+Usage: python benchmarks/bench_votable_export.py [number_of_events]
+"""
+
+import sys
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from cocat import DB, Catalogue, export_votable_file
+
+
+def create_catalogue(n: int) -> Catalogue:
+    db = DB()
+    events = db.create_events(
+        [
+            {
+                "start": "2025-01-01",
+                "stop": "2025-01-02",
+                "author": "John",
+                "tags": ["a", "b"],
+                "attributes": {"snr": idx / 7, "note": f"event {idx}"},
+            }
+            for idx in range(n)
+        ]
+    )
+    return db.create_catalogue(name="cat", author="John", events=events)
+
+
+def measure(catalogue: Catalogue, export: Callable[[], None]) -> tuple[float, float]:
+    # the columnar snapshot is not reused between the exports
+    catalogue.db._version += 1
+    t0 = perf_counter()
+    export()
+    t1 = perf_counter()
+    # tracing slows down the export, so it is measured again
+    catalogue.db._version += 1
+    tracemalloc.start()
+    export()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return t1 - t0, peak / 1e6
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    catalogue = create_catalogue(n)
+    with TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "votable.xml"
+        print(f"export of {n} events       time (s)   peak (MB)")
+        for name, chunk_size in [
+            ("astropy table", None),
+            ("chunks of 10,000", 10_000),
+            ("chunks of 1,000", 1_000),
+        ]:
+            duration, peak = measure(
+                catalogue,
+                lambda: export_votable_file(catalogue, path, chunk_size=chunk_size),
+            )
+            print(f"{name:24} {duration:>10.2f} {peak:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
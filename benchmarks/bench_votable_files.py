@@ -0,0 +1,51 @@
+"""
+Measures the time to import several VOTable files into a database, one after the other
+and with import_votable_files and different numbers of worker processes.
+
+Usage: python benchmarks/bench_votable_files.py [number_of_files] [rows_per_file]
+"""
+
+import os
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from bench_votable_import import create_votable
+
+from cocat import DB, import_votable_file, import_votable_files
+
+
+def main() -> None:
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    n_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    with TemporaryDirectory() as tmp_dir:
+        paths = []
+        for idx in range(n_files):
+            paths.append(Path(tmp_dir) / f"file{idx}.xml")
+            paths[-1].write_text(create_votable(n_rows).replace("Name:bench", ""))
+        n = n_files * n_rows
+        print(f"{n_files} files of {n_rows} rows, {os.cpu_count()} processors")
+
+        db = DB()
+        t0 = perf_counter()
+        for path in paths:
+            import_votable_file(path, db, path.stem)
+        t1 = perf_counter()
+        assert len(db.events) == n
+        print(f"one after the other: {t1 - t0:.2f} s ({n / (t1 - t0):.0f} rows/s)")
+
+        for workers in (1, 2, 4):
+            db = DB()
+            t0 = perf_counter()
+            import_votable_files(paths, db, workers=workers)
+            t1 = perf_counter()
+            assert len(db.events) == n
+            print(
+                f"import_votable_files with {workers} worker(s): "
+                f"{t1 - t0:.2f} s ({n / (t1 - t0):.0f} rows/s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
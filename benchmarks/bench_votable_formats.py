@@ -0,0 +1,51 @@
+"""
+Measures the size of a VOTable file exported in each serialization format,
+and the time to export it (by chunks) and to import it back.
+
+Usage: python benchmarks/bench_votable_formats.py [number_of_events]
+"""
+
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from cocat import DB, Catalogue, export_votable_file, import_votable_file
+
+
+def create_catalogue(n: int) -> Catalogue:
+    db = DB()
+    events = db.create_events(
+        [
+            {
+                "start": "2025-01-01",
+                "stop": "2025-01-02",
+                "author": "John",
+                "tags": ["a", "b"],
+                "rating": idx % 5,
+                "attributes": {"snr": idx / 7, "count": idx, "valid": idx % 2 == 0},
+            }
+            for idx in range(n)
+        ]
+    )
+    return db.create_catalogue(name="cat", author="John", events=events)
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    catalogue = create_catalogue(n)
+    with TemporaryDirectory() as tmp_dir:
+        print(f"{n} events   size (MB)   export (s)   import (s)")
+        for format in ("tabledata", "binary", "binary2"):
+            path = Path(tmp_dir) / f"{format}.xml"
+            t0 = perf_counter()
+            export_votable_file(catalogue, path, chunk_size=1_000, format=format)
+            t1 = perf_counter()
+            import_votable_file(path, DB())
+            t2 = perf_counter()
+            size = path.stat().st_size / 1e6
+            print(f"{format:10} {size:>11.2f} {t1 - t0:>12.2f} {t2 - t1:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
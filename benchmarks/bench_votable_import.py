@@ -0,0 +1,76 @@
+"""
+Measures the time to import a VOTable with a UUID, a list and a few attribute
+columns into a database, with the built-in reader and with astropy's parser,
+and the part of it spent reading the file.
+
+Usage: python benchmarks/bench_votable_import.py [number_of_rows]
+"""
+
+import json
+import sys
+from datetime import datetime, timedelta
+from io import BytesIO
+from time import perf_counter
+from uuid import uuid4
+
+from cocat import DB, import_votable_str
+from cocat.votable import _read_votable, import_votable
+
+HEADER = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<VOTABLE version="1.3" xmlns="http://www.ivoa.net/xml/VOTable/v1.3">'
+    "<DESCRIPTION>Contact:John;Name:bench</DESCRIPTION><RESOURCE><TABLE>"
+    '<FIELD name="Start Time" ID="TimeIntervalStart" ucd="time.start" datatype="char" '
+    'xtype="dateTime" utype="" arraysize="*"/>'
+    '<FIELD name="Stop Time" ID="TimeIntervalStop" ucd="time.end" datatype="char" '
+    'xtype="dateTime" utype="" arraysize="*"/>'
+    '<FIELD name="uuid" datatype="char" arraysize="*"/>'
+    '<FIELD name="tags" datatype="char" arraysize="*"/>'
+    '<FIELD name="snr" datatype="double"/>'
+    '<FIELD name="note" datatype="char" arraysize="*"/>'
+    "<DATA><TABLEDATA>"
+)
+FOOTER = "</TABLEDATA></DATA></TABLE></RESOURCE></VOTABLE>"
+
+
+def create_votable(n: int) -> str:
+    rows = []
+    for idx in range(n):
+        start = datetime(2025, 1, 1) + timedelta(minutes=idx)
+        stop = start + timedelta(minutes=30)
+        tags = json.dumps(["a", "b"][: idx % 3]).replace('"', "&quot;")
+        rows.append(
+            f"<TR><TD>{start.isoformat()}</TD><TD>{stop.isoformat()}</TD>"
+            f"<TD>{uuid4()}</TD><TD>{tags}</TD><TD>{idx / 7}</TD><TD>event {idx}</TD></TR>"
+        )
+    return HEADER + "".join(rows) + FOOTER
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    xml_content = create_votable(n)
+    db = DB()
+    t0 = perf_counter()
+    import_votable_str(xml_content, db)
+    t1 = perf_counter()
+    assert len(db.events) == n
+    print(f"import of {n} rows: {t1 - t0:.2f} s ({n / (t1 - t0):.0f} rows/s)")
+    t0 = perf_counter()
+    _read_votable(BytesIO(xml_content.encode()))
+    t1 = perf_counter()
+    print(f"  of which reading the file: {t1 - t0:.2f} s")
+
+    t0 = perf_counter()
+    from astropy.io.votable import parse  # type: ignore[import-untyped]
+
+    t1 = perf_counter()
+    votable = parse(BytesIO(xml_content.encode()))
+    t2 = perf_counter()
+    import_votable(votable, DB())
+    t3 = perf_counter()
+    print(f"with astropy: {t3 - t1:.2f} s, and {t1 - t0:.2f} s to import astropy")
+    print(f"  of which reading the file: {t2 - t1:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
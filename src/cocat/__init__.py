@@ -15,4 +15,5 @@ from .models import EventModel as EventModel
 from .votable import export_votable_file as export_votable_file
 from .votable import export_votable_str as export_votable_str
 from .votable import import_votable_file as import_votable_file
+from .votable import import_votable_files as import_votable_files
 from .votable import import_votable_str as import_votable_str
@@ -15,7 +15,7 @@ from wire_websocket import WebSocketClient
 from .catalogue import Catalogue
 from .db import DB
 from .event import Event
-from .votable import export_votable_file, import_votable_file
+from .votable import VOTableFormat, export_votable_file, import_votable_file
 
 
 class Session:
@@ -292,11 +292,13 @@ def import_votable(
         file_path: The VOTable file path.
     """
     import_votable_file(file_path, SESSION.db, table_name=table_name)
-    return SESSION.db.catalogues
+    return SESSION.db.catalogues.to_set()
 
 
 def export_votable(
-    catalogues: Sequence[Catalogue] | Catalogue, file_path: str | Path
+    catalogues: Sequence[Catalogue] | Catalogue,
+    file_path: str | Path,
+    format: VOTableFormat = "tabledata",
 ) -> None:  # pragma: nocover
     """
     Exports catalogues to a VOTable file.
@@ -304,8 +306,9 @@ def export_votable(
     Args:
         catalogues: The catalogue(s) to export.
         file_path: The path to the exported file.
+        format: The serialization of the rows: `"tabledata"`, `"binary"` or `"binary2"`.
     """
-    export_votable_file(catalogues, file_path)
+    export_votable_file(catalogues, file_path, format=format)
 
 
 def save_on_exit() -> None:
@@ -8,13 +8,21 @@ if TYPE_CHECKING:
     from .db import DB
 
 
+def _same(stored: Any, value: Any) -> bool:
+    # numbers are stored as floats, but booleans are not numbers
+    return stored == value and isinstance(stored, bool) == isinstance(value, bool)
+
+
 class Mixin:
+    __slots__ = ()
+
     _uuid: str
     _map: Map
     _db: "DB"
     _get: Callable[[str], Any]
     _set: Callable[[str, Any], None]
     _check_deleted: Callable[[], None]
+    _changed: Callable[[], None]
     _on_add: Callable[[str, Callable[[Any], None]], None]
     _on_remove: Callable[[str, Callable[[list[str]], None]], None]
 
@@ -33,8 +41,15 @@ class Mixin:
         with self._db.transaction():
             self._check_deleted()
             map = cast(Map, self._map[field])
-            map.clear()
-            map.update(value)
+            current = map.to_py()
+            assert current is not None
+            # only write the differences, to keep the update small
+            for key in current.keys() - value.keys():
+                del map[key]
+            for key, item in value.items():
+                if key not in current or not _same(current[key], item):
+                    map[key] = item
+            self._changed()
 
     def _add_keys(self, field: str, keys: Iterable[str] | str) -> None:
         with self._db.transaction():
@@ -43,12 +58,14 @@ class Mixin:
             map = cast(Map, self._map[field])
             for key in key_list:
                 map[key] = True
+            self._changed()
 
     def _add_items(self, field: str, items: dict[str, Any]) -> None:
         with self._db.transaction():
             self._check_deleted()
             map = cast(Map, self._map[field])
             map.update(items)
+            self._changed()
 
     def _remove_keys(self, field: str, keys: Iterable[str] | str) -> None:
         with self._db.transaction():
@@ -57,6 +74,7 @@ class Mixin:
             map = cast(Map, self._map[field])
             for key in key_list:
                 del map[key]
+            self._changed()
 
     def on_set_attributes(self, callback: Callable[[dict[str, Any]], None]) -> None:
         """
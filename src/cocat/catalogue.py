@@ -1,18 +1,19 @@
 import sys
 from collections.abc import Callable, Generator, Iterable
 from dataclasses import dataclass
-from datetime import datetime
 from functools import partial
 from typing import TYPE_CHECKING, Any, cast
 
 from pycrdt import Map
 from rich.console import Console
 from rich.pretty import pprint
-from simpleeval import SimpleEval  # type: ignore[import-untyped]
 
 from .base import Mixin
+from .columns import EventColumns
 from .event import Event
-from .models import CatalogueModel, EventModel
+from .models import CatalogueModel, EventModel, validate_field
+from .query import compile_query
+from .views import View
 
 if sys.version_info >= (3, 11):
     from typing import Self
@@ -25,10 +26,15 @@ if TYPE_CHECKING:
 
 @dataclass(eq=False)
 class Catalogue(Mixin):
+    __slots__ = ("_uuid", "_map", "_db", "_values", "__weakref__")
+
     _uuid: str
     _map: Map
     _db: "DB"
-    _condition: str | None = None
+
+    def __post_init__(self) -> None:
+        # the decoded property values, released with the object
+        self._values: dict[str, Any] = {}
 
     def _check_deleted(self):
         if self._uuid not in self._db._catalogue_maps:
@@ -39,7 +45,8 @@ class Catalogue(Mixin):
         if not isinstance(other, Catalogue):
             return NotImplemented
 
-        return self.to_dict() == other.to_dict()
+        other._check_deleted()
+        return self._uuid == other._uuid and self.fingerprint == other.fingerprint
 
     def __repr__(self) -> str:
         console = Console()
@@ -60,20 +67,25 @@ class Catalogue(Mixin):
 
     def _get(self, name: str) -> Any:
         self._check_deleted()
-        value = self._map[name]
-        model = CatalogueModel.__pydantic_validator__.validate_assignment(
-            CatalogueModel.model_construct(), name, value
-        )
-        return getattr(model, name)
+        values = self._values
+        if name not in values:
+            values[name] = validate_field(CatalogueModel, name, self._map[name])
+        return values[name]
 
     def _set(self, name: str, value: Any) -> None:
         with self._db.transaction():
             self._check_deleted()
-            model = CatalogueModel.__pydantic_validator__.validate_assignment(
-                CatalogueModel.model_construct(), name, value
-            )
-            val = getattr(model, name)
+            val = validate_field(CatalogueModel, name, value)
             self._map[name] = val
+            # the cache and index are otherwise only updated when the transaction is committed
+            self._values.pop(name, None)
+            if name == "name":
+                self._db._names.add(self._uuid, val)
+            self._changed()
+
+    def _changed(self) -> None:
+        # the fingerprint is otherwise only invalidated when the transaction is committed
+        self._db._catalogue_fingerprints.pop(self._uuid, None)
 
     def _on_change(self, name: str, callback: Callable[[Any], None]) -> None:
         self._check_deleted()
@@ -106,23 +118,37 @@ class Catalogue(Mixin):
                 attributes=Map(model.attributes),
             )
         )
-        self = cls(uuid, map, db)
-        db._catalogues[uuid] = self
+        # the live object is kept if the catalogue is replaced
+        live = db._catalogues.get(uuid)
+        if isinstance(live, cls):
+            self = live
+            self._map = map
+        else:
+            self = cls(uuid, map, db)
+            db._catalogues[uuid] = self
+        self._values.clear()
+        db._catalogue_fingerprints.pop(uuid, None)
         return self
 
     @classmethod
-    def _from_map(cls, map: Map, db: "DB") -> Self:
-        uuid = map["uuid"]
-        self = cls(uuid, map, db)
-        db._catalogues[uuid] = self
+    def _from_uuid(cls, uuid: str, db: "DB") -> "Catalogue":
+        # return the live object if there is one, so that it is shared
+        self = db._catalogues.get(uuid)
+        if self is None:
+            self = cls(uuid, db._catalogue_maps[uuid], db)
+            db._catalogues[uuid] = self
         return self
 
-    @classmethod
-    def _from_uuid(cls, uuid: str, db: "DB") -> Self:
-        map = db._catalogue_maps[uuid]
-        self = cls(uuid, map, db)
-        db._catalogues[uuid] = self
-        return self
+    @property
+    def fingerprint(self) -> str:
+        """
+        Returns:
+            A hash of the content of the catalogue (everything but its UUID), built from
+                the UUIDs and [fingerprints][cocat.Event.fingerprint] of its (static) events,
+                which is cached until the catalogue or one of its events changes.
+        """
+        self._check_deleted()
+        return self._db._catalogue_fingerprint(self._uuid)
 
     def to_dict(self, event_as_uuid: bool = False) -> dict[str, Any]:
         """
@@ -187,6 +213,8 @@ class Catalogue(Mixin):
         with self._db.transaction():
             self._check_deleted()
             del self._db._catalogue_maps[self._uuid]
+            self._db._catalogues.pop(self._uuid, None)
+            self._db._names.remove(self._uuid)
 
     def on_add_events(self, callback: Callable[[list[Event]], None]) -> None:
         """
@@ -217,15 +245,70 @@ class Catalogue(Mixin):
             event_list = [events] if isinstance(events, Event) else events
             self._check_deleted()
             map = cast(Map, self._map["events"])
-            for event in event_list:
-                map[event._uuid] = True
+            uuids = [event._uuid for event in event_list]
+            for uuid in uuids:
+                map[uuid] = True
+            # the membership index is updated right away (and again when the transaction
+            # is committed), so that deleting one of these events in the same transaction
+            # sees them, like the set operations
+            self._db._membership.add(self._uuid, uuids)
+            self._changed()
+
+    def overlap_count(self, other: "Catalogue") -> int:
+        """
+        Args:
+            other: The catalogue to compare with.
+
+        Returns:
+            The number of (static) events which are in both catalogues.
+        """
+        self._check_deleted()
+        bitmap = self._db._membership.bitmap(self._uuid)
+        return (bitmap & self._db._membership.bitmap(other._uuid)).bit_count()
+
+    def add_new_events(self, records: Iterable[dict[str, Any]]) -> list[Event]:
+        """
+        Creates events in the database and adds them to the catalogue, in a single transaction.
+
+        Args:
+            records: The events to create, as dictionaries with the same keys
+                as the arguments of [create_event][cocat.DB.create_event].
+
+        Returns:
+            The created [Events][cocat.Event], in the same order as the records.
+        """
+        with self._db.transaction():
+            self._check_deleted()
+            events = self._db.create_events(records)
+            self.add_events(events)
+            return events
+
+    def on_add_dynamic_events(self, callback: Callable[[set[Event]], None]) -> None:
+        """
+        Registers a callback to be called when events start matching the dynamic filter.
+
+        Args:
+            callback: The callback to call with the set of added dynamic events.
+        """
+        self._on_add("dynamic_events", callback)
+
+    def on_remove_dynamic_events(self, callback: Callable[[list[str]], None]) -> None:
+        """
+        Registers a callback to be called when events stop matching the dynamic filter,
+        or are deleted.
+
+        Args:
+            callback: The callback to call with the set of removed dynamic event UUIDs.
+        """
+        self._on_remove("dynamic_events", callback)
 
     def set_dynamic_filter(
         self,
         condition: str | None = None,
     ) -> None:
         """
-        Sets a condition that will be evaluated when accessing `catalogue.dynamic_events`.
+        Sets a condition that defines the events in `catalogue.dynamic_events`.
+        The matching events are kept up-to-date as the database changes, only testing the changed events.
         The condition is an expression using the event attributes and/or references to other catalogues, for instance:
         ```py
         catalogue.set_dynamic_filter(f"event.start > datetime(2025, 1, 1) and event.stop <= datetime(2026, 1, 1) and event in catalogue('my_catalogue_name_or_uuid')")
@@ -233,8 +316,18 @@ class Catalogue(Mixin):
 
         Args:
             condition: The condition an event needs to match to be part of the catalogue.
+
+        Raises:
+            SyntaxError: If the condition is not a valid expression.
         """
-        self._condition = condition
+        self._check_deleted()
+        if condition:
+            # compiled before it is stored, so that the observers can compile it again
+            compile_query(condition)
+            self._db._dynamic_filters[self._uuid] = condition
+        else:
+            self._db._dynamic_filters.pop(self._uuid, None)
+        self._db._refresh_dynamic_events([self._uuid], None)
 
     def remove_events(self, events: Iterable[Event] | Event) -> None:
         """
@@ -247,8 +340,23 @@ class Catalogue(Mixin):
             event_list = [events] if isinstance(events, Event) else events
             self._check_deleted()
             map = cast(Map, self._map["events"])
-            for event in event_list:
-                del map[event._uuid]
+            uuids = [event._uuid for event in event_list]
+            for uuid in uuids:
+                del map[uuid]
+            # like in add_events
+            self._db._membership.remove(self._uuid, uuids)
+            self._changed()
+
+    def to_columns(self) -> EventColumns:
+        """
+        Requires [NumPy](https://numpy.org).
+
+        Returns:
+            A [columnar snapshot][cocat.columns.EventColumns] of the (static) events in the catalogue.
+                It is cached until the database changes.
+        """
+        self._check_deleted()
+        return self._db._get_columns(self._uuid)
 
     @property
     def name(self) -> str:
@@ -272,18 +380,16 @@ class Catalogue(Mixin):
         Returns:
             The dynamic events in the catalogue, as defined by `catalogue.set_dynamic_filter(condition)`.
         """
-        if not self._condition:
+        condition = self._db._dynamic_filters.get(self._uuid)
+        if not condition:
             return set()
 
-        s = SimpleEval()
-        s.functions = {"datetime": datetime, "catalogue": self._db.get_catalogue}
-        events = set()
-        for event in self._db.events:
-            s.names = {"event": event}
-            if s.eval(self._condition):
-                events.add(event)
-
-        return events
+        # the dynamic events are kept up-to-date, unless their evaluation failed
+        uuids = self._db._dynamic_events.get(self._uuid)
+        if uuids is None:
+            uuids = compile_query(condition).evaluate(self._db)
+            self._db._dynamic_events[self._uuid] = uuids
+        return self._db._events_from_uuids(uuids)
 
     @property
     def all_events(self) -> set[Event]:
@@ -294,17 +400,13 @@ class Catalogue(Mixin):
         return self.events.union(self.dynamic_events)
 
     @property
-    def events(self) -> set[Event]:
+    def events(self) -> View[Event]:
         """
         Returns:
-            The (static) events in the catalogue.
+            A lazy [view][cocat.views.View] of the (static) events in the catalogue.
         """
         self._check_deleted()
-        event_uuids = cast(Map, self._map["events"])
-        return {
-            Event._from_map(self._db._event_maps[uuid], self._db)
-            for uuid in event_uuids.keys()
-        }
+        return View(cast(Map, self._map["events"]), self._db, Event)
 
     @events.setter
     def events(self, value: set[Event]) -> None:
@@ -315,6 +417,11 @@ class Catalogue(Mixin):
         with self._db.transaction():
             self._check_deleted()
             events = cast(Map, self._map["events"])
-            events.clear()
-            for event in value:
-                self.add_events(event)
+            value = set(value)
+            uuids = {event._uuid for event in value}
+            # only write the differences, to keep the update small
+            removed = [uuid for uuid in events.keys() if uuid not in uuids]
+            for uuid in removed:
+                del events[uuid]
+            self._db._membership.remove(self._uuid, removed)
+            self.add_events([event for event in value if event._uuid not in events])
@@ -0,0 +1,178 @@
+import json
+from collections.abc import Iterable
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from .encoding import stored_time_key, tz_key
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+
+
+@dataclass(frozen=True)
+class EventColumns:
+    """
+    A columnar snapshot of events, as [NumPy](https://numpy.org) arrays ordered by UUID.
+
+    Attributes:
+        uuid: The UUIDs, as fixed-width bytes.
+        start: The start dates, as `datetime64[ns]` in UTC, or `datetime64[us]` if a start
+            or stop date is outside of the range of `datetime64[ns]` (years 1678 to 2261).
+        stop: The stop dates, with the same type as the start dates.
+        author: The authors, as Python strings.
+        rating: The ratings, as a masked integer array where missing ratings are masked.
+        tags: The tags, as Python lists.
+        products: The products, as Python lists.
+        attributes: The attributes, as Python dictionaries.
+        start_offset: The UTC offsets of the start dates in seconds,
+            as a masked float array where naive dates are masked.
+        stop_offset: The UTC offsets of the stop dates in seconds,
+            as a masked float array where naive dates are masked.
+    """
+
+    uuid: "NDArray[np.bytes_]"
+    start: "NDArray[np.datetime64]"
+    stop: "NDArray[np.datetime64]"
+    author: "NDArray[np.object_]"
+    rating: "np.ma.MaskedArray"
+    tags: "NDArray[np.object_]"
+    products: "NDArray[np.object_]"
+    attributes: "NDArray[np.object_]"
+    start_offset: "np.ma.MaskedArray"
+    stop_offset: "np.ma.MaskedArray"
+
+    def __len__(self) -> int:
+        return len(self.uuid)
+
+    def _take(self, rows: "NDArray[np.intp]") -> "EventColumns":
+        return EventColumns(
+            **{field.name: getattr(self, field.name)[rows] for field in fields(self)}
+        )
+
+    def to_pandas(self) -> Any:
+        """
+        Returns:
+            The events as a [pandas](https://pandas.pydata.org) `DataFrame`, indexed by UUID.
+        """
+        import pandas as pd  # type: ignore[import-untyped]
+
+        return pd.DataFrame(
+            {
+                "start": self.start,
+                "stop": self.stop,
+                "author": self.author,
+                "rating": pd.arrays.IntegerArray(
+                    self.rating.data, self.rating.mask.copy()
+                ),
+                "tags": self.tags,
+                "products": self.products,
+                "attributes": self.attributes,
+            },
+            index=pd.Index(self.uuid.astype(str), name="uuid"),
+        )
+
+    def to_arrow(self) -> Any:
+        """
+        Returns:
+            The events as a [pyarrow](https://arrow.apache.org/docs/python) `Table`.
+                Attributes are serialized to JSON strings, since their values can be of any type.
+        """
+        import numpy as np
+        import pyarrow as pa  # type: ignore[import-untyped]
+
+        unit, _ = np.datetime_data(self.start.dtype)
+        return pa.table(
+            {
+                "uuid": pa.array(self.uuid.astype(str).tolist(), pa.string()),
+                "start": pa.array(self.start, pa.timestamp(unit)),
+                "stop": pa.array(self.stop, pa.timestamp(unit)),
+                "author": pa.array(self.author.tolist(), pa.string()),
+                "rating": pa.array(self.rating.data, mask=self.rating.mask),
+                "tags": pa.array(self.tags.tolist(), pa.list_(pa.string())),
+                "products": pa.array(self.products.tolist(), pa.list_(pa.string())),
+                "attributes": pa.array(
+                    [json.dumps(value) for value in self.attributes], pa.string()
+                ),
+            }
+        )
+
+
+def _object_array(values: list[Any]) -> "NDArray[np.object_]":
+    import numpy as np
+
+    # assign item by item, so that lists are not turned into a 2D array
+    array = np.empty(len(values), dtype=object)
+    for idx, value in enumerate(values):
+        array[idx] = value
+    return array
+
+
+def _offsets(events: list[dict[str, Any]], name: str) -> "np.ma.MaskedArray":
+    import numpy as np
+
+    offsets = []
+    for event in events:
+        value = event[name]
+        if isinstance(value, str):
+            offset = datetime.fromisoformat(value).utcoffset()
+            offsets.append(None if offset is None else offset.total_seconds())
+        else:
+            offsets.append(event[tz_key(name)])
+    return np.ma.MaskedArray(
+        [0 if offset is None else offset for offset in offsets],
+        mask=[offset is None for offset in offsets],
+        dtype=np.float64,
+    )
+
+
+def _times(
+    starts: list[int], stops: list[int]
+) -> tuple["NDArray[np.datetime64]", "NDArray[np.datetime64]"]:
+    import numpy as np
+
+    # microseconds since the Unix epoch, in nanoseconds if they fit in int64
+    start_keys = np.array(starts, dtype=np.int64)
+    stop_keys = np.array(stops, dtype=np.int64)
+    limit = np.iinfo(np.int64).max // 1000
+    if all(np.all(np.abs(keys) <= limit) for keys in (start_keys, stop_keys)):
+        return (
+            (start_keys * 1000).view("datetime64[ns]"),
+            (stop_keys * 1000).view("datetime64[ns]"),
+        )
+    return start_keys.view("datetime64[us]"), stop_keys.view("datetime64[us]")
+
+
+def build_columns(event_dicts: Iterable[dict[str, Any]]) -> EventColumns:
+    """
+    Args:
+        event_dicts: The events, as stored in the document.
+
+    Returns:
+        The columnar snapshot of the events.
+    """
+    import numpy as np
+
+    events = sorted(event_dicts, key=lambda event: event["uuid"])
+    starts, stops = _times(
+        [stored_time_key(event["start"]) for event in events],
+        [stored_time_key(event["stop"]) for event in events],
+    )
+    ratings = [event["rating"] for event in events]
+    return EventColumns(
+        uuid=np.array([event["uuid"] for event in events], dtype="S36"),
+        start=starts,
+        stop=stops,
+        author=_object_array([event["author"] for event in events]),
+        rating=np.ma.MaskedArray(
+            [0 if rating is None else rating for rating in ratings],
+            mask=[rating is None for rating in ratings],
+            dtype=np.int64,
+        ),
+        tags=_object_array([sorted(event["tags"]) for event in events]),
+        products=_object_array([sorted(event["products"]) for event in events]),
+        attributes=_object_array([event["attributes"] for event in events]),
+        start_offset=_offsets(events, "start"),
+        stop_offset=_offsets(events, "stop"),
+    )
@@ -2,11 +2,15 @@ from __future__ import annotations
 
 import json
 from collections import defaultdict
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Iterable, Iterator, Set
+from dataclasses import dataclass
 from datetime import datetime
 from functools import partial
-from typing import Any
+from hashlib import blake2b
+from pathlib import Path
+from typing import IO, Any, Literal
 from uuid import UUID
+from weakref import WeakValueDictionary
 
 from pycrdt import (
     ArrayEvent,
@@ -20,12 +24,70 @@ from pycrdt import (
     create_update_message,
     handle_sync_message,
 )
+from pydantic import TypeAdapter
 from rich.console import Console
 from rich.pretty import pprint
 
 from .catalogue import Catalogue
+from .columns import EventColumns, build_columns
+from .encoding import (
+    FORMAT_VERSIONS,
+    STRING_TIMES,
+    decode_time,
+    encode_time,
+    stored_time_key,
+    tz_key,
+)
 from .event import Event
-from .models import CatalogueModel, EventModel
+from .fingerprint import (
+    catalogue_fields,
+    event_fields,
+    fingerprint,
+    stored_catalogue_fields,
+    stored_event_fields,
+)
+from .index import (
+    AttributeIndex,
+    IntervalIndex,
+    MembershipIndex,
+    NameIndex,
+    TermIndex,
+    TextIndex,
+    attribute_matches,
+    time_key,
+)
+from .models import CatalogueModel, EventModel, validate_field
+from .query import compile_query, evaluate_queries
+from .views import View
+
+DATETIME_ADAPTER: TypeAdapter[datetime] = TypeAdapter(datetime)
+
+# what to do when importing an event or a catalogue which already exists
+OnConflict = Literal["replace", "upsert"]
+
+# the number of records imported in each transaction by DB.load_jsonl
+JSONL_BATCH_SIZE = 10_000
+
+
+@dataclass
+class ImportCounts:
+    """
+    The number of events and catalogues written by an import.
+    """
+
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    def __add__(self, other: ImportCounts) -> ImportCounts:
+        return ImportCounts(
+            self.inserted + other.inserted,
+            self.updated + other.updated,
+            self.unchanged + other.unchanged,
+        )
+
+
+EVENTS_ADAPTER: TypeAdapter[list[EventModel]] = TypeAdapter(list[EventModel])
 
 
 class DB:
@@ -33,18 +95,37 @@ class DB:
     A database which holds events and catalogues.
     """
 
-    def __init__(self, doc: Doc | None = None) -> None:
+    def __init__(
+        self, doc: Doc | None = None, format_version: int | None = None
+    ) -> None:
         """
         Creates a database.
 
         Args:
             doc: An optional [Doc](https://y-crdt.github.io/pycrdt/api_reference/#pycrdt.Doc).
+            format_version: The optional format version of a new document.
+                Version 1 (the default) stores event dates as strings,
+                version 2 stores them as numbers, which is faster but cannot be read
+                by older versions of cocat. Existing documents must be [migrated][cocat.DB.migrate].
         """
         self._doc: Doc = Doc() if doc is None else doc
+        self._meta = self._doc.get("meta", type=Map)
         self._catalogue_maps = self._doc.get("catalogues", type=Map)
         self._event_maps = self._doc.get("events", type=Map)
+        if format_version is not None and format_version != self.format_version:
+            if format_version not in FORMAT_VERSIONS:
+                raise ValueError(f"Unknown format version: {format_version}")
+            if len(self._event_maps) > 0:
+                raise ValueError(
+                    "Cannot change the format version of an existing document, "
+                    "use DB.migrate()"
+                )
+            self._meta["format_version"] = format_version
         self._synced: list[DB] = []
-        self._catalogue_maps.observe_deep(self._catalogues_changed)
+        # the subscriptions of the observers which keep the caches and indexes up-to-date
+        self._catalogues_subscription = self._catalogue_maps.observe_deep(
+            self._catalogues_changed
+        )
         self._catalogue_delete_callbacks: dict[str, list[Callable[[Any], None]]] = (
             defaultdict(list)
         )
@@ -52,8 +133,9 @@ class DB:
         self._catalogue_change_callbacks: dict[
             str, dict[str, list[Callable[[Any, Any], None]]]
         ] = defaultdict(lambda: defaultdict(list))
-        self._catalogues: dict[str, Catalogue] = {}
-        self._event_maps.observe_deep(self._events_changed)
+        # the live catalogue and event objects, which are shared while they are in use
+        self._catalogues: WeakValueDictionary[str, Catalogue] = WeakValueDictionary()
+        self._events_subscription = self._event_maps.observe_deep(self._events_changed)
         self._event_delete_callbacks: dict[str, list[Callable[[Any], None]]] = (
             defaultdict(list)
         )
@@ -61,7 +143,35 @@ class DB:
         self._event_change_callbacks: dict[
             str, dict[str, list[Callable[[Any, Any], None]]]
         ] = defaultdict(lambda: defaultdict(list))
-        self._events: dict[str, Event] = {}
+        self._events: WeakValueDictionary[str, Event] = WeakValueDictionary()
+        # incremented on every change, to invalidate caches
+        self._version = 0
+        self._columns: dict[str | None, EventColumns] = {}
+        self._columns_version = -1
+        # the content hashes of events and catalogues, computed when needed
+        self._event_fingerprints: dict[str, str] = {}
+        self._catalogue_fingerprints: dict[str, str] = {}
+        # the dynamic filter conditions of the catalogues, which are not shared,
+        # and which compile (the observers must not raise)
+        self._dynamic_filters: dict[str, str] = {}
+        # the events matching the dynamic filters, missing if they must be evaluated again
+        self._dynamic_events: dict[str, set[str]] = {}
+        # the UUIDs of the catalogues used by the dynamic filters, when last evaluated
+        self._dynamic_references: dict[str, set[str]] = {}
+        self._time_index = IntervalIndex()
+        self._terms = {name: TermIndex() for name in ("tags", "products", "author")}
+        # the opt-in indexes of event attributes, which are not shared
+        self._attribute_indexes: dict[str, AttributeIndex] = {}
+        # the full-text indexes of events and catalogues, built on the first search
+        self._event_texts: TextIndex | None = None
+        self._catalogue_texts: TextIndex | None = None
+        for uuid in self._event_maps.keys():
+            self._index_event_range(uuid)
+            self._index_event_terms(uuid)
+        self._membership = MembershipIndex()
+        self._names = NameIndex()
+        for uuid in self._catalogue_maps.keys():
+            self._index_catalogue(uuid)
 
     def __repr__(self) -> str:
         console = Console()
@@ -78,40 +188,214 @@ class DB:
     def transaction(self) -> Transaction:
         return self._doc.transaction(self)
 
+    @property
+    def format_version(self) -> int:
+        """
+        Returns:
+            The format version of the document.
+        """
+        return int(self._meta.get("format_version", STRING_TIMES))
+
+    def migrate(self, format_version: int) -> None:
+        """
+        Converts the document to another format version, in a single transaction.
+        All the peers sharing the document must support the new format version.
+
+        Args:
+            format_version: The format version to convert to.
+        """
+        if format_version not in FORMAT_VERSIONS:
+            raise ValueError(f"Unknown format version: {format_version}")
+        with self.transaction():
+            for map in self._event_maps.values():
+                for name in ("start", "stop"):
+                    value = decode_time(map[name], map.get(tz_key(name)))
+                    if tz_key(name) in map:
+                        del map[tz_key(name)]
+                    for key, encoded in encode_time(
+                        name, value, format_version
+                    ).items():
+                        map[key] = encoded
+            self._meta["format_version"] = format_version
+
     @classmethod
-    def from_dict(cls, db_dict: dict[str, Any], doc: Doc | None = None) -> "DB":
+    def from_dict(
+        cls,
+        db_dict: dict[str, Any],
+        doc: Doc | None = None,
+        format_version: int | None = None,
+        on_conflict: OnConflict = "replace",
+    ) -> "DB":
         """
         Creates a database from a dictionary.
 
         Args:
             db_dict: The dictionary.
             doc: An optional [Doc](https://y-crdt.github.io/pycrdt/api_reference/#pycrdt.Doc).
+            format_version: The optional [format version][cocat.DB.format_version] of the document.
+            on_conflict: What to do with the events and catalogues which already exist
+                in the document, see [import_dict][cocat.DB.import_dict].
 
         Returns:
             The created database.
         """
-        db = DB(doc=doc)
-        with db.transaction():
-            for item in db_dict["events"]:
-                db.create_event(**item)
-            for item in db_dict["catalogues"]:
-                events = [db.get_event(uuid) for uuid in item.pop("events", [])]
-                db.create_catalogue(events=events, **item)
-            return db
+        db = DB(doc=doc, format_version=format_version)
+        db.import_dict(db_dict, on_conflict)
+        return db
 
     @classmethod
-    def from_json(cls, data: str, doc: Doc | None = None) -> "DB":
+    def from_json(
+        cls,
+        data: str,
+        doc: Doc | None = None,
+        format_version: int | None = None,
+        on_conflict: OnConflict = "replace",
+    ) -> "DB":
         """
         Creates a database from a JSON string.
 
         Args:
             data: The JSON string.
             doc: An optional [Doc](https://y-crdt.github.io/pycrdt/api_reference/#pycrdt.Doc).
+            format_version: The optional [format version][cocat.DB.format_version] of the document.
+            on_conflict: What to do with the events and catalogues which already exist
+                in the document, see [import_dict][cocat.DB.import_dict].
 
         Returns:
             The created database.
         """
-        return DB.from_dict(json.loads(data), doc)
+        return DB.from_dict(json.loads(data), doc, format_version, on_conflict)
+
+    def import_dict(
+        self, db_dict: dict[str, Any], on_conflict: OnConflict = "replace"
+    ) -> ImportCounts:
+        """
+        Imports events and catalogues from a dictionary (as returned by [to_dict][cocat.DB.to_dict])
+        into the database, in a single transaction.
+
+        Args:
+            db_dict: The dictionary.
+            on_conflict: What to do with the events and catalogues which UUID already exists:
+                `"replace"` them entirely, or `"upsert"` them, which compares their content
+                and only writes the fields which differ, so that importing the same data
+                again doesn't change the document.
+
+        Returns:
+            The number of inserted, updated and unchanged events and catalogues.
+        """
+        counts = ImportCounts()
+        event_models = EVENTS_ADAPTER.validate_python(
+            [
+                {key: value for key, value in record.items() if value is not None}
+                for record in db_dict["events"]
+            ]
+        )
+        catalogue_models = [
+            CatalogueModel.model_validate(
+                {
+                    key: [str(uuid) for uuid in value] if key == "events" else value
+                    for key, value in item.items()
+                }
+            )
+            for item in db_dict["catalogues"]
+        ]
+        with self.transaction():
+            # the events to write, by UUID: a UUID which appears again in the batch
+            # is compared with its previous row, which it replaces
+            new_models: dict[str, EventModel] = {}
+            for event_model in event_models:
+                uuid = str(event_model.uuid)
+                previous = new_models.get(uuid)
+                if previous is not None:
+                    new_models[uuid] = event_model
+                    unchanged = event_fields(previous) == event_fields(event_model)
+                    if on_conflict == "upsert" and unchanged:
+                        counts.unchanged += 1
+                    else:
+                        counts.updated += 1
+                elif uuid not in self._event_maps:
+                    new_models[uuid] = event_model
+                    counts.inserted += 1
+                elif on_conflict == "replace":
+                    new_models[uuid] = event_model
+                    counts.updated += 1
+                elif self._upsert_event(event_model):
+                    counts.updated += 1
+                else:
+                    counts.unchanged += 1
+            self._insert_events(list(new_models.values()))
+
+            for catalogue_model in catalogue_models:
+                uuid = str(catalogue_model.uuid)
+                events = [self.get_event(event) for event in catalogue_model.events]
+                if uuid not in self._catalogue_maps or on_conflict == "replace":
+                    if uuid in self._catalogue_maps:
+                        counts.updated += 1
+                    else:
+                        counts.inserted += 1
+                    catalogue_model.events = []
+                    catalogue = Catalogue._new(catalogue_model, self)
+                    self._catalogue_maps[uuid] = catalogue._map
+                    self._names.add(uuid, catalogue_model.name)
+                    catalogue.add_events(events)
+                elif self._upsert_catalogue(catalogue_model, events):
+                    counts.updated += 1
+                else:
+                    counts.unchanged += 1
+        return counts
+
+    def _upsert_event(self, model: EventModel) -> bool:
+        # write the fields which differ, and return whether there were any
+        uuid = str(model.uuid)
+        incoming = event_fields(model)
+        if self._event_fingerprint(uuid) == fingerprint(incoming):
+            return False
+        event = Event._from_uuid(uuid, self)
+        existing = stored_event_fields(self._event_maps[uuid].to_py())
+        for name, value in incoming.items():
+            if existing[name] != value:
+                setattr(event, name, getattr(model, name))
+        return True
+
+    def _upsert_catalogue(self, model: CatalogueModel, events: list[Event]) -> bool:
+        # write the fields which differ, and return whether there were any
+        uuid = str(model.uuid)
+        catalogue = Catalogue._from_uuid(uuid, self)
+        existing = stored_catalogue_fields(self._catalogue_maps[uuid].to_py())
+        incoming = catalogue_fields(model)
+        if fingerprint(existing) == fingerprint(incoming):
+            return False
+        for name, value in incoming.items():
+            if existing[name] != value:
+                if name == "events":
+                    catalogue.events = set(events)
+                else:
+                    setattr(catalogue, name, getattr(model, name))
+        return True
+
+    def _event_fingerprint(self, uuid: str) -> str:
+        result = self._event_fingerprints.get(uuid)
+        if result is None:
+            result = fingerprint(stored_event_fields(self._event_maps[uuid].to_py()))
+            self._event_fingerprints[uuid] = result
+        return result
+
+    def _catalogue_fingerprint(self, uuid: str) -> str:
+        result = self._catalogue_fingerprints.get(uuid)
+        if result is None:
+            fields = stored_catalogue_fields(self._catalogue_maps[uuid].to_py())
+            # the events are compared by content too
+            fields["events"] = [
+                [event, self._event_fingerprint(event)] for event in fields["events"]
+            ]
+            result = fingerprint(fields)
+            self._catalogue_fingerprints[uuid] = result
+        return result
+
+    def _forget_event_fingerprint(self, uuid: str) -> None:
+        self._event_fingerprints.pop(uuid, None)
+        for catalogue in self._membership.catalogues_of(uuid):
+            self._catalogue_fingerprints.pop(catalogue, None)
 
     @property
     def doc(self) -> Doc:
@@ -121,61 +405,202 @@ class DB:
         """
         return self._doc
 
+    def _index_catalogue(self, uuid: str) -> None:
+        map = self._catalogue_maps[uuid]
+        self._membership.set_catalogue(uuid, map["events"].keys())
+        self._names.add(uuid, map["name"])
+
+    def _index_catalogue_texts(self, uuids: Iterable[str]) -> None:
+        # the names, string attributes and tags of the catalogues
+        if self._catalogue_texts is None:
+            return
+        for uuid in uuids:
+            if uuid not in self._catalogue_maps:
+                self._catalogue_texts.remove(uuid)
+                continue
+            map = self._catalogue_maps[uuid]
+            attributes = map["attributes"].values()
+            texts = [value for value in attributes if isinstance(value, str)]
+            self._catalogue_texts.add(uuid, [map["name"], *texts, *map["tags"].keys()])
+
+    def _dynamic_dependents(self, uuid: str) -> set[str]:
+        # the dynamic catalogues which filters use a catalogue
+        map = self._catalogue_maps.get(uuid)
+        keys = {uuid} if map is None else {uuid, map["name"]}
+        dependents = set()
+        for dependent, condition in self._dynamic_filters.items():
+            references = compile_query(condition).references
+            if (
+                references is None
+                or not references.isdisjoint(keys)
+                or uuid in self._dynamic_references.get(dependent, ())
+            ):
+                dependents.add(dependent)
+        return dependents
+
+    def _refresh_dynamic_events(self, uuids: Iterable[str], origin: Any) -> None:
+        olds = {}
+        for uuid in uuids:
+            olds[uuid] = self._dynamic_events.pop(uuid, set())
+            self._dynamic_references.pop(uuid, None)
+        conditions = {
+            uuid: self._dynamic_filters[uuid]
+            for uuid in olds
+            if self._dynamic_filters.get(uuid)
+        }
+        results: dict[str, set[str] | Exception] = {}
+        if conditions:
+            queries = [compile_query(condition) for condition in conditions.values()]
+            results = dict(zip(conditions, evaluate_queries(self, queries)))
+        for uuid, old in olds.items():
+            new = results.get(uuid, set())
+            if isinstance(new, Exception):
+                # the error is raised when getting the dynamic events
+                continue
+            if uuid in conditions:
+                self._dynamic_events[uuid] = new
+                references = set()
+                for reference in compile_query(conditions[uuid]).references or ():
+                    # resolved like in get_catalogue
+                    resolved: str | None = reference
+                    if reference not in self._catalogue_maps:
+                        resolved = self._names.get(reference)
+                    if resolved is not None:
+                        references.add(resolved)
+                self._dynamic_references[uuid] = references
+            self._dynamic_events_changed(uuid, new - old, old - new, origin)
+
+    def _update_dynamic_events(
+        self, uuids: set[str], origin: Any, catalogues: Iterable[str] | None = None
+    ) -> None:
+        # only test the events which changed
+        olds = {
+            uuid: self._dynamic_events[uuid]
+            for uuid in (self._dynamic_events if catalogues is None else catalogues)
+            if uuid in self._dynamic_events
+        }
+        if not olds:
+            return
+        queries = [compile_query(self._dynamic_filters[uuid]) for uuid in olds]
+        for (uuid, old), matching in zip(
+            olds.items(), evaluate_queries(self, queries, uuids)
+        ):
+            if isinstance(matching, Exception):
+                # the error is raised when getting the dynamic events
+                del self._dynamic_events[uuid]
+                continue
+            new = (old - uuids) | matching
+            self._dynamic_events[uuid] = new
+            self._dynamic_events_changed(uuid, new - old, old - new, origin)
+
+    def _dynamic_events_changed(
+        self, uuid: str, added: set[str], removed: set[str], origin: Any
+    ) -> None:
+        if uuid not in self._catalogue_change_callbacks:
+            return
+        callbacks = self._catalogue_change_callbacks[uuid]
+        if removed:
+            for callback in callbacks["remove_dynamic_events"]:
+                callback(origin, removed)
+        if added:
+            result = self._events_from_uuids(added)
+            for callback in callbacks["add_dynamic_events"]:
+                callback(origin, result)
+
     def _catalogues_changed(
         self, events: list[ArrayEvent | MapEvent], transaction: Transaction
     ) -> None:
+        self._version += 1
+        # the dynamic catalogues to evaluate again, or only for some events
+        refresh: set[str] = set()
+        updates: dict[str, set[str]] = defaultdict(set)
+        # the catalogues which texts changed
+        texts: set[str] = set()
         for event in events:
             path = event.path  # type: ignore[union-attr]
+            if len(path) > 0:
+                self._catalogue_fingerprints.pop(path[0], None)
             if len(path) == 0:
                 # catalogue created or deleted
                 assert isinstance(event, MapEvent)
                 keys = event.keys  # type: ignore[attr-defined]
+                texts.update(keys)
+                for uuid in keys:
+                    self._catalogue_fingerprints.pop(uuid, None)
                 for uuid in keys:
                     action = keys[uuid]["action"]
+                    live_catalogue = self._catalogues.get(uuid)
+                    if live_catalogue is not None:
+                        live_catalogue._values.clear()
                     if action == "delete":
+                        self._membership.remove_catalogue(uuid)
+                        self._names.remove(uuid)
                         for delete_callback in self._catalogue_delete_callbacks[uuid]:
                             delete_callback(transaction.origin)
-                        if uuid in self._catalogues:
-                            del self._catalogues[uuid]
+                        self._catalogues.pop(uuid, None)
+                        self._dynamic_filters.pop(uuid, None)
+                        self._dynamic_events.pop(uuid, None)
+                        self._dynamic_references.pop(uuid, None)
                         del self._catalogue_delete_callbacks[uuid]
-                        self._catalogue_change_callbacks
+                        self._catalogue_change_callbacks[uuid]
                         del self._catalogue_change_callbacks[uuid]
                     elif action == "add":
+                        self._index_catalogue(uuid)
                         for create_callback in self._catalogue_create_callbacks:
                             create_callback(
                                 transaction.origin, self.get_catalogue(uuid)
                             )
+                    elif action == "update":
+                        # the catalogue map was replaced (e.g. by an import)
+                        if live_catalogue is not None:
+                            live_catalogue._map = self._catalogue_maps[uuid]
+                        self._membership.remove_catalogue(uuid)
+                        self._names.remove(uuid)
+                        self._index_catalogue(uuid)
+                    refresh.update(self._dynamic_dependents(uuid))
             elif len(path) == 1:
                 # property of catalogue changed (not events)
                 assert isinstance(event, MapEvent)
                 uuid = path[0]
                 changed_keys = event.keys  # type: ignore[attr-defined]
+                live_catalogue = self._catalogues.get(uuid)
+                if live_catalogue is not None:
+                    for key in changed_keys:
+                        live_catalogue._values.pop(key, None)
+                if "name" in changed_keys:
+                    self._names.add(uuid, self._catalogue_maps[uuid]["name"])
+                    texts.add(uuid)
+                refresh.update(self._dynamic_dependents(uuid))
                 for key in changed_keys:
                     if key in self._catalogue_change_callbacks[uuid]:
                         callbacks = self._catalogue_change_callbacks[uuid][key]
                         for callback in callbacks:
                             value = changed_keys[key]["newValue"]
-                            model = CatalogueModel.__pydantic_validator__.validate_assignment(
-                                CatalogueModel.model_construct(), key, value
+                            callback(
+                                transaction.origin,
+                                validate_field(CatalogueModel, key, value),
                             )
-                            callback(transaction.origin, getattr(model, key))
             elif len(path) == 2:
                 if path[1] == "events":
                     # catalogue events changed
                     assert isinstance(event, MapEvent)
                     uuid = path[0]
+                    added_uuids = []
+                    removed_uuids = []
+                    keys = event.keys  # type: ignore[attr-defined]
+                    for key, val in keys.items():
+                        if val["action"] == "delete":
+                            removed_uuids.append(key)
+                        else:
+                            added_uuids.append(key)
+                    self._membership.remove(uuid, removed_uuids)
+                    self._membership.add(uuid, added_uuids)
+                    for dependent in self._dynamic_dependents(uuid):
+                        updates[dependent].update(added_uuids, removed_uuids)
                     if (
                         "add_events" in self._catalogue_change_callbacks[uuid]
                         or "remove_events" in self._catalogue_change_callbacks[uuid]
                     ):
-                        added_uuids = []
-                        removed_uuids = []
-                        keys = event.keys  # type: ignore[attr-defined]
-                        for key, val in keys.items():
-                            if val["action"] == "delete":
-                                removed_uuids.append(key)
-                            else:
-                                added_uuids.append(key)
                         if removed_uuids:
                             callbacks = self._catalogue_change_callbacks[uuid][
                                 "remove_events"
@@ -184,7 +609,7 @@ class DB:
                                 callback(transaction.origin, set(removed_uuids))
                         if added_uuids:
                             result = {
-                                Event._from_map(self._event_maps[added_uuid], self)
+                                Event._from_uuid(added_uuid, self)
                                 for added_uuid in added_uuids
                             }
                             callbacks = self._catalogue_change_callbacks[uuid][
@@ -205,6 +630,8 @@ class DB:
                             added[key] = val["newValue"]
                         elif val["action"] == "update":
                             added[key] = val["newValue"]
+                    texts.add(uuid)
+                    refresh.update(self._dynamic_dependents(uuid))
                     if removed:
                         callbacks = self._catalogue_change_callbacks[uuid][
                             f"remove_{name}"
@@ -217,41 +644,127 @@ class DB:
                         ]
                         for callback in callbacks:
                             callback(transaction.origin, added)
+        self._index_catalogue_texts(texts)
+        self._refresh_dynamic_events(
+            [uuid for uuid in refresh if uuid in self._dynamic_filters],
+            transaction.origin,
+        )
+        for uuid, event_uuids in updates.items():
+            if uuid not in refresh:
+                self._update_dynamic_events(event_uuids, transaction.origin, [uuid])
+
+    def _index_event_range(self, uuid: str) -> None:
+        map = self._event_maps[uuid]
+        start = stored_time_key(map["start"])
+        stop = stored_time_key(map["stop"])
+        self._time_index.add(uuid, start, stop)
+
+    def _index_event_terms(self, uuid: str) -> None:
+        map = self._event_maps[uuid]
+        for name, index in self._terms.items():
+            index.remove(uuid)
+            index.add(uuid, [map[name]] if name == "author" else map[name].keys())
+
+    def _index_event_texts(self, uuids: Iterable[str]) -> None:
+        # the string attributes and tags of the events
+        if self._event_texts is None:
+            return
+        for uuid in uuids:
+            if uuid not in self._event_maps:
+                self._event_texts.remove(uuid)
+                continue
+            map = self._event_maps[uuid]
+            attributes = map["attributes"].values()
+            texts = [value for value in attributes if isinstance(value, str)]
+            self._event_texts.add(uuid, [*texts, *map["tags"].keys()])
+
+    def _index_event_attributes(
+        self, uuid: str, keys: Iterable[str] | None = None
+    ) -> None:
+        attributes = self._event_maps[uuid]["attributes"]
+        for key in self._attribute_indexes if keys is None else keys:
+            index = self._attribute_indexes.get(key)
+            if index is None:
+                continue
+            if key in attributes:
+                index.add(uuid, attributes[key])
+            else:
+                index.remove(uuid)
 
     def _events_changed(self, events: list[MapEvent], transaction: Transaction) -> None:
+        self._version += 1
+        changed: set[str] = set()
+        # the events which texts changed
+        texts: set[str] = set()
         for event in events:
             path = event.path  # type: ignore[attr-defined]
+            if len(path) > 0:
+                changed.add(path[0])
             if len(path) == 0:
                 assert isinstance(event, MapEvent)
                 keys = event.keys  # type: ignore[attr-defined]
+                changed.update(keys)
+                texts.update(keys)
                 for uuid in keys:
                     action = keys[uuid]["action"]
+                    live_event = self._events.get(uuid)
+                    if live_event is not None:
+                        live_event._values.clear()
                     if action == "delete":
+                        self._time_index.remove(uuid)
+                        for index in self._terms.values():
+                            index.remove(uuid)
+                        for attribute_index in self._attribute_indexes.values():
+                            attribute_index.remove(uuid)
                         for delete_callback in self._event_delete_callbacks[uuid]:
                             delete_callback(transaction.origin)
-                        if uuid in self._events:
-                            del self._events[uuid]
+                        self._events.pop(uuid, None)
                         del self._event_delete_callbacks[uuid]
                         self._event_change_callbacks[uuid]
                         del self._event_change_callbacks[uuid]
                     elif action == "add":
+                        self._index_event_range(uuid)
+                        self._index_event_terms(uuid)
+                        self._index_event_attributes(uuid)
                         for create_callback in self._event_create_callbacks:
                             create_callback(transaction.origin, self.get_event(uuid))
+                    elif action == "update":
+                        # the event map was replaced (e.g. by an import)
+                        if live_event is not None:
+                            live_event._map = self._event_maps[uuid]
+                        self._time_index.remove(uuid)
+                        self._index_event_range(uuid)
+                        for index in self._terms.values():
+                            index.remove(uuid)
+                        self._index_event_terms(uuid)
+                        for attribute_index in self._attribute_indexes.values():
+                            attribute_index.remove(uuid)
+                        self._index_event_attributes(uuid)
             elif len(path) == 1:
                 assert isinstance(event, MapEvent)
                 uuid = path[0]
                 changed_keys = event.keys  # type: ignore[attr-defined]
+                live_event = self._events.get(uuid)
+                if live_event is not None:
+                    for key in changed_keys:
+                        live_event._values.pop(key, None)
+                        live_event._values.pop(key.removesuffix("_tz"), None)
+                if "start" in changed_keys or "stop" in changed_keys:
+                    self._index_event_range(uuid)
+                if any(name in changed_keys for name in self._terms):
+                    self._index_event_terms(uuid)
                 for key in changed_keys:
                     if key in self._event_change_callbacks[uuid]:
                         callbacks = self._event_change_callbacks[uuid][key]
                         for callback in callbacks:
                             value = changed_keys[key]["newValue"]
-                            model = (
-                                EventModel.__pydantic_validator__.validate_assignment(
-                                    EventModel.model_construct(), key, value
-                                )
+                            if key in ("start", "stop"):
+                                map = self._event_maps[uuid]
+                                value = decode_time(value, map.get(tz_key(key)))
+                            callback(
+                                transaction.origin,
+                                validate_field(EventModel, key, value),
                             )
-                            callback(transaction.origin, getattr(model, key))
             elif len(path) == 2:
                 assert isinstance(event, MapEvent)
                 uuid, name = path
@@ -265,6 +778,13 @@ class DB:
                         added[key] = val["newValue"]
                     elif val["action"] == "update":
                         added[key] = val["newValue"]
+                if name in self._terms:
+                    self._terms[name].discard(uuid, removed)
+                    self._terms[name].add(uuid, added)
+                elif name == "attributes":
+                    self._index_event_attributes(uuid, removed.union(added))
+                if name in ("attributes", "tags"):
+                    texts.add(uuid)
                 if removed:
                     callbacks = self._event_change_callbacks[uuid][f"remove_{name}"]
                     for callback in callbacks:
@@ -273,28 +793,415 @@ class DB:
                     callbacks = self._event_change_callbacks[uuid][f"add_{name}"]
                     for callback in callbacks:
                         callback(transaction.origin, added)
+        for uuid in changed:
+            self._forget_event_fingerprint(uuid)
+        self._index_event_texts(texts)
+        if self._dynamic_events:
+            self._update_dynamic_events(changed, transaction.origin)
 
     @property
-    def catalogues(self) -> set[Catalogue]:
+    def catalogues(self) -> View[Catalogue]:
         """
         Returns:
-            The catalogues in the database.
+            A lazy [view][cocat.views.View] of the catalogues in the database.
         """
-        return {
-            Catalogue._from_map(self._catalogue_maps[uuid], self)
-            for uuid in sorted(self._catalogue_maps.keys())
-        }
+        return View(self._catalogue_maps, self, Catalogue)
 
     @property
-    def events(self) -> set[Event]:
+    def events(self) -> View[Event]:
         """
         Returns:
-            The events in the database.
+            A lazy [view][cocat.views.View] of the events in the database.
         """
+        return View(self._event_maps, self, Event)
+
+    def evaluate_dynamic_catalogues(self) -> dict[Catalogue, set[Event]]:
+        """
+        Gets the dynamic events of all the catalogues which have a dynamic filter.
+        The filters which must be evaluated are evaluated together, in a single pass
+        over the events, sharing the sub-expressions they have in common.
+        The results are kept up-to-date like [dynamic_events][cocat.Catalogue.dynamic_events].
+
+        Returns:
+            The dynamic events of each catalogue which has a dynamic filter.
+
+        Raises:
+            Exception: The first error raised when evaluating a dynamic filter.
+        """
+        uuids = [
+            uuid
+            for uuid, condition in self._dynamic_filters.items()
+            if condition and uuid not in self._dynamic_events
+        ]
+        queries = [compile_query(self._dynamic_filters[uuid]) for uuid in uuids]
+        error = None
+        for uuid, result in zip(uuids, evaluate_queries(self, queries)):
+            if isinstance(result, Exception):
+                if error is None:
+                    error = result
+            else:
+                self._dynamic_events[uuid] = result
+        if error is not None:
+            try:
+                raise error
+            finally:
+                # the traceback references this frame
+                del error, result
         return {
-            Event._from_map(self._event_maps[uuid], self)
-            for uuid in sorted(self._event_maps.keys())
+            Catalogue._from_uuid(uuid, self): self._events_from_uuids(
+                self._dynamic_events[uuid]
+            )
+            for uuid, condition in self._dynamic_filters.items()
+            if condition
+        }
+
+    def create_attribute_index(
+        self, key: str, kind: Literal["hash", "sorted"] = "hash"
+    ) -> None:
+        """
+        Creates an index of an event attribute, which is used by [find_events][cocat.DB.find_events].
+        The index is local to this database, and kept up-to-date with all the changes.
+        Only string, number, boolean and `None` values are indexed.
+
+        Args:
+            key: The attribute key.
+            kind: `"hash"` to only find attribute values, or `"sorted"` to also find ranges of values.
+        """
+        index = self._attribute_indexes.get(key)
+        if index is not None and index.ordered == (kind == "sorted"):
+            return
+        self._attribute_indexes[key] = AttributeIndex(ordered=kind == "sorted")
+        for uuid in self._event_maps.keys():
+            self._index_event_attributes(uuid, [key])
+
+    def drop_attribute_index(self, key: str) -> None:
+        """
+        Args:
+            key: The attribute key which index to remove.
+        """
+        self._attribute_indexes.pop(key, None)
+
+    def find_events(
+        self,
+        tags: Iterable[str] | str | None = None,
+        products: Iterable[str] | str | None = None,
+        author: str | None = None,
+        attributes: dict[str, Any] | None = None,
+    ) -> View[Event]:
+        """
+        Finds events using the indexes, with a cost which depends on the number of events
+        matching each criterion rather than on the number of events in the database.
+
+        ```py
+        db.create_attribute_index("snr", kind="sorted")
+        events = db.find_events(tags="storm", author="John", attributes={"snr": (0.5, None)})
+        ```
+
+        Args:
+            tags: The tags that the events must all have.
+            products: The products that the events must all have.
+            author: The author of the events.
+            attributes: The values that the attributes of the events must have, or `(min, max)`
+                tuples for ranges of strings or numbers, where a `None` bound is open.
+                The attributes without an [index][cocat.DB.create_attribute_index] (or without
+                a sorted index, for ranges) are checked on the events matching the other criteria.
+
+        Returns:
+            A lazy [view][cocat.views.View] of the events matching all the criteria.
+        """
+        included: list[Set[str]] = []
+        for name, terms in (("tags", tags), ("products", products)):
+            if terms is not None:
+                for term in [terms] if isinstance(terms, str) else terms:
+                    included.append(self._terms[name].lookup(term))
+        if author is not None:
+            included.append(self._terms["author"].lookup(author))
+        unindexed = {}
+        for key, condition in (attributes or {}).items():
+            index = self._attribute_indexes.get(key)
+            if index is None or (isinstance(condition, tuple) and not index.ordered):
+                unindexed[key] = condition
+            elif isinstance(condition, tuple):
+                included.append(index.between(*condition))
+            else:
+                included.append(index.lookup(condition))
+
+        if not included and not unindexed:
+            return self.events
+        if included:
+            included.sort(key=len)
+            uuids = set(included[0]).intersection(*included[1:])
+        else:
+            uuids = set(self._event_maps.keys())
+        if unindexed:
+            matching = set()
+            for uuid in uuids:
+                event_attributes = self._event_maps[uuid]["attributes"]
+                if all(
+                    key in event_attributes
+                    and attribute_matches(event_attributes[key], condition)
+                    for key, condition in unindexed.items()
+                ):
+                    matching.add(uuid)
+            uuids = matching
+        return View(dict.fromkeys(uuids), self, Event)
+
+    def find_duplicates(
+        self, events: Iterable[Event] | None = None
+    ) -> list[View[Event]]:
+        """
+        Finds the events which have the same content (everything but their UUID).
+        The [fingerprints][cocat.Event.fingerprint] of the events are cached,
+        so that finding the duplicates again only hashes the events which changed.
+
+        Args:
+            events: The events to search, for instance the events of a catalogue.
+                Defaults to all the events of the database.
+
+        Returns:
+            The groups of events with identical content, as lazy [views][cocat.views.View]
+                of at least two events, ordered by their lowest UUID.
+        """
+        uuids = self._event_maps.keys() if events is None else (e._uuid for e in events)
+        groups: dict[str, list[str]] = defaultdict(list)
+        for uuid in uuids:
+            groups[self._event_fingerprint(uuid)].append(uuid)
+        duplicates = sorted(
+            sorted(group) for group in groups.values() if len(group) > 1
+        )
+        return [View(dict.fromkeys(group), self, Event) for group in duplicates]
+
+    def _events_of_bitmap(self, bitmap: int) -> View[Event]:
+        return View(dict.fromkeys(self._membership.events_of(bitmap)), self, Event)
+
+    def union(self, *catalogues: Catalogue) -> View[Event]:
+        """
+        Args:
+            catalogues: The catalogues to combine.
+
+        Returns:
+            A lazy [view][cocat.views.View] of the (static) events which are in any of the catalogues.
+        """
+        bitmap = 0
+        for catalogue in catalogues:
+            bitmap |= self._membership.bitmap(catalogue._uuid)
+        return self._events_of_bitmap(bitmap)
+
+    def intersection(self, *catalogues: Catalogue) -> View[Event]:
+        """
+        Args:
+            catalogues: The catalogues to combine.
+
+        Returns:
+            A lazy [view][cocat.views.View] of the (static) events which are in all of the catalogues.
+        """
+        if not catalogues:
+            return self._events_of_bitmap(0)
+        bitmap = self._membership.bitmap(catalogues[0]._uuid)
+        for catalogue in catalogues[1:]:
+            bitmap &= self._membership.bitmap(catalogue._uuid)
+        return self._events_of_bitmap(bitmap)
+
+    def difference(self, catalogue: Catalogue, *others: Catalogue) -> View[Event]:
+        """
+        Args:
+            catalogue: The catalogue which events to keep.
+            others: The catalogues which events to remove.
+
+        Returns:
+            A lazy [view][cocat.views.View] of the (static) events which are in the catalogue
+                but not in any of the others.
+        """
+        bitmap = self._membership.bitmap(catalogue._uuid)
+        for other in others:
+            bitmap &= ~self._membership.bitmap(other._uuid)
+        return self._events_of_bitmap(bitmap)
+
+    def _get_text_indexes(self) -> tuple[TextIndex, TextIndex]:
+        if self._event_texts is None or self._catalogue_texts is None:
+            self._event_texts = TextIndex()
+            self._catalogue_texts = TextIndex()
+            self._index_event_texts(self._event_maps.keys())
+            self._index_catalogue_texts(self._catalogue_maps.keys())
+        return self._event_texts, self._catalogue_texts
+
+    def search_events(self, query: str, limit: int | None = None) -> list[Event]:
+        """
+        Searches the events by the words in their string attributes and tags.
+        The full-text index is built on the first search, and then kept up-to-date.
+
+        ```py
+        db.search_events("shock magnetopau*")
+        ```
+
+        Args:
+            query: The words that the events must all contain. A word ending with `*`
+                also matches the words which start with it.
+            limit: The maximum number of events to return.
+
+        Returns:
+            The matching events, the most relevant first.
+        """
+        index, _ = self._get_text_indexes()
+        return [Event._from_uuid(uuid, self) for uuid, _ in index.search(query)[:limit]]
+
+    def search_catalogues(
+        self, query: str, limit: int | None = None
+    ) -> list[Catalogue]:
+        """
+        Searches the catalogues by the words in their name, string attributes and tags.
+        The full-text index is built on the first search, and then kept up-to-date.
+
+        Args:
+            query: The words that the catalogues must all contain. A word ending with `*`
+                also matches the words which start with it.
+            limit: The maximum number of catalogues to return.
+
+        Returns:
+            The matching catalogues, the most relevant first.
+        """
+        _, index = self._get_text_indexes()
+        return [
+            Catalogue._from_uuid(uuid, self) for uuid, _ in index.search(query)[:limit]
+        ]
+
+    def save_text_index(self, file_path: str | Path) -> None:
+        """
+        Saves the full-text index to a file, with the state and a hash of the document,
+        so that it doesn't have to be built again when the document is loaded in the same state.
+
+        Args:
+            file_path: The path of the file to write.
+        """
+        event_texts, catalogue_texts = self._get_text_indexes()
+        data = {
+            "state": _decode_state_vector(self._doc.get_state()),
+            "document": self._document_hash(),
+            "events": event_texts.to_dict(),
+            "catalogues": catalogue_texts.to_dict(),
         }
+        Path(file_path).write_text(json.dumps(data))
+
+    def load_text_index(self, file_path: str | Path) -> bool:
+        """
+        Loads a full-text index saved with [save_text_index][cocat.DB.save_text_index].
+
+        Args:
+            file_path: The path of the file to read.
+
+        Returns:
+            Whether the index was loaded, which is only the case if the document
+                is in the same state as when the index was saved.
+        """
+        data = json.loads(Path(file_path).read_text())
+        if data["state"] != _decode_state_vector(self._doc.get_state()):
+            return False
+        # deletions don't change the state vector
+        if data.get("document") != self._document_hash():
+            return False
+        self._event_texts = TextIndex()
+        self._catalogue_texts = TextIndex()
+        for uuid, counts in data["events"].items():
+            if uuid in self._event_maps:
+                self._event_texts.set_counts(uuid, counts)
+        for uuid, counts in data["catalogues"].items():
+            if uuid in self._catalogue_maps:
+                self._catalogue_texts.set_counts(uuid, counts)
+        return True
+
+    def _document_hash(self) -> str:
+        # a hash of the whole document, including the deleted items
+        return blake2b(self._doc.get_update(), digest_size=16).hexdigest()
+
+    def _events_from_uuids(self, uuids: Iterable[str]) -> set[Event]:
+        return {Event._from_uuid(uuid, self) for uuid in uuids}
+
+    def events_overlapping(
+        self,
+        start: datetime | int | float | str,
+        stop: datetime | int | float | str,
+    ) -> set[Event]:
+        """
+        Args:
+            start: The start date of the time range.
+            stop: The stop date of the time range.
+
+        Returns:
+            The events which overlap the time range, bounds included.
+        """
+        _start = time_key(DATETIME_ADAPTER.validate_python(start))
+        _stop = time_key(DATETIME_ADAPTER.validate_python(stop))
+        return self._events_from_uuids(self._time_index.overlapping(_start, _stop))
+
+    def events_containing(self, time: datetime | int | float | str) -> set[Event]:
+        """
+        Args:
+            time: The date that the events must contain.
+
+        Returns:
+            The events which start before (or at) and stop after (or at) the given date.
+        """
+        _time = time_key(DATETIME_ADAPTER.validate_python(time))
+        return self._events_from_uuids(self._time_index.overlapping(_time, _time))
+
+    def events_within(
+        self,
+        start: datetime | int | float | str,
+        stop: datetime | int | float | str,
+    ) -> set[Event]:
+        """
+        Args:
+            start: The start date of the time range.
+            stop: The stop date of the time range.
+
+        Returns:
+            The events which are included in the time range, bounds included.
+        """
+        _start = time_key(DATETIME_ADAPTER.validate_python(start))
+        _stop = time_key(DATETIME_ADAPTER.validate_python(stop))
+        return self._events_from_uuids(self._time_index.within(_start, _stop))
+
+    def _get_columns(self, catalogue_uuid: str | None = None) -> EventColumns:
+        if self._columns_version != self._version:
+            self._columns.clear()
+            self._columns_version = self._version
+        columns = self._columns.get(catalogue_uuid)
+        if columns is None:
+            if catalogue_uuid is None:
+                event_dicts = self._event_maps.to_py()
+                assert event_dicts is not None
+                columns = build_columns(event_dicts.values())
+            else:
+                import numpy as np
+
+                all_columns = self._get_columns()
+                uuids = np.array(
+                    sorted(self._catalogue_maps[catalogue_uuid]["events"].keys()),
+                    dtype="S36",
+                )
+                rows = np.searchsorted(all_columns.uuid, uuids)
+                found = rows < len(all_columns)
+                found[found] = all_columns.uuid[rows[found]] == uuids[found]
+                if not found.all():
+                    # like getting the events of the catalogue
+                    raise KeyError(uuids[~found][0].decode())
+                columns = all_columns._take(rows)
+            self._columns[catalogue_uuid] = columns
+        return columns
+
+    def _has_columns(self) -> bool:
+        # whether the snapshot of all the events is built and up-to-date
+        return self._columns_version == self._version and None in self._columns
+
+    def to_columns(self) -> EventColumns:
+        """
+        Requires [NumPy](https://numpy.org).
+
+        Returns:
+            A [columnar snapshot][cocat.columns.EventColumns] of the events in the database.
+                It is cached until the database changes.
+        """
+        return self._get_columns()
 
     def create_catalogue(
         self,
@@ -334,6 +1241,8 @@ class DB:
             model = CatalogueModel(**kwargs)
             catalogue = Catalogue._new(model, self)
             self._catalogue_maps[str(model.uuid)] = catalogue._map
+            # the index is otherwise only updated when the transaction is committed
+            self._names.add(str(model.uuid), model.name)
             if events is not None:
                 if isinstance(events, Event):
                     events = [events]
@@ -390,6 +1299,48 @@ class DB:
             self._event_maps[str(model.uuid)] = event._map
             return event
 
+    def delete_events(self, events: Iterable[Event] | Event) -> None:
+        """
+        Removes events from the database, in a single transaction.
+
+        Args:
+            events: The event(s) to remove.
+        """
+        with self.transaction():
+            event_list = [events] if isinstance(events, Event) else events
+            for event in event_list:
+                event.delete()
+
+    def create_events(self, records: Iterable[dict[str, Any]]) -> list[Event]:
+        """
+        Creates events in the database, in a single transaction.
+        This is much faster than calling [create_event][cocat.DB.create_event] for each event,
+        since all the events are validated at once.
+
+        Args:
+            records: The events to create, as dictionaries with the same keys
+                as the arguments of [create_event][cocat.DB.create_event].
+
+        Returns:
+            The created [Events][cocat.Event], in the same order as the records.
+        """
+        models = EVENTS_ADAPTER.validate_python(
+            [
+                {key: value for key, value in record.items() if value is not None}
+                for record in records
+            ]
+        )
+        return self._insert_events(models)
+
+    def _insert_events(self, models: list[EventModel]) -> list[Event]:
+        with self.transaction():
+            events = []
+            for model in models:
+                event = Event._new(model, self)
+                self._event_maps[event._uuid] = event._map
+                events.append(event)
+            return events
+
     def on_create_catalogue(self, callback: Callable[[Catalogue], None]) -> None:
         """
         Registers a callback to be called when a catalogue is created.
@@ -412,6 +1363,7 @@ class DB:
         """
         Args:
             uuid_or_name: The UUID of the catalogue to get, or its name.
+                If several catalogues have the same name, the one with the lowest UUID is returned.
 
         Returns:
             The catalogue with the given UUID or name.
@@ -420,14 +1372,12 @@ class DB:
         try:
             catalogue = Catalogue._from_uuid(uuid_or_name, self)
         except KeyError:
-            for uuid in self._catalogue_maps:
-                if self._catalogue_maps[uuid]["name"] == uuid_or_name:
-                    catalogue = Catalogue._from_uuid(uuid, self)
-                    break
-            else:
+            uuid = self._names.get(uuid_or_name)
+            if uuid is None:
                 raise RuntimeError(
                     f"No catalogue found with name or UUID: {uuid_or_name}"
                 )
+            catalogue = Catalogue._from_uuid(uuid, self)
         return catalogue
 
     def get_event(self, uuid: UUID | str) -> Event:
@@ -486,27 +1436,20 @@ class DB:
         Returns:
             The database as a dictionary.
         """
-        db_dict = {
-            "events": list(
-                sorted(
-                    [event.to_dict() for event in self.events],
-                    key=lambda event: event["uuid"],
-                )
-            ),
-            "catalogues": list(
-                sorted(
-                    [catalogue.to_dict(True) for catalogue in self.catalogues],
-                    key=lambda catalogue: catalogue["uuid"],
-                )
-            ),
+        return {
+            "events": list(self._event_dicts()),
+            "catalogues": list(self._catalogue_dicts()),
         }
-        events = db_dict["events"]
-        for idx, event_dict in enumerate(events):
-            event_dict = {
-                key: event_dict[key] for key in EventModel.model_fields.keys()
-            }
-            events[idx] = event_dict
-        return db_dict
+
+    def _event_dicts(self) -> Iterator[dict[str, Any]]:
+        # the events as dictionaries, in the order of their UUIDs, one at a time
+        for uuid in sorted(self._event_maps.keys()):
+            yield Event._from_uuid(uuid, self).to_dict()
+
+    def _catalogue_dicts(self) -> Iterator[dict[str, Any]]:
+        # the catalogues as dictionaries with the UUIDs of their events, in the order of their UUIDs
+        for uuid in sorted(self._catalogue_maps.keys()):
+            yield Catalogue._from_uuid(uuid, self).to_dict(True)
 
     def to_json(self) -> str:
         """
@@ -515,6 +1458,79 @@ class DB:
         """
         return json.dumps(self.to_dict())
 
+    def dump_jsonl(self, fp: IO[str]) -> None:
+        """
+        Writes the database as [JSON Lines](https://jsonlines.org), one record at a time,
+        without building the whole dictionary in memory: each line is `{"event": ...}`
+        or `{"catalogue": ...}`, where the record is like in [to_dict][cocat.DB.to_dict].
+        The events are written first, then the catalogues with the UUIDs of their events.
+
+        Args:
+            fp: The text file to write to.
+        """
+        for event_dict in self._event_dicts():
+            fp.write(json.dumps({"event": event_dict}) + "\n")
+        for catalogue_dict in self._catalogue_dicts():
+            fp.write(json.dumps({"catalogue": catalogue_dict}) + "\n")
+
+    def load_jsonl(
+        self,
+        fp: IO[str],
+        on_conflict: OnConflict = "replace",
+        batch_size: int = JSONL_BATCH_SIZE,
+    ) -> ImportCounts:
+        """
+        Imports events and catalogues written by [dump_jsonl][cocat.DB.dump_jsonl],
+        reading them line by line and [importing][cocat.DB.import_dict] them by batches,
+        with one transaction per batch. The events of a catalogue must come before it.
+
+        Args:
+            fp: The text file to read from.
+            on_conflict: What to do with the events and catalogues which UUID already exists,
+                see [import_dict][cocat.DB.import_dict].
+            batch_size: The number of records imported in each transaction.
+
+        Returns:
+            The number of inserted, updated and unchanged events and catalogues.
+
+        Raises:
+            ValueError: If a line is not an event or a catalogue record.
+        """
+        counts = ImportCounts()
+        db_dict: dict[str, list[Any]] = {"events": [], "catalogues": []}
+        size = 0
+        for number, line in enumerate(fp, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "event" in record:
+                db_dict["events"].append(record["event"])
+            elif "catalogue" in record:
+                db_dict["catalogues"].append(record["catalogue"])
+            else:
+                raise ValueError(f"Not an event or a catalogue on line {number}")
+            size += 1
+            if size == batch_size:
+                counts += self.import_dict(db_dict, on_conflict)
+                db_dict = {"events": [], "catalogues": []}
+                size = 0
+        if size:
+            counts += self.import_dict(db_dict, on_conflict)
+        return counts
+
+
+def _decode_state_vector(state: bytes) -> dict[str, int]:
+    # the clock of each client in an encoded state vector, which order is not defined
+    numbers = []
+    number = shift = 0
+    for byte in state:
+        number |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            numbers.append(number)
+            number = shift = 0
+    return {str(client): clock for client, clock in zip(numbers[1::2], numbers[2::2])}
+
 
 def send_update(destination: DB, source: DB, event: TransactionEvent) -> None:
     message = create_update_message(event.update)
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from .index import time_key
+
+# event dates are stored as strings
+STRING_TIMES = 1
+# event dates are stored as microseconds since the Unix epoch, with their UTC offset
+# in seconds (or None for naive dates) in a separate key
+NUMERIC_TIMES = 2
+# CRDT numbers are doubles, which only hold the microseconds since the Unix epoch exactly
+# up to 2**53 (about 285 years), so dates outside of this range are stored as strings
+MAX_NUMERIC_TIME = 2**53
+
+FORMAT_VERSIONS = (STRING_TIMES, NUMERIC_TIMES)
+NAIVE_EPOCH = datetime(1970, 1, 1)
+
+
+def tz_key(name: str) -> str:
+    return f"{name}_tz"
+
+
+def encode_time(name: str, value: datetime, format_version: int) -> dict[str, Any]:
+    """
+    With numeric dates, the dates which are more than 2**53 microseconds away from the Unix epoch
+    (before July 1684 or after June 2255) are stored as strings, which all the versions can decode.
+
+    Args:
+        name: The name of the date field.
+        value: The date to encode.
+        format_version: The format version of the document.
+
+    Returns:
+        The keys and values to write in the event map.
+    """
+    if format_version == STRING_TIMES:
+        return {name: str(value)}
+    key = time_key(value)
+    if abs(key) > MAX_NUMERIC_TIME:
+        # the offset is part of the string
+        return {name: str(value), tz_key(name): None}
+    offset = value.utcoffset()
+    return {
+        name: key,
+        tz_key(name): None if offset is None else offset.total_seconds(),
+    }
+
+
+def decode_time(value: str | float, tz: float | None = None) -> datetime:
+    """
+    Decodes a date stored with any format version.
+
+    Args:
+        value: The stored date.
+        tz: The stored UTC offset, only used for numeric dates.
+
+    Returns:
+        The decoded date.
+    """
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    naive = NAIVE_EPOCH + timedelta(microseconds=int(value))
+    if tz is None:
+        return naive
+    utc = naive.replace(tzinfo=timezone.utc)
+    return utc.astimezone(timezone(timedelta(seconds=tz)))
+
+
+def stored_time_key(value: str | float) -> int:
+    """
+    Args:
+        value: The stored date, with any format version.
+
+    Returns:
+        The number of microseconds since the Unix epoch, without decoding numeric dates.
+    """
+    if isinstance(value, str):
+        return time_key(datetime.fromisoformat(value))
+    return int(value)
@@ -10,7 +10,8 @@ from rich.console import Console
 from rich.pretty import pprint
 
 from .base import Mixin
-from .models import EventModel
+from .encoding import decode_time, encode_time, tz_key
+from .models import EventModel, validate_field
 
 if sys.version_info >= (3, 11):
     from typing import Self
@@ -18,15 +19,22 @@ else:  # pragma: nocover
     from typing_extensions import Self
 
 if TYPE_CHECKING:
+    from .catalogue import Catalogue
     from .db import DB
 
 
 @dataclass(eq=False)
 class Event(Mixin):
+    __slots__ = ("_uuid", "_map", "_db", "_values", "__weakref__")
+
     _uuid: str
     _map: Map
     _db: "DB"
 
+    def __post_init__(self) -> None:
+        # the decoded property values, released with the object
+        self._values: dict[str, Any] = {}
+
     def _check_deleted(self):
         if self._uuid not in self._db._event_maps:
             raise RuntimeError("Event has been deleted")
@@ -36,7 +44,8 @@ class Event(Mixin):
         if not isinstance(other, Event):
             return NotImplemented
 
-        return self.to_dict() == other.to_dict()
+        other._check_deleted()
+        return self._uuid == other._uuid and self.fingerprint == other.fingerprint
 
     def __repr__(self) -> str:
         console = Console()
@@ -53,24 +62,36 @@ class Event(Mixin):
 
     def _get(self, name: str) -> Any:
         self._check_deleted()
-        value = self._map[name]
-        model = EventModel.__pydantic_validator__.validate_assignment(
-            EventModel.model_construct(), name, value
-        )
-        return getattr(model, name)
-
-    def _set(
-        self, name: str, value: Any, func: Callable[[Any], Any] | None = None
-    ) -> None:
+        values = self._values
+        if name not in values:
+            if name in ("start", "stop"):
+                values[name] = decode_time(self._map[name], self._map.get(tz_key(name)))
+            else:
+                values[name] = validate_field(EventModel, name, self._map[name])
+        return values[name]
+
+    def _set(self, name: str, value: Any) -> None:
         with self._db.transaction():
             self._check_deleted()
-            model = EventModel.__pydantic_validator__.validate_assignment(
-                EventModel.model_construct(), name, value
-            )
-            val = getattr(model, name)
-            if func is not None:
-                val = func(val)
+            val = validate_field(EventModel, name, value)
             self._map[name] = val
+            # the cache is otherwise only invalidated when the transaction is committed
+            self._values.pop(name, None)
+            self._changed()
+
+    def _set_time(self, name: str, value: Any) -> None:
+        with self._db.transaction():
+            self._check_deleted()
+            val = validate_field(EventModel, name, value)
+            format_version = self._db.format_version
+            for key, encoded in encode_time(name, val, format_version).items():
+                self._map[key] = encoded
+            self._values.pop(name, None)
+            self._changed()
+
+    def _changed(self) -> None:
+        # the fingerprints are otherwise only invalidated when the transaction is committed
+        self._db._forget_event_fingerprint(self._uuid)
 
     def _on_change(self, name: str, callback: Callable[[Any], None]) -> None:
         self._check_deleted()
@@ -93,11 +114,12 @@ class Event(Mixin):
     @classmethod
     def _new(cls, model: EventModel, db: "DB") -> Self:
         uuid = str(model.uuid)
+        format_version = db.format_version
         map = Map(
             dict(
                 uuid=uuid,
-                start=str(model.start),
-                stop=str(model.stop),
+                **encode_time("start", model.start, format_version),
+                **encode_time("stop", model.stop, format_version),
                 author=model.author,
                 tags=Map({val: True for val in model.tags}),
                 products=Map({val: True for val in model.products}),
@@ -105,23 +127,36 @@ class Event(Mixin):
                 attributes=Map(model.attributes),
             )
         )
-        self = cls(uuid, map, db)
-        db._events[uuid] = self
+        # the live object is kept if the event is replaced
+        live = db._events.get(uuid)
+        if isinstance(live, cls):
+            self = live
+            self._map = map
+        else:
+            self = cls(uuid, map, db)
+            db._events[uuid] = self
+        self._values.clear()
+        db._forget_event_fingerprint(uuid)
         return self
 
     @classmethod
-    def _from_map(cls, map: Map, db: "DB") -> Self:
-        uuid = map["uuid"]
-        self = cls(uuid, map, db)
-        db._events[uuid] = self
+    def _from_uuid(cls, uuid: str, db: "DB") -> "Event":
+        # return the live object if there is one, so that it is shared
+        self = db._events.get(uuid)
+        if self is None:
+            self = cls(uuid, db._event_maps[uuid], db)
+            db._events[uuid] = self
         return self
 
-    @classmethod
-    def _from_uuid(cls, uuid: str, db: "DB") -> Self:
-        map = db._event_maps[uuid]
-        self = cls(uuid, map, db)
-        db._events[uuid] = self
-        return self
+    @property
+    def fingerprint(self) -> str:
+        """
+        Returns:
+            A hash of the content of the event (everything but its UUID), which is cached
+                until the event changes. Events with the same content have the same fingerprint.
+        """
+        self._check_deleted()
+        return self._db._event_fingerprint(self._uuid)
 
     def to_dict(self) -> dict[str, Any]:
         """
@@ -131,6 +166,9 @@ class Event(Mixin):
         self._check_deleted()
         dct = self._map.to_py()
         assert dct is not None
+        for name in ("start", "stop"):
+            if not isinstance(dct[name], str):
+                dct[name] = str(decode_time(dct[name], dct[tz_key(name)]))
         dct["tags"] = list(sorted(dct["tags"].keys()))
         dct["products"] = list(sorted(dct["products"].keys()))
         dct["attributes"] = dict(sorted(dct["attributes"].items()))
@@ -213,11 +251,28 @@ class Event(Mixin):
         with self._db.transaction():
             self._check_deleted()
             del self._db._event_maps[self._uuid]
-            for uuid, catalogue in self._db._catalogue_maps.items():
+            self._db._events.pop(self._uuid, None)
+            for uuid in self._db._membership.catalogues_of(self._uuid):
+                catalogue = self._db._catalogue_maps.get(uuid)
+                if catalogue is None:
+                    continue
                 catalogue_events = catalogue["events"]
                 if self._uuid in catalogue_events:
                     del catalogue_events[self._uuid]
 
+    @property
+    def catalogues(self) -> set["Catalogue"]:
+        """
+        Returns:
+            The catalogues which contain the event.
+        """
+        self._check_deleted()
+        return {
+            self._db.get_catalogue(uuid)
+            for uuid in self._db._membership.catalogues_of(self._uuid)
+            if uuid in self._db._catalogue_maps
+        }
+
     @property
     def start(self) -> datetime:
         """
@@ -232,7 +287,7 @@ class Event(Mixin):
         Args:
             value: The start date of the event to set.
         """
-        self._set("start", value, str)
+        self._set_time("start", value)
 
     @property
     def stop(self) -> datetime:
@@ -248,7 +303,7 @@ class Event(Mixin):
         Args:
             value: The stop date of the event to set.
         """
-        self._set("stop", value, str)
+        self._set_time("stop", value)
 
     @property
     def range(self) -> tuple[datetime, datetime]:
@@ -266,8 +321,8 @@ class Event(Mixin):
         """
         with self._db.transaction():
             start, stop = value
-            self._set("start", start, str)
-            self._set("stop", stop, str)
+            self._set_time("start", start)
+            self._set_time("stop", stop)
 
     @property
     def rating(self) -> int:
@@ -0,0 +1,133 @@
+import json
+from collections.abc import Iterable
+from datetime import datetime
+from hashlib import blake2b
+from typing import Any
+
+from .encoding import decode_time, tz_key
+from .index import time_key
+from .models import CatalogueModel, EventModel
+
+
+def _canonical(value: Any) -> Any:
+    # numbers are stored as floats, but booleans are not numbers
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def _time(value: datetime) -> list[Any]:
+    offset = value.utcoffset()
+    return [time_key(value), None if offset is None else offset.total_seconds()]
+
+
+def _event_fields(
+    start: datetime,
+    stop: datetime,
+    author: str,
+    tags: Iterable[str],
+    products: Iterable[str],
+    rating: Any,
+    attributes: dict[str, Any],
+) -> dict[str, Any]:
+    return {
+        "start": _time(start),
+        "stop": _time(stop),
+        "author": author,
+        "tags": sorted(set(tags)),
+        "products": sorted(set(products)),
+        "rating": _canonical(rating),
+        "attributes": _canonical(attributes),
+    }
+
+
+def event_fields(model: EventModel) -> dict[str, Any]:
+    """
+    Args:
+        model: The event.
+
+    Returns:
+        The content of the event (without its UUID), normalized like it is stored:
+            dates are times since the Unix epoch with their UTC offset, numbers are floats,
+            and tags and products are sorted.
+    """
+    return _event_fields(
+        model.start,
+        model.stop,
+        model.author,
+        model.tags,
+        model.products,
+        model.rating,
+        model.attributes,
+    )
+
+
+def stored_event_fields(data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Args:
+        data: The event map of the document, as a dictionary.
+
+    Returns:
+        The content of the event, normalized like in [event_fields][cocat.fingerprint.event_fields].
+    """
+    return _event_fields(
+        decode_time(data["start"], data.get(tz_key("start"))),
+        decode_time(data["stop"], data.get(tz_key("stop"))),
+        data["author"],
+        data["tags"],
+        data["products"],
+        data["rating"],
+        data["attributes"],
+    )
+
+
+def catalogue_fields(model: CatalogueModel) -> dict[str, Any]:
+    """
+    Args:
+        model: The catalogue.
+
+    Returns:
+        The content of the catalogue (without its UUID), normalized like it is stored.
+    """
+    return {
+        "name": model.name,
+        "author": model.author,
+        "tags": sorted(set(model.tags)),
+        "attributes": _canonical(model.attributes),
+        "events": sorted(set(model.events)),
+    }
+
+
+def stored_catalogue_fields(data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Args:
+        data: The catalogue map of the document, as a dictionary.
+
+    Returns:
+        The content of the catalogue, normalized like in [catalogue_fields][cocat.fingerprint.catalogue_fields].
+    """
+    return {
+        "name": data["name"],
+        "author": data["author"],
+        "tags": sorted(data["tags"]),
+        "attributes": _canonical(data["attributes"]),
+        "events": sorted(data["events"]),
+    }
+
+
+def fingerprint(fields: dict[str, Any]) -> str:
+    """
+    Args:
+        fields: The normalized content of an event or a catalogue.
+
+    Returns:
+        A hash of the content, which is equal for records with the same content.
+    """
+    data = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return blake2b(data.encode(), digest_size=16).hexdigest()
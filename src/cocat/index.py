@@ -0,0 +1,607 @@
+import math
+import re
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, Set
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# the types of the attribute values which are indexed
+SCALARS = (str, int, float, bool, type(None))
+EMPTY: frozenset[str] = frozenset()
+WORD = re.compile(r"\w+")
+
+
+def time_key(value: datetime) -> int:
+    """
+    Args:
+        value: The date to convert. A naive date is considered to be in UTC.
+
+    Returns:
+        The number of microseconds since the Unix epoch.
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+class IntervalIndex:
+    """
+    An index of time intervals, for range and overlap queries.
+
+    Intervals are kept sorted by start time, with a segment tree of the minimum
+    and maximum stop times, so that queries cost O(log n + k).
+    Changes are buffered and merged on the next query once there are too many of them,
+    which keeps updates cheap while bulk loading.
+    """
+
+    def __init__(self) -> None:
+        self._ranges: dict[str, tuple[int, int]] = {}
+        self._uuids: list[str] = []
+        self._starts: list[int] = []
+        self._stops: list[int] = []
+        self._size = 0
+        self._max_stops: list[float] = []
+        self._min_stops: list[float] = []
+        self._built: set[str] = set()
+        self._stale: set[str] = set()
+        self._pending: dict[str, tuple[int, int]] = {}
+
+    def add(self, uuid: str, start: int, stop: int) -> None:
+        self._ranges[uuid] = (start, stop)
+        self._pending[uuid] = (start, stop)
+        if uuid in self._built:
+            self._stale.add(uuid)
+
+    def remove(self, uuid: str) -> None:
+        self._ranges.pop(uuid, None)
+        self._pending.pop(uuid, None)
+        if uuid in self._built:
+            self._stale.add(uuid)
+
+    def get(self, uuid: str) -> tuple[int, int]:
+        """
+        Returns:
+            The start and stop of the interval.
+        """
+        return self._ranges[uuid]
+
+    def _build(self) -> None:
+        items = sorted(self._ranges.items(), key=lambda item: item[1])
+        self._uuids = [uuid for uuid, _ in items]
+        self._starts = [start for _, (start, _) in items]
+        self._stops = [stop for _, (_, stop) in items]
+        size = 1
+        while size < len(items):
+            size *= 2
+        max_stops: list[float] = [float("-inf")] * (2 * size)
+        min_stops: list[float] = [float("inf")] * (2 * size)
+        max_stops[size : size + len(items)] = self._stops
+        min_stops[size : size + len(items)] = self._stops
+        for node in range(size - 1, 0, -1):
+            max_stops[node] = max(max_stops[2 * node], max_stops[2 * node + 1])
+            min_stops[node] = min(min_stops[2 * node], min_stops[2 * node + 1])
+        self._size = size
+        self._max_stops = max_stops
+        self._min_stops = min_stops
+        self._built = set(self._uuids)
+        self._stale.clear()
+        self._pending.clear()
+
+    def _refresh(self) -> None:
+        threshold = max(1024, int(len(self._ranges) ** 0.5))
+        if len(self._pending) + len(self._stale) > threshold:
+            self._build()
+
+    def _search(
+        self, tree: list[float], lo: int, hi: int, accept: Callable[[float], bool]
+    ) -> Iterator[str]:
+        # walk down the segment tree, only into nodes which may hold a match
+        if lo >= hi:
+            return
+        stack = [(1, 0, self._size)]
+        while stack:
+            node, node_lo, node_hi = stack.pop()
+            if node_hi <= lo or node_lo >= hi or not accept(tree[node]):
+                continue
+            if node >= self._size:
+                uuid = self._uuids[node - self._size]
+                if uuid not in self._stale:
+                    yield uuid
+                continue
+            mid = (node_lo + node_hi) // 2
+            stack.append((2 * node + 1, mid, node_hi))
+            stack.append((2 * node, node_lo, mid))
+
+    def overlapping(self, start: int, stop: int) -> set[str]:
+        """
+        Returns:
+            The UUIDs of the intervals which overlap `[start, stop]`.
+        """
+        self._refresh()
+        hi = bisect_right(self._starts, stop)
+        result = set(self._search(self._max_stops, 0, hi, lambda v: v >= start))
+        result.update(
+            uuid
+            for uuid, (_start, _stop) in self._pending.items()
+            if _start <= stop and _stop >= start
+        )
+        return result
+
+    def starting(self, start: float, stop: float) -> set[str]:
+        """
+        Returns:
+            The UUIDs of the intervals which start in `[start, stop]`.
+        """
+        self._refresh()
+        lo = bisect_left(self._starts, start)
+        hi = bisect_right(self._starts, stop)
+        result = {uuid for uuid in self._uuids[lo:hi] if uuid not in self._stale}
+        result.update(
+            uuid
+            for uuid, (_start, _stop) in self._pending.items()
+            if start <= _start <= stop
+        )
+        return result
+
+    def stopping(self, start: float, stop: float) -> set[str]:
+        """
+        Returns:
+            The UUIDs of the intervals which stop in `[start, stop]`.
+        """
+        self._refresh()
+        size = len(self._uuids)
+        if start == float("-inf"):
+            uuids = self._search(self._min_stops, 0, size, lambda v: v <= stop)
+            result = set(uuids)
+        else:
+            uuids = self._search(self._max_stops, 0, size, lambda v: v >= start)
+            result = {uuid for uuid in uuids if self._ranges[uuid][1] <= stop}
+        result.update(
+            uuid
+            for uuid, (_start, _stop) in self._pending.items()
+            if start <= _stop <= stop
+        )
+        return result
+
+    def within(self, start: int, stop: int) -> set[str]:
+        """
+        Returns:
+            The UUIDs of the intervals which are included in `[start, stop]`.
+        """
+        self._refresh()
+        lo = bisect_left(self._starts, start)
+        hi = bisect_right(self._starts, stop)
+        result = set(self._search(self._min_stops, lo, hi, lambda v: v <= stop))
+        result.update(
+            uuid
+            for uuid, (_start, _stop) in self._pending.items()
+            if _start >= start and _stop <= stop
+        )
+        return result
+
+
+def to_bitmap(ordinals: Iterable[int]) -> int:
+    """
+    Args:
+        ordinals: The positions of the bits to set.
+
+    Returns:
+        The bitmap, as an integer.
+    """
+    positions = list(ordinals)
+    if not positions:
+        return 0
+    data = bytearray((max(positions) >> 3) + 1)
+    for position in positions:
+        data[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(data, "little")
+
+
+def from_bitmap(bitmap: int) -> list[int]:
+    """
+    Args:
+        bitmap: The bitmap, as an integer.
+
+    Returns:
+        The positions of the bits which are set.
+    """
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) >> 3, "little")
+    return [
+        (idx << 3) | bit
+        for idx, byte in enumerate(data)
+        if byte
+        for bit in range(8)
+        if byte >> bit & 1
+    ]
+
+
+class MembershipIndex:
+    """
+    A two-way mapping between catalogues and the events they contain.
+
+    The events which are in a catalogue also have a dense ordinal, and the events of each
+    catalogue are mirrored in a bitmap of these ordinals, for set operations on catalogues.
+    """
+
+    def __init__(self) -> None:
+        self._events: dict[str, set[str]] = {}
+        self._catalogues: dict[str, set[str]] = {}
+        self._ordinals: dict[str, int] = {}
+        self._uuids: list[str] = []
+        # the ordinals of the events which are not in any catalogue anymore
+        self._free: list[int] = []
+        self._bitmaps: dict[str, int] = {}
+
+    def _ordinal(self, event: str) -> int:
+        ordinal = self._ordinals.get(event)
+        if ordinal is None:
+            if self._free:
+                ordinal = self._free.pop()
+                self._uuids[ordinal] = event
+            else:
+                ordinal = len(self._uuids)
+                self._uuids.append(event)
+            self._ordinals[event] = ordinal
+        return ordinal
+
+    def add(self, catalogue: str, events: Iterable[str]) -> None:
+        catalogue_events = self._events.setdefault(catalogue, set())
+        ordinals = []
+        for event in events:
+            if event not in catalogue_events:
+                catalogue_events.add(event)
+                ordinals.append(self._ordinal(event))
+            self._catalogues.setdefault(event, set()).add(catalogue)
+        self._bitmaps[catalogue] = self._bitmaps.get(catalogue, 0) | to_bitmap(ordinals)
+
+    def remove(self, catalogue: str, events: Iterable[str]) -> None:
+        catalogue_events = self._events.get(catalogue, set())
+        ordinals = []
+        for event in events:
+            if event in catalogue_events:
+                catalogue_events.discard(event)
+                ordinals.append(self._ordinals[event])
+            event_catalogues = self._catalogues.get(event)
+            if event_catalogues is not None:
+                event_catalogues.discard(catalogue)
+                if not event_catalogues:
+                    del self._catalogues[event]
+        if ordinals:
+            self._bitmaps[catalogue] &= ~to_bitmap(ordinals)
+            for ordinal in ordinals:
+                event = self._uuids[ordinal]
+                if event not in self._catalogues:
+                    del self._ordinals[event]
+                    self._free.append(ordinal)
+
+    def set_catalogue(self, catalogue: str, events: Iterable[str]) -> None:
+        self.remove_catalogue(catalogue)
+        self.add(catalogue, events)
+
+    def remove_catalogue(self, catalogue: str) -> None:
+        self.remove(catalogue, list(self._events.get(catalogue, ())))
+        self._events.pop(catalogue, None)
+        self._bitmaps.pop(catalogue, None)
+
+    def catalogues_of(self, event: str) -> set[str]:
+        """
+        Returns:
+            The UUIDs of the catalogues which contain the event.
+        """
+        return set(self._catalogues.get(event, ()))
+
+    def bitmap(self, catalogue: str) -> int:
+        """
+        Returns:
+            The bitmap of the ordinals of the events in the catalogue.
+        """
+        return self._bitmaps.get(catalogue, 0)
+
+    def events_of(self, bitmap: int) -> list[str]:
+        """
+        Returns:
+            The UUIDs of the events which ordinals are set in the bitmap.
+        """
+        return [self._uuids[ordinal] for ordinal in from_bitmap(bitmap)]
+
+
+class NameIndex:
+    """
+    A mapping from catalogue names to catalogue UUIDs.
+    """
+
+    def __init__(self) -> None:
+        self._uuids: dict[str, set[str]] = {}
+        self._names: dict[str, str] = {}
+
+    def add(self, uuid: str, name: str) -> None:
+        self.remove(uuid)
+        self._names[uuid] = name
+        self._uuids.setdefault(name, set()).add(uuid)
+
+    def remove(self, uuid: str) -> None:
+        name = self._names.pop(uuid, None)
+        if name is not None:
+            uuids = self._uuids[name]
+            uuids.discard(uuid)
+            if not uuids:
+                del self._uuids[name]
+
+    def get(self, name: str) -> str | None:
+        """
+        Returns:
+            The UUID of the catalogue with the given name, or `None` if there is none.
+            If several catalogues have the same name, the lowest UUID is returned.
+        """
+        uuids = self._uuids.get(name)
+        if not uuids:
+            return None
+        return min(uuids)
+
+
+class TermIndex:
+    """
+    A mapping from terms (e.g. tags) to the UUIDs of the events which have them.
+    """
+
+    def __init__(self) -> None:
+        self._uuids: dict[str, set[str]] = {}
+        self._terms: dict[str, set[str]] = {}
+
+    def add(self, uuid: str, terms: Iterable[str]) -> None:
+        uuid_terms = self._terms.setdefault(uuid, set())
+        for term in terms:
+            uuid_terms.add(term)
+            self._uuids.setdefault(term, set()).add(uuid)
+
+    def discard(self, uuid: str, terms: Iterable[str]) -> None:
+        uuid_terms = self._terms.get(uuid, set())
+        for term in terms:
+            uuid_terms.discard(term)
+            uuids = self._uuids.get(term)
+            if uuids is not None:
+                uuids.discard(uuid)
+                if not uuids:
+                    del self._uuids[term]
+
+    def remove(self, uuid: str) -> None:
+        self.discard(uuid, list(self._terms.get(uuid, ())))
+        self._terms.pop(uuid, None)
+
+    def get(self, term: str) -> set[str]:
+        """
+        Returns:
+            The UUIDs of the events which have the term.
+        """
+        return set(self._uuids.get(term, ()))
+
+    def lookup(self, term: str) -> Set[str]:
+        """
+        Returns:
+            The UUIDs of the events which have the term, without copying them.
+        """
+        return self._uuids.get(term, EMPTY)
+
+    def has(self, uuid: str, term: str) -> bool:
+        """
+        Returns:
+            Whether the event has the term.
+        """
+        return term in self._terms.get(uuid, ())
+
+
+def attribute_kind(value: Any) -> type | None:
+    """
+    Args:
+        value: The value of an attribute.
+
+    Returns:
+        The kind of values it can be ordered with (`str` or `float`),
+            or `None` if it is not a string or a number.
+    """
+    if isinstance(value, str):
+        return str
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float
+    return None
+
+
+def _attribute_key(value: Any) -> tuple[type | None, Any]:
+    # booleans are not equal to numbers
+    return (bool if isinstance(value, bool) else attribute_kind(value), value)
+
+
+def attribute_matches(value: Any, condition: Any) -> bool:
+    """
+    Args:
+        value: The value of an attribute.
+        condition: The value to match, or a `(min, max)` tuple to match a range of strings
+            or numbers, where a `None` bound is open.
+
+    Returns:
+        Whether the value matches the condition.
+    """
+    if not isinstance(condition, tuple):
+        return isinstance(value, SCALARS) and _attribute_key(value) == _attribute_key(
+            condition
+        )
+    low, high = condition
+    kind = attribute_kind(low if high is None else high)
+    return (
+        kind is not None
+        and attribute_kind(value) is kind
+        and (low is None or low <= value)
+        and (high is None or value <= high)
+    )
+
+
+class AttributeIndex:
+    """
+    A mapping from the values of an event attribute to the UUIDs of the events which have them.
+    Only scalar values (strings, numbers, booleans and `None`) are indexed.
+    A sorted index also answers range queries on strings and numbers.
+    """
+
+    def __init__(self, ordered: bool = False) -> None:
+        self.ordered = ordered
+        self._uuids: dict[tuple[type | None, Any], set[str]] = {}
+        self._values: dict[str, Any] = {}
+        # the distinct strings and numbers, sorted
+        self._sorted: dict[type, list[Any]] = {str: [], float: []}
+
+    def add(self, uuid: str, value: Any) -> None:
+        self.remove(uuid)
+        if not isinstance(value, SCALARS):
+            return
+        self._values[uuid] = value
+        key = _attribute_key(value)
+        uuids = self._uuids.get(key)
+        if uuids is None:
+            uuids = self._uuids[key] = set()
+            kind = attribute_kind(value)
+            if self.ordered and kind is not None:
+                insort(self._sorted[kind], value)
+        uuids.add(uuid)
+
+    def remove(self, uuid: str) -> None:
+        if uuid not in self._values:
+            return
+        value = self._values.pop(uuid)
+        key = _attribute_key(value)
+        uuids = self._uuids[key]
+        uuids.discard(uuid)
+        if not uuids:
+            del self._uuids[key]
+            kind = attribute_kind(value)
+            if self.ordered and kind is not None:
+                values = self._sorted[kind]
+                del values[bisect_left(values, value)]
+
+    def lookup(self, value: Any) -> Set[str]:
+        """
+        Returns:
+            The UUIDs of the events which attribute is equal to the value, without copying them.
+                Booleans are not equal to numbers.
+        """
+        if not isinstance(value, SCALARS):
+            return EMPTY
+        return self._uuids.get(_attribute_key(value), EMPTY)
+
+    def between(self, low: Any, high: Any) -> set[str]:
+        """
+        Only available on sorted indexes.
+
+        Args:
+            low: The minimum value, or `None` for no minimum.
+            high: The maximum value, or `None` for no maximum.
+
+        Returns:
+            The UUIDs of the events which attribute is in `[low, high]`,
+                and has the same kind as the bounds.
+        """
+        assert self.ordered
+        kind = attribute_kind(low if high is None else high)
+        if kind is None:
+            return set()
+        values = self._sorted[kind]
+        lo = 0 if low is None else bisect_left(values, low)
+        hi = len(values) if high is None else bisect_right(values, high)
+        return set().union(*(self._uuids[(kind, value)] for value in values[lo:hi]))
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Args:
+        text: The text to split.
+
+    Returns:
+        The lowercase words in the text.
+    """
+    return WORD.findall(text.lower())
+
+
+class TextIndex:
+    """
+    An inverted index of the words in the texts of events or catalogues,
+    for word and prefix queries ranked by TF-IDF.
+    """
+
+    def __init__(self) -> None:
+        self._postings: dict[str, dict[str, int]] = {}
+        self._counts: dict[str, dict[str, int]] = {}
+        # the sorted words, for prefix queries, or None if it must be sorted again
+        self._words: list[str] | None = []
+
+    def add(self, uuid: str, texts: Iterable[str]) -> None:
+        counts = Counter(word for text in texts for word in tokenize(text))
+        self.set_counts(uuid, dict(counts))
+
+    def set_counts(self, uuid: str, counts: dict[str, int]) -> None:
+        self.remove(uuid)
+        if not counts:
+            return
+        self._counts[uuid] = counts
+        for word, count in counts.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                self._words = None
+            postings[uuid] = count
+
+    def remove(self, uuid: str) -> None:
+        for word in self._counts.pop(uuid, ()):
+            postings = self._postings[word]
+            del postings[uuid]
+            if not postings:
+                del self._postings[word]
+                self._words = None
+
+    def _matching_words(self, word: str, prefix: bool) -> list[str]:
+        if not prefix:
+            return [word] if word in self._postings else []
+        if self._words is None:
+            self._words = sorted(self._postings)
+        lo = bisect_left(self._words, word)
+        hi = bisect_left(self._words, word + "\U0010ffff")
+        return self._words[lo:hi]
+
+    def search(self, query: str) -> list[tuple[str, float]]:
+        """
+        Args:
+            query: The words that the texts must all contain. A word ending with `*`
+                also matches the words which start with it.
+
+        Returns:
+            The UUIDs of the matching texts with their score, the best match first.
+        """
+        scores: dict[str, float] | None = None
+        for term in query.split():
+            words = tokenize(term)
+            for idx, word in enumerate(words):
+                prefix = term.endswith("*") and idx == len(words) - 1
+                term_scores: dict[str, float] = {}
+                for matching in self._matching_words(word, prefix):
+                    postings = self._postings[matching]
+                    idf = math.log(1 + len(self._counts) / len(postings))
+                    for uuid, count in postings.items():
+                        term_scores[uuid] = term_scores.get(uuid, 0) + count * idf
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {
+                        uuid: score + term_scores[uuid]
+                        for uuid, score in scores.items()
+                        if uuid in term_scores
+                    }
+        if scores is None:
+            return []
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def to_dict(self) -> dict[str, dict[str, int]]:
+        """
+        Returns:
+            The word counts of each text.
+        """
+        return self._counts
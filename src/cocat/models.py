@@ -1,8 +1,9 @@
 from datetime import datetime
+from functools import cache
 from typing import Any
 from uuid import UUID, uuid4
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 
 
 class EventModel(BaseModel):
@@ -31,3 +32,25 @@ class CatalogueModel(BaseModel):
     tags: list[str] = Field(default_factory=list)
     attributes: dict[str, Any] = Field(default_factory=dict)
     events: list[str] = Field(default_factory=list)
+
+
+@cache
+def _field_adapter(model: type[BaseModel], name: str) -> TypeAdapter[Any]:
+    annotation = model.model_fields[name].annotation
+    assert annotation is not None
+    return TypeAdapter(annotation)
+
+
+def validate_field(model: type[BaseModel], name: str, value: Any) -> Any:
+    """
+    Validates the value of a single field of a model, without creating a model instance.
+
+    Args:
+        model: The model class.
+        name: The name of the field.
+        value: The value to validate.
+
+    Returns:
+        The validated value.
+    """
+    return _field_adapter(model, name).validate_python(value)
@@ -0,0 +1,427 @@
+import ast
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Sequence
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+
+from simpleeval import SimpleEval  # type: ignore[import-untyped]
+
+from .index import time_key
+
+if TYPE_CHECKING:
+    from .db import DB
+
+INF = float("inf")
+
+# the number of candidate events from which the remaining conditions are evaluated
+# on the columnar snapshot, rather than event by event, if the snapshot is up-to-date
+# (building it costs more than evaluating the conditions event by event)
+VECTORIZE_MIN_EVENTS = 1000
+
+# the time range of a field, for an operator comparing the field to a time key
+TIME_RANGES: dict[type, Callable[[int], tuple[float, float]]] = {
+    ast.Eq: lambda key: (key, key),
+    ast.Lt: lambda key: (-INF, key - 1),
+    ast.LtE: lambda key: (-INF, key),
+    ast.Gt: lambda key: (key + 1, INF),
+    ast.GtE: lambda key: (key, INF),
+}
+
+# the operator to use when swapping the operands of a comparison
+SWAPPED: dict[type, type] = {
+    ast.Eq: ast.Eq,
+    ast.NotEq: ast.NotEq,
+    ast.Lt: ast.Gt,
+    ast.LtE: ast.GtE,
+    ast.Gt: ast.Lt,
+    ast.GtE: ast.LtE,
+}
+
+
+def _event_field(node: ast.expr) -> str | None:
+    if (
+        isinstance(node, ast.Attribute)
+        and isinstance(node.value, ast.Name)
+        and node.value.id == "event"
+    ):
+        return node.attr
+    return None
+
+
+def _is_constant(node: ast.expr) -> bool:
+    # a constant expression doesn't depend on the event
+    return not any(
+        isinstance(child, ast.Name) and child.id == "event" for child in ast.walk(node)
+    )
+
+
+def _conjuncts(node: ast.expr) -> list[ast.expr]:
+    if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+        return [conjunct for value in node.values for conjunct in _conjuncts(value)]
+    if isinstance(node, ast.Compare) and len(node.ops) > 1:
+        # a < b < c is a < b and b < c
+        operands = [node.left, *node.comparators]
+        return [
+            ast.Compare(left=left, ops=[op], comparators=[right])
+            for left, op, right in zip(operands, node.ops, operands[1:])
+        ]
+    return [node]
+
+
+class _Lookup(ABC):
+    """
+    A conjunct which can be answered from an index, if its constant operand has the right type.
+    """
+
+    def __init__(self, node: ast.expr, constant: ast.expr, negated: bool = False):
+        self.node = node
+        self.key = ast.dump(node)
+        self.constant = constant
+        self.constant_key = ast.dump(constant)
+        self.negated = negated
+
+    @abstractmethod
+    def accepts(self, value: Any) -> bool:
+        # whether the index can be used with this value of the constant operand
+        ...
+
+    @abstractmethod
+    def lookup(self, db: "DB", value: Any) -> set[str]:
+        # the UUIDs of the events which match the conjunct
+        ...
+
+    @abstractmethod
+    def matches(self, db: "DB", value: Any, uuid: str) -> bool:
+        # whether an event matches the conjunct
+        ...
+
+
+class _TimeLookup(_Lookup):
+    def __init__(self, node: ast.expr, constant: ast.expr, field: str, op: type):
+        super().__init__(node, constant)
+        self.field = field
+        self.op = op
+
+    def accepts(self, value: Any) -> bool:
+        return isinstance(value, datetime)
+
+    def lookup(self, db: "DB", value: Any) -> set[str]:
+        start, stop = TIME_RANGES[self.op](time_key(value))
+        if self.field == "start":
+            return db._time_index.starting(start, stop)
+        return db._time_index.stopping(start, stop)
+
+    def matches(self, db: "DB", value: Any, uuid: str) -> bool:
+        start, stop = TIME_RANGES[self.op](time_key(value))
+        _start, _stop = db._time_index.get(uuid)
+        return start <= (_start if self.field == "start" else _stop) <= stop
+
+
+class _TermLookup(_Lookup):
+    def __init__(
+        self, node: ast.expr, constant: ast.expr, field: str, negated: bool
+    ) -> None:
+        super().__init__(node, constant, negated)
+        self.field = field
+
+    def accepts(self, value: Any) -> bool:
+        return isinstance(value, str)
+
+    def lookup(self, db: "DB", value: Any) -> set[str]:
+        return db._terms[self.field].get(value)
+
+    def matches(self, db: "DB", value: Any, uuid: str) -> bool:
+        return db._terms[self.field].has(uuid, value)
+
+
+class _MembershipLookup(_Lookup):
+    def accepts(self, value: Any) -> bool:
+        from .catalogue import Catalogue
+
+        return isinstance(value, Catalogue)
+
+    def lookup(self, db: "DB", value: Any) -> set[str]:
+        # the catalogue may reference events which don't exist
+        return {uuid for uuid in value._map["events"].keys() if uuid in db._event_maps}
+
+    def matches(self, db: "DB", value: Any, uuid: str) -> bool:
+        return uuid in value._map["events"]
+
+
+def _plan(node: ast.expr) -> _Lookup | None:
+    if not isinstance(node, ast.Compare) or len(node.ops) != 1:
+        return None
+    left, op, right = node.left, type(node.ops[0]), node.comparators[0]
+    if op in (ast.In, ast.NotIn):
+        negated = op is ast.NotIn
+        field = _event_field(right)
+        if field in ("tags", "products") and _is_constant(left):
+            return _TermLookup(node, left, field, negated)
+        if isinstance(left, ast.Name) and left.id == "event" and _is_constant(right):
+            # event in catalogue(...)
+            return _MembershipLookup(node, right, negated)
+        return None
+    if _event_field(left) is None:
+        # put the event field on the left
+        left, right = right, left
+        op = SWAPPED.get(op, op)
+    field = _event_field(left)
+    if field is None or not _is_constant(right):
+        return None
+    if field in ("start", "stop") and op in TIME_RANGES:
+        return _TimeLookup(node, right, field, op)
+    if field == "author" and op in (ast.Eq, ast.NotEq):
+        return _TermLookup(node, right, field, op is ast.NotEq)
+    return None
+
+
+def _references(node: ast.expr) -> set[str] | None:
+    # the names or UUIDs of the catalogues used in a condition,
+    # or None if they cannot be known before evaluating it
+    references = set()
+    for child in ast.walk(node):
+        if (
+            isinstance(child, ast.Call)
+            and isinstance(child.func, ast.Name)
+            and child.func.id == "catalogue"
+        ):
+            if (
+                len(child.args) != 1
+                or not isinstance(child.args[0], ast.Constant)
+                or not isinstance(child.args[0].value, str)
+            ):
+                return None
+            references.add(child.args[0].value)
+    return references
+
+
+class Query:
+    """
+    A dynamic filter condition, parsed once into a query plan.
+
+    The condition is split into its `and` conjuncts. The conjuncts which compare the event
+    start or stop date with a date, check the author, a tag or a product of the event,
+    or check that the event is in a catalogue, are answered from the database indexes.
+    The other conjuncts are only evaluated on the remaining candidate events.
+
+    Attributes:
+        references: The names or UUIDs of the catalogues used in the condition,
+            or `None` if they are computed.
+    """
+
+    def __init__(self, condition: str) -> None:
+        """
+        Args:
+            condition: The condition, as accepted by [set_dynamic_filter][cocat.Catalogue.set_dynamic_filter].
+        """
+        self._condition = condition
+        self._lookups: list[_Lookup] = []
+        # the conjuncts which are not looked up, with their key to share them between queries
+        self._residuals: list[tuple[str, ast.expr]] = []
+        expr = SimpleEval.parse(condition).value
+        for node in _conjuncts(expr):
+            lookup = _plan(node)
+            if lookup is None:
+                self._residuals.append((ast.dump(node), node))
+            else:
+                self._lookups.append(lookup)
+        self.references = _references(expr)
+
+    def evaluate(self, db: "DB", uuids: Iterable[str] | None = None) -> set[str]:
+        """
+        Args:
+            db: The database in which to look for events.
+            uuids: The UUIDs of the events to test, or `None` to test all the events.
+
+        Returns:
+            The UUIDs of the events which match the condition.
+        """
+        (result,) = evaluate_queries(db, [self], uuids)
+        if isinstance(result, Exception):
+            try:
+                raise result
+            finally:
+                # the traceback references this frame
+                del result
+        return result
+
+    def _candidates(
+        self,
+        db: "DB",
+        uuids: set[str] | None,
+        evaluator: SimpleEval,
+        constants: dict[str, Any],
+        lookups: dict[str, set[str]],
+    ) -> tuple[set[str], list[tuple[str, ast.expr]]]:
+        # the events which match the lookups, and the conjuncts left to evaluate on them
+        matched: list[tuple[_Lookup, Any]] = []
+        residuals = list(self._residuals)
+        for lookup in self._lookups:
+            if lookup.constant_key not in constants:
+                constants[lookup.constant_key] = evaluator.eval(
+                    self._condition, previously_parsed=lookup.constant
+                )
+            value = constants[lookup.constant_key]
+            if lookup.accepts(value):
+                matched.append((lookup, value))
+            else:
+                residuals.append((lookup.key, lookup.node))
+
+        if uuids is not None:
+            # test the events one by one, rather than looking all of them up
+            candidates = {
+                uuid
+                for uuid in uuids
+                if uuid in db._event_maps
+                and all(
+                    lookup.matches(db, value, uuid) != lookup.negated
+                    for lookup, value in matched
+                )
+            }
+            return candidates, residuals
+
+        for lookup, value in matched:
+            if lookup.key not in lookups:
+                lookups[lookup.key] = lookup.lookup(db, value)
+        included = [lookups[lookup.key] for lookup, _ in matched if not lookup.negated]
+        if included:
+            included.sort(key=len)
+            candidates = included[0].intersection(*included[1:])
+        else:
+            candidates = set(db._event_maps.keys())
+        for lookup, _ in matched:
+            if lookup.negated:
+                candidates.difference_update(lookups[lookup.key])
+        return candidates, residuals
+
+    def _evaluate_columns(
+        self,
+        db: "DB",
+        candidates: set[str],
+        residuals: list[ast.expr],
+        evaluator: SimpleEval,
+    ) -> set[str]:
+        import numpy as np
+
+        from .vectorized import Unsupported, evaluate_mask
+
+        columns = db._get_columns()
+        uuids = np.array(sorted(candidates), dtype="S36")
+        rows = np.searchsorted(columns.uuid, uuids)
+        found = rows < len(columns)
+        found[found] = columns.uuid[rows[found]] == uuids[found]
+        if not found.all():
+            raise Unsupported("The columnar snapshot is outdated")
+        mask = evaluate_mask(residuals, columns._take(rows), evaluator)
+        return set(uuids[mask].astype(str).tolist())
+
+
+def _detached(exception: Exception) -> Exception:
+    # the tracebacks reference the frames of the evaluation and of its callers,
+    # which would be kept with the results in reference cycles (with the transactions
+    # of the document) until the garbage collector runs
+    error: BaseException | None = exception
+    while error is not None:
+        error.__traceback__ = None
+        error = error.__context__
+    return exception
+
+
+def evaluate_queries(
+    db: "DB", queries: Sequence[Query], uuids: Iterable[str] | None = None
+) -> list[set[str] | Exception]:
+    """
+    Evaluates several queries in a single pass over the events.
+
+    The constant operands, index lookups and remaining conjuncts which several queries
+    have in common are only evaluated once (for each event).
+
+    Args:
+        db: The database in which to look for events.
+        queries: The queries to evaluate.
+        uuids: The UUIDs of the events to test, or `None` to test all the events.
+
+    Returns:
+        For each query, the UUIDs of the events which match it,
+            or the error raised when evaluating it.
+    """
+    from .event import Event
+    from .vectorized import Unsupported, is_vectorizable
+
+    results: list[set[str] | Exception] = [set() for _ in queries]
+    if uuids is None:
+        if len(db._event_maps) == 0:
+            return results
+    else:
+        uuids = set(uuids)
+
+    evaluator = SimpleEval()
+    evaluator.functions = {"datetime": datetime, "catalogue": db.get_catalogue}
+    constants: dict[str, Any] = {}
+    lookups: dict[str, set[str]] = {}
+    # the queries which conjuncts must be evaluated event by event
+    pending: list[tuple[int, set[str], list[tuple[str, ast.expr]]]] = []
+    for idx, query in enumerate(queries):
+        try:
+            candidates, residuals = query._candidates(
+                db, uuids, evaluator, constants, lookups
+            )
+        except Exception as exception:
+            results[idx] = _detached(exception)
+            continue
+        if not residuals:
+            results[idx] = candidates
+            continue
+        nodes = [node for _, node in residuals]
+        if (
+            uuids is None
+            and len(candidates) >= VECTORIZE_MIN_EVENTS
+            and db._has_columns()
+            and all(is_vectorizable(node) for node in nodes)
+        ):
+            try:
+                results[idx] = query._evaluate_columns(db, candidates, nodes, evaluator)
+                continue
+            except (ImportError, Unsupported):
+                # NumPy is not installed, or the per-event evaluation must be used
+                pass
+        pending.append((idx, candidates, residuals))
+
+    matching: dict[int, set[str]] = {idx: set() for idx, _, _ in pending}
+    for uuid in set().union(*(candidates for _, candidates, _ in pending)):
+        evaluator.names = {"event": Event._from_uuid(uuid, db)}
+        values: dict[str, bool] = {}
+        for idx, candidates, residuals in pending:
+            if uuid not in candidates or idx not in matching:
+                continue
+            try:
+                for key, node in residuals:
+                    if key not in values:
+                        values[key] = bool(
+                            evaluator.eval(
+                                queries[idx]._condition, previously_parsed=node
+                            )
+                        )
+                    if not values[key]:
+                        break
+                else:
+                    matching[idx].add(uuid)
+            except Exception as exception:
+                results[idx] = _detached(exception)
+                del matching[idx]
+    for idx, result in matching.items():
+        results[idx] = result
+    return results
+
+
+@lru_cache(maxsize=256)
+def compile_query(condition: str) -> Query:
+    """
+    Args:
+        condition: The dynamic filter condition.
+
+    Returns:
+        The compiled condition, which is cached.
+    """
+    return Query(condition)
@@ -0,0 +1,257 @@
+import ast
+import operator
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from .index import time_key
+from .query import SWAPPED, _is_constant
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+    from simpleeval import SimpleEval  # type: ignore[import-untyped]
+
+    from .columns import EventColumns
+
+COMPARISONS: dict[type, Callable[[Any, Any], Any]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+
+class Unsupported(Exception):
+    """
+    Raised when an expression cannot be evaluated on columns.
+    """
+
+
+@dataclass
+class _Column:
+    # the values of a scalar field, where missing values are None
+    kind: str
+    data: "NDArray[Any]"
+    missing: "NDArray[np.bool_]"
+
+
+@dataclass
+class _Mask:
+    # the truth values of a condition, and where evaluating it would raise an error
+    values: "NDArray[np.bool_]"
+    errors: "NDArray[np.bool_]"
+
+
+def _is_event(node: ast.expr) -> bool:
+    return isinstance(node, ast.Name) and node.id == "event"
+
+
+def _is_column(node: ast.expr) -> bool:
+    if isinstance(node, ast.Attribute):
+        return _is_event(node.value) and node.attr in (
+            "start",
+            "stop",
+            "rating",
+            "author",
+        )
+    return (
+        isinstance(node, ast.Subscript)
+        and isinstance(node.value, ast.Attribute)
+        and _is_event(node.value.value)
+        and node.value.attr == "attributes"
+        and _is_constant(node.slice)
+    )
+
+
+def is_vectorizable(node: ast.expr) -> bool:
+    """
+    Args:
+        node: The expression.
+
+    Returns:
+        Whether the expression only uses constructs which can be evaluated on columns.
+    """
+    if isinstance(node, ast.BoolOp):
+        return all(is_vectorizable(value) for value in node.values)
+    if isinstance(node, ast.UnaryOp):
+        return isinstance(node.op, ast.Not) and is_vectorizable(node.operand)
+    if isinstance(node, ast.Compare):
+        operands = [node.left, *node.comparators]
+        for left, op, right in zip(operands, node.ops, operands[1:]):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                if not (_is_event(left) and _is_constant(right)):
+                    return False
+            elif not all(
+                _is_column(operand) or _is_constant(operand)
+                for operand in (left, right)
+            ):
+                return False
+        return True
+    return _is_constant(node)
+
+
+class _Evaluator:
+    def __init__(self, columns: "EventColumns", evaluator: "SimpleEval") -> None:
+        import numpy as np
+
+        self._columns = columns
+        self._evaluator = evaluator
+        self._size = len(columns)
+        self._none = np.zeros(self._size, dtype=bool)
+
+    def _constant(self, node: ast.expr) -> Any:
+        return self._evaluator.eval("", previously_parsed=node)
+
+    def _column(self, node: ast.expr) -> _Column:
+        import numpy as np
+
+        columns = self._columns
+        if isinstance(node, ast.Attribute):
+            if node.attr in ("start", "stop"):
+                times = getattr(columns, node.attr)
+                if times.dtype != np.dtype("datetime64[ns]"):
+                    raise Unsupported("Dates outside of the range of datetime64[ns]")
+                data = times.view(np.int64) // 1000
+                return _Column("time", data, self._none)
+            if node.attr == "rating":
+                missing = np.ma.getmaskarray(columns.rating)
+                return _Column("number", columns.rating.data, missing)
+            return _Column("string", columns.author, self._none)
+
+        assert isinstance(node, ast.Subscript)
+        key = self._constant(node.slice)
+        values = []
+        for attributes in columns.attributes:
+            if key not in attributes:
+                # the KeyError is raised by the per-event evaluation
+                raise Unsupported(f"Missing attribute: {key}")
+            values.append(attributes[key])
+        present = [value for value in values if value is not None]
+        missing = np.array([value is None for value in values], dtype=bool)
+        if all(
+            isinstance(value, (int, float)) and not isinstance(value, bool)
+            for value in present
+        ):
+            data = np.array([0 if value is None else value for value in values])
+            return _Column("number", data.astype(np.float64), missing)
+        if all(isinstance(value, str) for value in present):
+            data = np.empty(self._size, dtype=object)
+            data[:] = ["" if value is None else value for value in values]
+            return _Column("string", data, missing)
+        raise Unsupported(f"Mixed attribute types: {key}")
+
+    def _compare(self, left: ast.expr, op: type, right: ast.expr) -> _Mask:
+        import numpy as np
+
+        if _is_event(left):
+            # event in catalogue(...)
+            from .catalogue import Catalogue
+
+            catalogue = self._constant(right)
+            if not isinstance(catalogue, Catalogue):
+                raise Unsupported("Membership in something else than a catalogue")
+            uuids = np.array(list(catalogue._map["events"].keys()), dtype="S36")
+            values = np.isin(self._columns.uuid, uuids)
+            return _Mask(values if op is ast.In else ~values, self._none)
+
+        if _is_constant(left) and _is_constant(right):
+            node = ast.Compare(left=left, ops=[op()], comparators=[right])
+            result = bool(self._constant(node))
+            return _Mask(np.full(self._size, result), self._none)
+        if _is_constant(left):
+            left, right = right, left
+            op = SWAPPED.get(op, op)
+        column = self._column(left)
+
+        if _is_column(right):
+            other = self._column(right)
+            if other.kind != column.kind or op not in COMPARISONS:
+                raise Unsupported("Comparison of columns of different types")
+            missing = column.missing | other.missing
+            if missing.any():
+                raise Unsupported("Comparison of columns with missing values")
+            values = COMPARISONS[op](column.data, other.data)
+            return _Mask(np.asarray(values, dtype=bool), self._none)
+
+        value = self._constant(right)
+        if op in (ast.Is, ast.IsNot):
+            if value is not None:
+                raise Unsupported("Identity comparison with something else than None")
+            return _Mask(
+                column.missing if op is ast.Is else ~column.missing, self._none
+            )
+        if column.kind == "time" and isinstance(value, datetime):
+            value = time_key(value)
+        elif column.kind == "number" and isinstance(value, (int, float)):
+            pass
+        elif column.kind == "string" and isinstance(value, str):
+            pass
+        else:
+            raise Unsupported(f"Comparison of {column.kind} with {type(value)}")
+        values = np.asarray(COMPARISONS[op](column.data, value), dtype=bool)
+        if op is ast.Eq:
+            return _Mask(values & ~column.missing, self._none)
+        if op is ast.NotEq:
+            return _Mask(values | column.missing, self._none)
+        # ordering None raises a TypeError
+        return _Mask(values & ~column.missing, column.missing)
+
+    def evaluate(self, node: ast.expr) -> _Mask:
+        import numpy as np
+
+        if isinstance(node, ast.BoolOp):
+            mask = self.evaluate(node.values[0])
+            values, errors = mask.values.copy(), mask.errors.copy()
+            for value in node.values[1:]:
+                mask = self.evaluate(value)
+                # only the rows which are not short-circuited are evaluated
+                if isinstance(node.op, ast.And):
+                    errors |= values & mask.errors
+                    values &= mask.values
+                else:
+                    errors |= ~values & mask.errors
+                    values |= mask.values
+            return _Mask(values, errors)
+        if isinstance(node, ast.UnaryOp):
+            mask = self.evaluate(node.operand)
+            return _Mask(~mask.values, mask.errors)
+        if isinstance(node, ast.Compare):
+            operands = [node.left, *node.comparators]
+            values = np.ones(self._size, dtype=bool)
+            errors = self._none.copy()
+            for left, op, right in zip(operands, node.ops, operands[1:]):
+                mask = self._compare(left, type(op), right)
+                errors |= values & mask.errors
+                values &= mask.values
+            return _Mask(values, errors)
+        return _Mask(np.full(self._size, bool(self._constant(node))), self._none)
+
+
+def evaluate_mask(
+    nodes: list[ast.expr], columns: "EventColumns", evaluator: "SimpleEval"
+) -> "NDArray[np.bool_]":
+    """
+    Evaluates conditions on all the events of a columnar snapshot at once.
+    Requires [NumPy](https://numpy.org).
+
+    Args:
+        nodes: The conditions, which must all be true and [vectorizable][cocat.vectorized.is_vectorizable].
+        columns: The events.
+        evaluator: The evaluator of the constant expressions.
+
+    Returns:
+        Which events match all the conditions.
+
+    Raises:
+        Unsupported: If the conditions cannot be evaluated on columns,
+            or if evaluating them on an event would raise an error.
+    """
+    node = nodes[0] if len(nodes) == 1 else ast.BoolOp(op=ast.And(), values=nodes)
+    mask = _Evaluator(columns, evaluator).evaluate(node)
+    if mask.errors.any():
+        raise Unsupported("Evaluation error")
+    return mask.values
@@ -0,0 +1,108 @@
+import heapq
+from collections.abc import Iterable, Iterator, Mapping, Set
+from typing import TYPE_CHECKING, Any, Generic, TypeVar, overload
+
+from pycrdt import Map
+
+if TYPE_CHECKING:
+    from .catalogue import Catalogue
+    from .db import DB
+    from .event import Event
+
+T = TypeVar("T", "Event", "Catalogue")
+S = TypeVar("S")
+
+
+class View(Set[T], Generic[T]):
+    """
+    A lazy, read-only view of events or catalogues, backed by a CRDT map (or a mapping)
+    which keys are their UUIDs.
+    It behaves like a set, but doesn't create any event or catalogue object until they are accessed.
+    Slicing returns a list ordered by UUID.
+    """
+
+    def __init__(
+        self, keys: Map | Mapping[str, Any], db: "DB", item_type: type[T]
+    ) -> None:
+        self._keys = keys
+        self._db = db
+        self._item_type: type[T] = item_type
+
+    def __repr__(self) -> str:
+        return f"<{self._item_type.__name__} view of length {len(self)}>"
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, item: Any) -> bool:
+        return isinstance(item, self._item_type) and item._uuid in self._keys
+
+    def __iter__(self) -> Iterator[T]:
+        for uuid in self._keys.keys():
+            yield self._item_type._from_uuid(uuid, self._db)
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[T]: ...
+
+    def __getitem__(self, index: int | slice) -> T | list[T]:
+        if isinstance(index, int):
+            if index >= 0:
+                uuids = self._sorted_uuids(index + 1)
+                if index >= len(uuids):
+                    raise IndexError("View index out of range")
+                return self._item_type._from_uuid(uuids[index], self._db)
+            return self[slice(index, None)][0]
+
+        start, stop = index.start, index.stop
+        if (
+            (start is None or start >= 0)
+            and stop is not None
+            and stop >= 0
+            and (index.step or 1) > 0
+        ):
+            # only sort the first items, unless the start counts from the end
+            uuids = self._sorted_uuids(stop)
+        else:
+            uuids = self._sorted_uuids()
+        return [self._item_type._from_uuid(uuid, self._db) for uuid in uuids[index]]
+
+    def _sorted_uuids(self, count: int | None = None) -> list[str]:
+        if count is None:
+            return sorted(self._keys.keys())
+        return heapq.nsmallest(count, self._keys.keys())
+
+    @classmethod
+    def _from_iterable(cls, it: Iterable[S]) -> set[S]:
+        # set operations return a set
+        return set(it)
+
+    def to_set(self) -> set[T]:
+        """
+        Returns:
+            A set of all the items in the view.
+        """
+        return set(self)
+
+    def union(self, *others: Iterable[T]) -> set[T]:
+        """
+        Returns:
+            A set of the items in the view or in any of the others.
+        """
+        return self.to_set().union(*others)
+
+    def intersection(self, *others: Iterable[T]) -> set[T]:
+        """
+        Returns:
+            A set of the items in the view and in all of the others.
+        """
+        return self.to_set().intersection(*others)
+
+    def difference(self, *others: Iterable[T]) -> set[T]:
+        """
+        Returns:
+            A set of the items in the view but not in any of the others.
+        """
+        return self.to_set().difference(*others)
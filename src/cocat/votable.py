@@ -1,14 +1,29 @@
+import base64
+import codecs
 import json
-from collections.abc import Callable, Sequence
+import re
+import struct
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from html import unescape
 from io import BytesIO
+from itertools import repeat
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
+from secrets import randbits
+from typing import IO, TYPE_CHECKING, Any, Literal
 from uuid import uuid4
+from xml.sax.saxutils import escape, quoteattr
+
+from pycrdt import Doc
 
 from .catalogue import Catalogue
-from .db import DB, Event
+from .columns import EventColumns, build_columns
+from .db import DB, ImportCounts, OnConflict
+from .fingerprint import event_fields, fingerprint
+from .models import EventModel
 
 if TYPE_CHECKING:
     from astropy.io.votable.tree import Field as VOField  # type: ignore[import-untyped]
@@ -18,6 +33,10 @@ if TYPE_CHECKING:
     )
 
 
+# how the rows of the tables are serialized
+VOTableFormat = Literal["tabledata", "binary", "binary2"]
+
+
 @dataclass
 class _VOTableCocatField:
     python_type: type
@@ -25,18 +44,24 @@ class _VOTableCocatField:
     convert_vot: Callable[[Any], Any]
     convert_cocat: Callable[[Any], Any]
     cocat_name: str | None = None
+    convert_cocat_column: Callable[[list[Any]], list[Any]] | None = None
 
-    def name(self, field: "VOField") -> str:
+    def name(self, field: "_Field") -> str:
         if self.cocat_name:
             return self.cocat_name
         return field.name
 
-    def match(self, field: "VOField") -> bool:
+    def match(self, field: "_Field") -> bool:
         for k, v in self.attr.items():
             if field.__getattribute__(k) != v:
                 return False
         return True
 
+    def convert_column(self, values: list[Any]) -> list[Any]:
+        if self.convert_cocat_column is not None:
+            return self.convert_cocat_column(values)
+        return [self.convert_cocat(value) for value in values]
+
     def make_vot_field(self, table: "Table", name: str) -> "VOField":
         from astropy.io.votable.tree import Field as VOField
 
@@ -50,7 +75,34 @@ class _VOTableCocatFieldSpecialDateTime(_VOTableCocatField):
         attrs.update(
             {"datatype": "char", "xtype": "dateTime", "utype": "", "arraysize": "*"}
         )
-        super().__init__(datetime, attrs, datetime.isoformat, str, cocat_name)
+        super().__init__(
+            datetime,
+            attrs,
+            datetime.isoformat,
+            str,
+            cocat_name,
+            # the event dates are parsed here rather than validated one by one
+            _parse_times if cocat_name else None,
+        )
+
+
+def _parse_times(values: list[Any]) -> list[Any]:
+    try:
+        return [datetime.fromisoformat(value) for value in values]
+    except ValueError:
+        # left to the validation of the events
+        return [str(value) for value in values]
+
+
+def _loads_column(values: list[Any]) -> list[Any]:
+    # decode the whole column as a single JSON document
+    try:
+        result = json.loads(f"[{','.join(values)}]")
+    except ValueError:
+        result = None
+    if not isinstance(result, list) or len(result) != len(values):
+        return [json.loads(value) for value in values]
+    return result
 
 
 def _vo_table_field_from(arg: type | str) -> _VOTableCocatField:
@@ -91,6 +143,7 @@ VOTABLE_COCAT_FIELDS = [
         {"datatype": "char", "arraysize": "*", "utype": "json"},
         json.dumps,
         json.loads,
+        convert_cocat_column=_loads_column,
     ),
     _VOTableCocatField(
         list,
@@ -98,6 +151,7 @@ VOTABLE_COCAT_FIELDS = [
         json.dumps,
         json.loads,
         "products",
+        _loads_column,
     ),
     _VOTableCocatField(
         list,
@@ -105,6 +159,7 @@ VOTABLE_COCAT_FIELDS = [
         json.dumps,
         json.loads,
         "tags",
+        _loads_column,
     ),
     _VOTableCocatField(
         str, {"datatype": "char", "arraysize": "*"}, str, str
@@ -124,6 +179,205 @@ ATTRIBUTES = [
 STANDARD_FIELDS = [v[0] for v in ATTRIBUTES]
 
 
+def _attribute_fields(
+    attribute_dicts: Iterable[dict[str, Any]],
+) -> list[tuple[str, _VOTableCocatField]]:
+    # the attributes must be present in every event, with the same type
+    all_attributes: set[str] = set()
+    common_attributes: set[str] | None = None
+    types: dict[str, set[type]] = defaultdict(set)
+    for attributes in attribute_dicts:
+        all_attributes.update(attributes)
+        if common_attributes is None:
+            common_attributes = set(attributes)
+        else:
+            common_attributes.intersection_update(attributes)
+        for key, value in attributes.items():
+            types[key].add(type(value))
+
+    if all_attributes != (common_attributes or set()):
+        raise ValueError(
+            "Export VOTable: not all attributes are present in all events "
+            + f"{tuple(sorted(all_attributes - (common_attributes or set())))}"
+        )
+
+    fields = []
+    for attr in sorted(all_attributes):
+        if len(types[attr]) != 1:
+            raise ValueError(
+                "Export VOTable: not all value types are "
+                + f"identical for all events for attribute {attr}"
+            )
+        fields.append((attr, _vo_table_field_from(types[attr].pop())))
+    return fields
+
+
+def _times(columns: EventColumns, name: str) -> list[datetime]:
+    # the dates with their original UTC offset
+    times = getattr(columns, name).astype("datetime64[us]").tolist()
+    offsets = getattr(columns, f"{name}_offset").tolist()
+    return [
+        time
+        if offset is None
+        else time.replace(tzinfo=timezone.utc).astimezone(
+            timezone(timedelta(seconds=offset))
+        )
+        for time, offset in zip(times, offsets)
+    ]
+
+
+def _vot_columns(
+    columns: EventColumns, fields: list[tuple[str, _VOTableCocatField]]
+) -> list[list[Any]]:
+    result = []
+    for name, vtf in fields:
+        if name in ("start", "stop"):
+            values: list[Any] = _times(columns, name)
+        elif name == "uuid":
+            values = columns.uuid.astype(str).tolist()
+        elif name in STANDARD_FIELDS:
+            values = getattr(columns, name).tolist()
+        else:
+            values = [attributes[name] for attributes in columns.attributes]
+        result.append([vtf.convert_vot(value) for value in values])
+    return result
+
+
+def _td(vtf: _VOTableCocatField, value: Any) -> str:
+    # the TABLEDATA representation of a value
+    datatype = vtf.attr["datatype"]
+    if datatype == "boolean":
+        return "T" if value else "F"
+    if datatype == "double":
+        return repr(float(value))
+    if datatype == "long":
+        return str(int(value))
+    return escape(str(value))
+
+
+def _binary(vtf: _VOTableCocatField, value: Any) -> bytes:
+    # the BINARY representation of a value, in big-endian order
+    datatype = vtf.attr["datatype"]
+    if datatype == "boolean":
+        return b"T" if value else b"F"
+    if datatype == "double":
+        return struct.pack(">d", value)
+    if datatype == "long":
+        return struct.pack(">q", value)
+    try:
+        data = str(value).encode("ascii")
+    except UnicodeEncodeError:
+        raise ValueError(
+            f"Export VOTable: cannot write non-ASCII value {value!r} in binary format"
+        )
+    return struct.pack(">I", len(data)) + data
+
+
+class _Base64Writer:
+    # encodes a stream in base64 as it is written, in lines of 76 characters
+    def __init__(self, file: IO[bytes]) -> None:
+        self._file = file
+        self._pending = b""
+
+    def write(self, data: bytes) -> None:
+        data = self._pending + data
+        size = len(data) - len(data) % 57
+        self._file.write(base64.encodebytes(data[:size]))
+        self._pending = data[size:]
+
+    def close(self) -> None:
+        self._file.write(base64.encodebytes(self._pending))
+
+
+def write_votable(
+    catalogues: Sequence[Catalogue] | Catalogue,
+    file: IO[bytes],
+    chunk_size: int = 1_000,
+    format: VOTableFormat = "tabledata",
+) -> None:
+    """
+    Writes catalogues to a VOTable file, reading and writing their events by chunks,
+    so that the memory used doesn't depend on the size of the catalogues.
+    Requires [NumPy](https://numpy.org), but not astropy.
+
+    Args:
+        catalogues: The catalogue(s) to write.
+        file: The binary file to write to.
+        chunk_size: The number of events to convert at once.
+        format: The serialization of the rows: `"tabledata"` (XML elements),
+            or the more compact `"binary"` or `"binary2"` (base64-encoded streams),
+            where string values must be ASCII.
+    """
+    catalogue_list = (
+        [catalogues] if isinstance(catalogues, Catalogue) else list(catalogues)
+    )
+    file.write(
+        b'<?xml version="1.0" encoding="utf-8"?>\n'
+        b'<VOTABLE version="1.4" xmlns="http://www.ivoa.net/xml/VOTable/v1.3">\n'
+    )
+    if len(catalogue_list) == 1:
+        catalogue = catalogue_list[0]
+        description = f"Contact:{catalogue.author};Name:{catalogue.name}"
+        file.write(f"<DESCRIPTION>{escape(description)}</DESCRIPTION>\n".encode())
+    file.write(b'<RESOURCE type="results">\n')
+
+    for catalogue in catalogue_list:
+        db = catalogue.db
+        uuids = sorted(catalogue._map["events"].keys())
+        fields = ATTRIBUTES + _attribute_fields(
+            db._event_maps[uuid]["attributes"].to_py() for uuid in uuids
+        )
+        name = catalogue.name.replace(" ", "_")
+        file.write(f"<TABLE name={quoteattr(name)}>\n".encode())
+        for field_name, vtf in fields:
+            attr = {"name": field_name, **vtf.attr}
+            items = "".join(f" {key}={quoteattr(attr[key])}" for key in sorted(attr))
+            file.write(f"<FIELD{items}/>\n".encode())
+        element = format.upper()
+        if format == "tabledata":
+            file.write(b"<DATA><TABLEDATA>\n")
+        else:
+            file.write(f'<DATA><{element}><STREAM encoding="base64">\n'.encode())
+        stream = _Base64Writer(file)
+        # BINARY2 rows start with flags for the null values, of which there are none
+        null_flags = bytes((len(fields) + 7) // 8) if format == "binary2" else b""
+
+        for index in range(0, len(uuids), chunk_size):
+            columns = build_columns(
+                db._event_maps[uuid].to_py()
+                for uuid in uuids[index : index + chunk_size]
+            )
+            vot_columns = _vot_columns(columns, fields)
+            if format == "tabledata":
+                rows = [
+                    "<TR>"
+                    + "".join(
+                        f"<TD>{_td(vtf, value)}</TD>"
+                        for (_, vtf), value in zip(fields, row)
+                    )
+                    + "</TR>\n"
+                    for row in zip(*vot_columns)
+                ]
+                file.write("".join(rows).encode())
+            else:
+                stream.write(
+                    b"".join(
+                        null_flags
+                        + b"".join(
+                            _binary(vtf, value) for (_, vtf), value in zip(fields, row)
+                        )
+                        for row in zip(*vot_columns)
+                    )
+                )
+
+        if format == "tabledata":
+            file.write(b"</TABLEDATA></DATA>\n</TABLE>\n")
+        else:
+            stream.close()
+            file.write(f"</STREAM></{element}></DATA>\n</TABLE>\n".encode())
+    file.write(b"</RESOURCE>\n</VOTABLE>\n")
+
+
 def export_votable(catalogues: Sequence[Catalogue] | Catalogue) -> "VOTableFile":
     from astropy.io.votable.tree import Resource, TableElement, VOTableFile
 
@@ -140,78 +394,382 @@ def export_votable(catalogues: Sequence[Catalogue] | Catalogue) -> "VOTableFile"
     resource = Resource()
     votable.resources.append(resource)
 
-    attributes = list(ATTRIBUTES)
-
-    all_attributes = set(
-        attribute
-        for catalogue in catalogue_list
-        for attribute in catalogue.attributes.keys()
-    )
-    common_attributes = set.intersection(
-        *[set(catalogue.attributes) for catalogue in catalogue_list]
-    )
-
     for catalogue in catalogue_list:
         table = TableElement(votable, name=catalogue.name.replace(" ", "_"))
         resource.tables.append(table)
 
-        all_attributes = set(
-            attribute
-            for event in catalogue.events
-            for attribute in event.attributes.keys()
-        )
-        common_attributes = set.intersection(
-            *[set(event.attributes) for event in catalogue.events]
-        )
+        # a single snapshot of the events, converted column by column
+        columns = catalogue.to_columns()
+        fields = ATTRIBUTES + _attribute_fields(columns.attributes)
+        table.fields.extend([vtf.make_vot_field(votable, name) for name, vtf in fields])
 
-        # check that all attributes are present in every event
-        if all_attributes != common_attributes:
-            raise ValueError(
-                "Export VOTable: not all attributes are present in all events "
-                + f"{tuple(sorted(all_attributes - common_attributes))}"
-            )
+        table.create_arrays(len(columns))
+        names = table.array.dtype.names
+        for index, values in enumerate(_vot_columns(columns, fields)):
+            table.array[names[index]] = values
 
-        for attr in sorted(all_attributes):
-            # check that the type of all attribute values is identical
-            attrs_value_types = list(
-                set(type(event.attributes[attr]) for event in catalogue.events)
-            )
-            if len(attrs_value_types) != 1:
-                raise ValueError(
-                    "Export VOTable: not all value types are "
-                    + f"identical for all events for attribute {attr}"
-                )
+    return votable
 
-            attributes.append((attr, _vo_table_field_from(attrs_value_types[0])))
 
-        table.fields.extend(
-            [vtf.make_vot_field(votable, name) for name, vtf in attributes]
-        )
+@dataclass
+class _Field:
+    # the metadata of a FIELD, with the names of the attributes of astropy's Field
+    name: str
+    ID: str | None = None
+    datatype: str | None = None
+    arraysize: str | None = None
+    ucd: str | None = None
+    utype: str | None = None
+    xtype: str | None = None
 
-        table.create_arrays(len(catalogue.events))
-        for i, event in enumerate(catalogue.events):
-            values = []
-            for k, vtf in attributes:
-                if k in STANDARD_FIELDS:
-                    v = getattr(event, k)
+
+@dataclass
+class _Table:
+    # the fields of a table, and its values column by column
+    fields: list[_Field]
+    columns: list[list[Any]]
+
+
+class _UnsupportedVOTable(Exception):
+    # raised by the built-in reader for the files which are left to astropy
+    pass
+
+
+# the values of the empty cells, as read by astropy
+EMPTY_VALUES: dict[str, Any] = {
+    "char": "",
+    "double": float("nan"),
+    "long": 0,
+    "boolean": False,
+}
+
+BOOLEANS = {
+    "t": True,
+    "true": True,
+    "1": True,
+    "f": False,
+    "false": False,
+    "0": False,
+    "?": False,
+    "": False,
+}
+
+
+def _datatype(field: _Field) -> str:
+    # the fields which can be read without astropy are the ones it can export
+    datatype = field.datatype or ""
+    if datatype not in EMPTY_VALUES or (
+        field.arraysize != "*" if datatype == "char" else field.arraysize is not None
+    ):
+        raise _UnsupportedVOTable(f"Unsupported field: {field.name}")
+    return datatype
+
+
+def _parse_texts(datatype: str, texts: Iterable[str]) -> list[Any]:
+    # the values of a TABLEDATA column
+    empty = EMPTY_VALUES[datatype]
+    if datatype == "char":
+        # the entities of the texts which were not parsed as XML
+        return [
+            unescape(text).strip() if "&" in text else text.strip() for text in texts
+        ]
+    texts = [text.strip() for text in texts]
+    try:
+        if datatype == "double":
+            return [float(text) if text else empty for text in texts]
+        if datatype == "long":
+            return [int(text) if text else empty for text in texts]
+        return [BOOLEANS[text.lower()] for text in texts]
+    except (ValueError, KeyError):
+        raise _UnsupportedVOTable(f"Invalid {datatype} value")
+
+
+def _parse_stream(
+    datatypes: list[str], stream: bytes, null_flags: bool
+) -> list[list[Any]]:
+    # the values of a BINARY or BINARY2 stream
+    columns: list[list[Any]] = [[] for _ in datatypes]
+    flags_size = (len(datatypes) + 7) // 8 if null_flags else 0
+    unpack_length = struct.Struct(">I").unpack_from
+    unpack_double = struct.Struct(">d").unpack_from
+    unpack_long = struct.Struct(">q").unpack_from
+    position = 0
+    try:
+        while position < len(stream):
+            # like astropy, the values flagged as null are read as they are stored
+            position += flags_size
+            for datatype, column in zip(datatypes, columns):
+                if datatype == "char":
+                    (length,) = unpack_length(stream, position)
+                    position += 4
+                    value: Any = stream[position : position + length].decode("ascii")
+                    position += length
+                elif datatype == "double":
+                    (value,) = unpack_double(stream, position)
+                    position += 8
+                elif datatype == "long":
+                    (value,) = unpack_long(stream, position)
+                    position += 8
+                else:
+                    value = stream[position : position + 1] in (b"T", b"t", b"1")
+                    position += 1
+                column.append(value)
+    except (struct.error, UnicodeDecodeError):
+        raise _UnsupportedVOTable("Invalid binary stream")
+    if position != len(stream):
+        raise _UnsupportedVOTable("Invalid binary stream")
+    return columns
+
+
+# the cells of the rows of a TABLEDATA, which can only contain text
+TD_PATTERN = re.compile(r"<TD>([^<]*)</TD>|<TD/>")
+ENCODING_PATTERN = re.compile(rb"""^<\?xml[^>]*encoding=["']([^"']+)""")
+
+
+class _TabledataFilter:
+    # a file for iterparse, where the content of the TABLEDATA elements is set aside,
+    # to be parsed with regular expressions rather than element by element
+    START = b"<TABLEDATA>"
+    END = b"</TABLEDATA>"
+
+    def __init__(self, file: IO[bytes]) -> None:
+        self._file = file
+        self._buffer = b""
+        self._inside = False
+        self._decoder: codecs.IncrementalDecoder | None = None
+        self._block: list[str] = []
+        # the contents of the TABLEDATA elements read so far, in order, by parts
+        self.blocks: list[list[str]] = []
+
+    def read(self, size: int = -1) -> bytes:
+        while True:
+            data = self._file.read(size)
+            if self._decoder is None:
+                match = ENCODING_PATTERN.match(data)
+                encoding = match.group(1).decode() if match else "utf-8"
+                try:
+                    self._decoder = codecs.getincrementaldecoder(encoding)()
+                except LookupError:
+                    raise _UnsupportedVOTable(f"Unsupported encoding: {encoding}")
+            self._buffer += data
+            output = self._split(self._decoder, final=not data)
+            if output or not data:
+                return output
+
+    def _split(self, decoder: codecs.IncrementalDecoder, final: bool) -> bytes:
+        output: list[bytes] = []
+        while True:
+            tag = self.END if self._inside else self.START
+            index = self._buffer.find(tag)
+            if index < 0:
+                # the end of the buffer may be the beginning of a tag
+                size = len(self._buffer) if final else len(self._buffer) - len(tag) + 1
+                part = self._buffer[: max(size, 0)]
+                self._buffer = self._buffer[len(part) :]
+                if self._inside:
+                    self._block.append(self._decode(decoder, part))
                 else:
-                    v = event.attributes.get(k, "")
-                if isinstance(v, set):
-                    v = list(v)
-                values.append(vtf.convert_vot(v))
-            table.array[i] = tuple(values)
+                    output.append(part)
+                return b"".join(output)
+            if self._inside:
+                self._block.append(self._decode(decoder, self._buffer[:index], True))
+                self.blocks.append(self._block)
+                self._block = []
+                output.append(tag)
+            else:
+                output.append(self._buffer[: index + len(tag)])
+            self._buffer = self._buffer[index + len(tag) :]
+            self._inside = not self._inside
+
+    def _decode(
+        self, decoder: codecs.IncrementalDecoder, data: bytes, final: bool = False
+    ) -> str:
+        try:
+            return decoder.decode(data, final)
+        except UnicodeDecodeError:
+            raise _UnsupportedVOTable("Invalid encoding")
+
+
+def _parse_rows(parts: list[str], datatypes: list[str]) -> list[list[Any]]:
+    # the values of a TABLEDATA, which must only have rows of cells,
+    # parsed part by part and by batches of rows, so that the text is not copied at once
+    size = len(datatypes)
+    # the memory used by a match grows with its repetitions
+    rows = re.compile(
+        rf"(?:\s*<TR>(?:\s*(?:<TD>[^<]*</TD>|<TD/>)){{{size}}}\s*</TR>){{1,1000}}"
+    )
+    columns: list[list[Any]] = [[] for _ in datatypes]
+    rest = ""
+    parts.reverse()
+    while parts:
+        text = rest + parts.pop()
+        end = text.rfind("</TR>") + len("</TR>") if "</TR>" in text else 0
+        text, rest = text[:end], text[end:]
+        # like XML parsers, line breaks are normalized
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        position = 0
+        match = rows.match(text)
+        while match is not None:
+            texts = TD_PATTERN.findall(text, position, match.end())
+            for index, (datatype, column) in enumerate(zip(datatypes, columns)):
+                column.extend(_parse_texts(datatype, texts[index::size]))
+            position = match.end()
+            match = rows.match(text, position)
+        if position != len(text):
+            raise _UnsupportedVOTable("Unsupported rows")
+    if rest.strip():
+        raise _UnsupportedVOTable("Unsupported rows")
+    return columns
+
+
+def _read_votable(file: IO[bytes]) -> tuple[str | None, list[_Table], bool]:
+    """
+    Reads the subset of VOTable which can be imported, without astropy:
+    TABLEDATA, BINARY and BINARY2 tables of strings, doubles, longs and booleans.
 
-    return votable
+    Args:
+        file: The binary VOTable file.
+
+    Returns:
+        The description of the VOTable, its tables,
+            and whether there is a single table in the first resource.
+
+    Raises:
+        _UnsupportedVOTable: If the file is outside of this subset.
+    """
+    from xml.etree.ElementTree import ParseError, iterparse
+
+    description: str | None = None
+    tables: list[_Table] = []
+    # the number of tables of each resource
+    resource_tables: list[int] = []
+    # the local names of the elements being parsed
+    path: list[str] = []
+    datatypes: list[str] = []
+    source = _TabledataFilter(file)
+    try:
+        for event, element in iterparse(source, events=("start", "end")):
+            tag = element.tag.rpartition("}")[2]
+            if event == "start":
+                path.append(tag)
+                if path[0] != "VOTABLE":
+                    raise _UnsupportedVOTable("Not a VOTable")
+                if tag == "RESOURCE":
+                    if "RESOURCE" in path[:-1]:
+                        raise _UnsupportedVOTable("Nested resources")
+                    resource_tables.append(0)
+                elif tag == "TABLE":
+                    if path[-2] != "RESOURCE" or "ref" in element.attrib:
+                        raise _UnsupportedVOTable("Unsupported table")
+                    resource_tables[-1] += 1
+                    tables.append(_Table([], []))
+                    datatypes = []
+                elif tag in ("FITS", "PARAMref", "FIELDref"):
+                    raise _UnsupportedVOTable(f"Unsupported element: {tag}")
+                continue
+
+            path.pop()
+            if tag == "DESCRIPTION" and path == ["VOTABLE"]:
+                description = (element.text or "").strip()
+            elif tag == "FIELD" and path[-1] == "TABLE":
+                if "name" not in element.attrib:
+                    raise _UnsupportedVOTable("Field without a name")
+                field = _Field(
+                    **{
+                        key: element.attrib.get(key)
+                        for key in _Field.__dataclass_fields__
+                    }
+                )
+                # like in astropy, an empty UCD is no UCD
+                field.ucd = field.ucd or None
+                tables[-1].fields.append(field)
+                datatypes.append(_datatype(field))
+            elif tag == "TABLEDATA":
+                # the TABLEDATA elements which were not set aside are left to astropy
+                if len(element) or not source.blocks:
+                    raise _UnsupportedVOTable("Unsupported TABLEDATA")
+                tables[-1].columns = _parse_rows(source.blocks.pop(0), datatypes)
+            elif tag == "STREAM":
+                if (
+                    element.attrib.get("encoding") != "base64"
+                    or "href" in element.attrib
+                ):
+                    raise _UnsupportedVOTable("Unsupported stream")
+                try:
+                    stream = base64.b64decode(element.text or "")
+                except ValueError:
+                    raise _UnsupportedVOTable("Invalid base64 stream")
+                tables[-1].columns = _parse_stream(
+                    datatypes, stream, null_flags=path[-1] == "BINARY2"
+                )
+                element.clear()
+            elif tag == "TABLE" and not tables[-1].columns:
+                tables[-1].columns = [[] for _ in datatypes]
+    except ParseError:
+        raise _UnsupportedVOTable("Invalid XML")
+    return description, tables, resource_tables[:1] == [1]
+
+
+def _astropy_tables(votable: "VOTableFile") -> tuple[str | None, list[_Table], bool]:
+    # the content of a VOTable parsed by astropy, like it is returned by _read_votable
+    return (
+        str(votable.description) if votable.description else None,
+        [
+            _Table(
+                [
+                    _Field(
+                        **{
+                            key: getattr(field, key)
+                            for key in _Field.__dataclass_fields__
+                        }
+                    )
+                    for field in table.fields
+                ],
+                [table.array.data[name].tolist() for name in table.array.dtype.names],
+            )
+            for table in votable.iter_tables()
+        ],
+        len(votable.resources[0].tables) == 1,
+    )
+
+
+def _read_tables(
+    open_file: Callable[[], IO[bytes]],
+) -> tuple[str | None, list[_Table], bool]:
+    # reads a VOTable with the built-in reader, or with astropy if it is not supported
+    try:
+        with open_file() as f:
+            return _read_votable(f)
+    except _UnsupportedVOTable:
+        from astropy.io.votable import parse  # type: ignore[import-untyped]
+
+        with open_file() as f:
+            return _astropy_tables(parse(f))
 
 
 def import_votable(
-    votable: "VOTableFile", db: DB, table_name: str | None = None
-) -> None:
+    votable: "VOTableFile",
+    db: DB,
+    table_name: str | None = None,
+    on_conflict: OnConflict = "replace",
+) -> ImportCounts:
+    return _import_tables(*_astropy_tables(votable), db, table_name, on_conflict)
+
+
+def _import_tables(
+    description: str | None,
+    tables: Iterable[_Table],
+    single_table: bool,
+    db: DB,
+    table_name: str | None,
+    on_conflict: OnConflict,
+) -> ImportCounts:
     author = "VOTable Import"
     table_name = table_name or f"Imported Catalogue from {datetime.now()}"
 
-    if votable.description:
-        for line in str(votable.description).split(";"):
+    if description:
+        for line in description.split(";"):
             line = line.strip()
             values = line.split(":", 1)
             if len(values) != 2:
@@ -227,8 +785,10 @@ def import_votable(
         "catalogues": [],
         "events": [],
     }
+    # the UUIDs of the events already in db_dict
+    seen: set[str] = set()
 
-    for i, table in enumerate(votable.iter_tables()):
+    for i, table in enumerate(tables):
         required_field_names: list[str] = ["Start Time", "Stop Time"]
         fields_vs_index: dict[tuple[int, str], _VOTableCocatField] = {}
 
@@ -247,9 +807,9 @@ def import_votable(
                     + f" {field.xtype}"
                 )
 
-        if len(votable.resources[0].tables) == 1:
+        if single_table:
             this_name = table_name
-        else:  # pragma: nocover
+        else:
             this_name = f"{table_name}_{i}"
 
         if len(required_field_names) > 0:  # pragma: nocover
@@ -262,70 +822,209 @@ def import_votable(
             "author": author,
             "events": [],
         }
+        if on_conflict == "upsert":
+            # a catalogue is imported again into the catalogue with the same name
+            uuid = db._names.get(this_name)
+            if uuid is not None:
+                catalogue["uuid"] = uuid
 
         has_author_field = any(f[1] == "author" for f in fields_vs_index.keys())
         has_uuid_field = any(f[1] == "uuid" for f in fields_vs_index.keys())
 
-        for el in table.array:
+        # without UUIDs, the events are matched by content with the existing ones
+        existing: dict[str, str] = {}
+        if not has_uuid_field and "uuid" in catalogue:
+            for existing_event in db.get_catalogue(catalogue["uuid"]).events:
+                existing[existing_event.fingerprint] = existing_event._uuid
+
+        # convert the table column by column
+        columns = {
+            (index, name): vtf.convert_column(table.columns[index])
+            for (index, name), vtf in fields_vs_index.items()
+        }
+        for row in zip(*columns.values()):
             event: dict[str, Any] = {"attributes": {}}
-            if not has_author_field:  # pragma: nocover
+            if not has_author_field:
                 event["author"] = author
 
-            if not has_uuid_field:  # pragma: nocover
-                event["uuid"] = str(uuid4())
-
-            for (index, name), vtf in fields_vs_index.items():
+            for (_, name), value in zip(columns, row):
                 if name in STANDARD_FIELDS:
-                    event[name] = vtf.convert_cocat(el[index])
+                    event[name] = value
                 else:
-                    event["attributes"][name] = vtf.convert_cocat(el[index])
-
-            if not any(event["uuid"] == e["uuid"] for e in db_dict["events"]):
+                    event["attributes"][name] = value
+
+            if not has_uuid_field:
+                key = ""
+                if existing:
+                    model = EventModel.model_validate(
+                        {k: v for k, v in event.items() if v is not None}
+                    )
+                    key = fingerprint(event_fields(model))
+                event["uuid"] = existing.get(key) or str(uuid4())
+
+            if event["uuid"] not in seen:
+                seen.add(event["uuid"])
                 db_dict["events"].append(event)
 
             catalogue["events"].append(event["uuid"])  # type: ignore
 
         db_dict["catalogues"].append(catalogue)
 
-    with db.transaction():
-        for _event in db_dict["events"]:
-            db.create_event(**_event)
-        for _catalogue in db_dict["catalogues"]:
-            events = _catalogue.pop("events", [])
-            cat = db.create_catalogue(**_catalogue)
-            cat.add_events([Event._from_uuid(uuid, db) for uuid in events])
+    return db.import_dict(db_dict, on_conflict)
 
 
 def import_votable_file(
-    file_path: str | Path, db: DB, table_name: str | None = None
-) -> None:
+    file_path: str | Path,
+    db: DB,
+    table_name: str | None = None,
+    on_conflict: OnConflict = "replace",
+) -> ImportCounts:
     """
     Imports a VOTable file into a database.
 
     Args:
         file_path: The VOTable file path.
         db: The database into which to import the VOTable.
-    """
-    from astropy.io.votable import parse  # type: ignore[import-untyped]
+        on_conflict: What to do with the events which already exist, see [import_dict][cocat.DB.import_dict].
+            With `"upsert"`, the events are imported into the existing catalogue with the same name, if any.
 
-    import_votable(parse(file_path), db, table_name=table_name)
+    Returns:
+        The number of inserted, updated and unchanged events and catalogues.
+    """
+    tables = _read_tables(lambda: open(file_path, "rb"))
+    return _import_tables(*tables, db, table_name, on_conflict)
 
 
-def import_votable_str(xml_content: str, db: DB, table_name: str | None = None) -> None:
+def import_votable_str(
+    xml_content: str,
+    db: DB,
+    table_name: str | None = None,
+    on_conflict: OnConflict = "replace",
+) -> ImportCounts:
     """
     Imports a VOTable XML string into a database.
 
     Args:
         xml_content: The VOTable content as an XML string.
         db: The database into which to import the VOTable.
+        on_conflict: What to do with the events which already exist, see [import_dict][cocat.DB.import_dict].
+            With `"upsert"`, the events are imported into the existing catalogue with the same name, if any.
+
+    Returns:
+        The number of inserted, updated and unchanged events and catalogues.
     """
-    from astropy.io.votable import parse  # type: ignore[import-untyped]
+    tables = _read_tables(lambda: BytesIO(xml_content.encode()))
+    return _import_tables(*tables, db, table_name, on_conflict)
+
+
+@dataclass
+class _PreparedFile:
+    # a VOTable file imported by a worker process into a scratch document
+    tables: tuple[str | None, list[_Table], bool]
+    update: bytes
+    counts: ImportCounts
+    events: list[str]
+    # the names of the catalogues, by UUID
+    catalogues: dict[str, str]
+
+
+def _prepare_votable_file(
+    file_path: str | Path, table_name: str, format_version: int, client_id: int
+) -> _PreparedFile:
+    # reads and validates a file by importing it into an empty database
+    tables = _read_tables(lambda: open(file_path, "rb"))
+    scratch = DB(Doc(client_id=client_id), format_version)
+    # the indexes of the scratch database are not used
+    scratch._catalogue_maps.unobserve(scratch._catalogues_subscription)
+    scratch._event_maps.unobserve(scratch._events_subscription)
+    counts = _import_tables(*tables, scratch, table_name, "replace")
+    return _PreparedFile(
+        tables,
+        scratch.doc.get_update(),
+        counts,
+        list(scratch._event_maps.keys()),
+        {
+            uuid: catalogue_map["name"]
+            for uuid, catalogue_map in scratch._catalogue_maps.items()
+        },
+    )
 
-    import_votable(parse(BytesIO(xml_content.encode())), db, table_name=table_name)
+
+def import_votable_files(
+    file_paths: Iterable[str | Path],
+    db: DB,
+    table_name: str | None = None,
+    on_conflict: OnConflict = "replace",
+    workers: int | None = None,
+) -> ImportCounts:
+    """
+    Imports VOTable files into a database, reading them in parallel.
+
+    The files are read and validated in worker processes, each into an empty document,
+    and the resulting updates are applied to the database in a single transaction,
+    in the order of the files. Events and catalogues which already exist in the database
+    (and with `"upsert"`, catalogues with an existing name) are imported in this process
+    instead, so the result is the same as importing the files one after the other.
+    Nothing is imported if a file cannot be read.
+
+    Args:
+        file_paths: The VOTable file paths.
+        db: The database into which to import the VOTables.
+        table_name: The name of the catalogues which have none in their VOTable,
+            by default the name of their file without its extension.
+        on_conflict: What to do with the events which already exist, see [import_dict][cocat.DB.import_dict].
+            With `"upsert"`, the events are imported into the existing catalogue with the same name, if any.
+        workers: The number of worker processes, by default the number of processors.
+            With `1`, the files are read in this process.
+
+    Returns:
+        The number of inserted, updated and unchanged events and catalogues.
+    """
+    file_paths = list(file_paths)
+    names = [table_name or Path(file_path).stem for file_path in file_paths]
+    # the client IDs of the scratch documents, which must be unique
+    # (the worker processes could draw the same ones)
+    client_ids = {db.doc.client_id}
+    while len(client_ids) <= len(file_paths):
+        client_ids.add(randbits(32))
+    client_ids.remove(db.doc.client_id)
+    args = (file_paths, names, repeat(db.format_version), client_ids)
+    if workers == 1 or len(file_paths) < 2:
+        prepared_files = list(map(_prepare_votable_file, *args))
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            prepared_files = list(executor.map(_prepare_votable_file, *args))
+
+    counts = ImportCounts()
+    with db.transaction():
+        for prepared, name in zip(prepared_files, names):
+            if (
+                all(uuid not in db._event_maps for uuid in prepared.events)
+                and all(uuid not in db._catalogue_maps for uuid in prepared.catalogues)
+                and (
+                    on_conflict == "replace"
+                    or all(
+                        db._names.get(catalogue_name) is None
+                        for catalogue_name in prepared.catalogues.values()
+                    )
+                )
+            ):
+                db.doc.apply_update(prepared.update)
+                # the catalogues are indexed when the transaction is committed,
+                # but later files can be imported into them
+                for uuid, catalogue_name in prepared.catalogues.items():
+                    db._names.add(uuid, catalogue_name)
+                counts += prepared.counts
+            else:
+                counts += _import_tables(*prepared.tables, db, name, on_conflict)
+    return counts
 
 
 def export_votable_file(
-    catalogues: Sequence[Catalogue] | Catalogue, file_path: str | Path
+    catalogues: Sequence[Catalogue] | Catalogue,
+    file_path: str | Path,
+    chunk_size: int | None = None,
+    format: VOTableFormat = "tabledata",
 ) -> None:
     """
     Exports catalogues to a VOTable file.
@@ -333,21 +1032,34 @@ def export_votable_file(
     Args:
         catalogues: The catalogue(s) to export.
         file_path: The path to the exported file.
+        chunk_size: If given, the events are [written][cocat.votable.write_votable]
+            by chunks of this size, without building the whole table in memory.
+        format: The serialization of the rows: `"tabledata"` (XML elements),
+            or the more compact `"binary"` or `"binary2"` (base64-encoded streams),
+            where string values must be ASCII.
     """
     with open(file_path, "wb") as f:
-        export_votable(catalogues).to_xml(f)
+        if chunk_size is None:
+            export_votable(catalogues).to_xml(f, tabledata_format=format)
+        else:
+            write_votable(catalogues, f, chunk_size, format)
 
 
-def export_votable_str(catalogues: Sequence[Catalogue] | Catalogue) -> str:
+def export_votable_str(
+    catalogues: Sequence[Catalogue] | Catalogue, format: VOTableFormat = "tabledata"
+) -> str:
     """
     Exports catalogues as a VOTable XML string.
 
     Args:
         catalogues: The catalogue(s) to export.
+        format: The serialization of the rows: `"tabledata"` (XML elements),
+            or the more compact `"binary"` or `"binary2"` (base64-encoded streams),
+            where string values must be ASCII.
 
     Returns:
         The VOTable as an XML string.
     """
     content = BytesIO()
-    export_votable(catalogues).to_xml(content)
+    export_votable(catalogues).to_xml(content, tabledata_format=format)
     return content.getvalue().decode()
@@ -1,8 +1,11 @@
+import random
 from datetime import datetime, timedelta
 
 import pytest
 
+import cocat.db
 from cocat import DB
+from cocat.query import evaluate_queries
 
 
 def test_catalogue():
@@ -135,6 +138,24 @@ def test_catalogue():
     assert str(excinfo.value) == "Catalogue has been deleted"
 
 
+def test_catalogue_cached_values():
+    db0 = DB()
+    db1 = DB()
+    db1.sync(db0)
+
+    catalogue0 = db0.create_catalogue(name="cat0", author="John")
+    catalogue1 = db1.get_catalogue(catalogue0.uuid)
+    assert catalogue0.name == catalogue1.name == "cat0"
+
+    with db0.transaction():
+        catalogue0.name = "cat1"
+        assert catalogue0.name == "cat1"
+    assert catalogue1.name == "cat1"
+
+    catalogue1.author = "Paul"
+    assert catalogue0.author == "Paul"
+
+
 def test_iterate_catalogue():
     db = DB()
 
@@ -158,6 +179,21 @@ def test_iterate_catalogue():
     assert set(catalogue) == set(events)
 
 
+def test_add_new_events():
+    db = DB()
+
+    catalogue = db.create_catalogue(name="cat0", author="John")
+    events = catalogue.add_new_events(
+        [
+            {"start": "2025-01-31", "stop": "2026-01-31", "author": "Paul"},
+            {"start": "2027-01-31", "stop": "2028-01-31", "author": "Mike"},
+        ]
+    )
+
+    assert [event.author for event in events] == ["Paul", "Mike"]
+    assert catalogue.events == db.events == set(events)
+
+
 def test_catalogue_repr():
     db = DB()
 
@@ -326,3 +362,297 @@ def test_dynamic_catalogue():
 
     catalogue2.set_dynamic_filter()
     assert not catalogue2.dynamic_events
+
+    # the filter belongs to the catalogue, not to the object
+    uuid = str(catalogue1.uuid)
+    del catalogue1
+    assert db.get_catalogue(uuid).dynamic_events == {event0}
+    db.get_catalogue(uuid).delete()
+    assert uuid not in db._dynamic_filters
+
+
+def test_catalogue_identity():
+    db0 = DB()
+    db1 = DB()
+    db1.sync(db0)
+    catalogue0 = db0.create_catalogue(name="cat0", author="John")
+    uuid = str(catalogue0.uuid)
+
+    assert db0.get_catalogue(uuid) is db0.get_catalogue("cat0") is catalogue0
+    assert db0.catalogues[0] is catalogue0
+    assert db1.get_catalogue(uuid) is db1.get_catalogue(uuid)
+    assert not hasattr(catalogue0, "__dict__")
+
+    del catalogue0
+    assert uuid not in db0._catalogues
+    assert db0.get_catalogue(uuid).name == "cat0"
+
+
+def test_dynamic_events_incremental(monkeypatch):
+    db0 = DB()
+    db1 = DB()
+    db0.sync(db1)
+    event0 = db0.create_event(
+        start="2025-01-31", stop="2025-02-28", author="John", tags=["a"]
+    )
+    event1 = db0.create_event(start="2025-03-31", stop="2025-04-30", author="Paul")
+    db0.create_catalogue(name="cat0", author="Steve")
+    catalogue = db1.create_catalogue(name="dyn", author="Steve")
+    added = []
+    removed = []
+    catalogue.on_add_dynamic_events(added.append)
+    catalogue.on_remove_dynamic_events(removed.append)
+    catalogue.set_dynamic_filter("'a' in event.tags or event in catalogue('cat0')")
+    assert catalogue.dynamic_events == {event0}
+    assert added == [{event0}]
+
+    calls = []
+
+    def _evaluate_queries(db, queries, uuids=None):
+        calls.append(uuids)
+        return evaluate_queries(db, queries, uuids)
+
+    monkeypatch.setattr(cocat.db, "evaluate_queries", _evaluate_queries)
+    assert catalogue.dynamic_events == catalogue.all_events == {event0}
+    db0.create_catalogue(name="other", author="Steve")
+    assert calls == []
+
+    # only the changed events are tested
+    event1.add_tags("a")
+    assert calls == [{str(event1.uuid)}]
+    assert added[-1] == {event1}
+    event0.tags = set()
+    assert removed[-1] == {str(event0.uuid)}
+    db0.get_catalogue("cat0").add_events(event0)
+    assert calls[-1] == {str(event0.uuid)}
+    assert added[-1] == {event0}
+    assert catalogue.dynamic_events == {event0, event1}
+
+    # the referenced catalogue is renamed, the filter cannot be evaluated anymore
+    calls.clear()
+    db0.get_catalogue("cat0").name = "cat1"
+    assert calls == [None]
+    with pytest.raises(RuntimeError):
+        catalogue.dynamic_events
+    db0.create_catalogue(name="cat0", author="Steve", events=event1)
+    assert catalogue.dynamic_events == {event1}
+
+    event1.delete()
+    assert not catalogue.dynamic_events
+    catalogue.set_dynamic_filter("event.author == 'John'")
+    assert catalogue.dynamic_events == {event0}
+    catalogue.set_dynamic_filter()
+    assert removed[-1] == {str(event0.uuid)}
+    assert not catalogue.dynamic_events
+
+    catalogue.set_dynamic_filter("event.author == 'John'")
+    catalogue.delete()
+    assert str(catalogue.uuid) not in db1._dynamic_events
+    event0.author = "Paul"
+
+
+def test_dynamic_events_error():
+    db = DB()
+    event0 = db.create_event(start="2025-01-31", stop="2025-02-28", author="John")
+    catalogue0 = db.create_catalogue(name="cat0", author="Steve")
+    catalogue = db.create_catalogue(name="dyn", author="Steve")
+    catalogue.set_dynamic_filter("event in catalogue('cat0') or event.rating > 2")
+    with pytest.raises(TypeError):
+        catalogue.dynamic_events
+    catalogue0.add_events(event0)
+    assert catalogue.dynamic_events == {event0}
+    catalogue0.remove_events(event0)
+    event0.rating = 3
+    assert catalogue.dynamic_events == {event0}
+    event0.rating = None
+    with pytest.raises(TypeError):
+        catalogue.dynamic_events
+
+
+def test_dynamic_filter_syntax_error():
+    db0 = DB()
+    db1 = DB()
+    db0.sync(db1)
+    event = db0.create_event(start="2025-01-31", stop="2025-02-28", author="John")
+    catalogue = db0.create_catalogue(name="dyn", author="Steve")
+    catalogue.set_dynamic_filter("event.author == 'John'")
+    with pytest.raises(SyntaxError):
+        catalogue.set_dynamic_filter("event.start >")
+    # the previous filter is kept
+    assert catalogue.dynamic_events == {event}
+
+    # the catalogues can still change, locally and remotely
+    other = db0.create_catalogue(name="cat0", author="Steve")
+    other.name = "cat1"
+    db1.get_catalogue("cat1").name = "cat2"
+    db1.create_catalogue(name="cat3", author="Steve")
+    assert db0.get_catalogue("cat2") == other
+    assert db0.get_catalogue("cat3").author == "Steve"
+
+
+def test_evaluate_dynamic_catalogues():
+    db = DB()
+    event0 = db.create_event(start="2025-01-31", stop="2025-02-28", author="John")
+    event1 = db.create_event(start="2025-03-31", stop="2025-04-30", author="Paul")
+    catalogue0 = db.create_catalogue(name="cat0", author="Steve")
+    catalogue1 = db.create_catalogue(name="cat1", author="Steve")
+    catalogue2 = db.create_catalogue(name="cat2", author="Steve")
+    catalogue0.set_dynamic_filter("event.author == 'John'")
+    catalogue1.set_dynamic_filter(
+        "event.author == 'John' or event in catalogue('cat0')"
+    )
+    del db._dynamic_events[str(catalogue1.uuid)]
+    assert db.evaluate_dynamic_catalogues() == {
+        catalogue0: {event0},
+        catalogue1: {event0},
+    }
+    event1.author = "John"
+    assert db.evaluate_dynamic_catalogues() == {
+        catalogue0: {event0, event1},
+        catalogue1: {event0, event1},
+    }
+
+    catalogue2.set_dynamic_filter("event.rating > 2")
+    del db._dynamic_events[str(catalogue1.uuid)]
+    with pytest.raises(TypeError):
+        db.evaluate_dynamic_catalogues()
+    assert str(catalogue1.uuid) in db._dynamic_events
+
+
+def test_catalogue_set_operations():
+    random.seed(0)
+    db0 = DB()
+    db1 = DB()
+    db0.sync(db1)
+    events = db0.create_events(
+        [
+            {"start": "2025-01-01", "stop": "2025-01-02", "author": "John"}
+            for _ in range(100)
+        ]
+    )
+    catalogues = [
+        db0.create_catalogue(
+            name=f"cat{idx}", author="John", events=random.sample(events, 40)
+        )
+        for idx in range(4)
+    ]
+
+    def check():
+        _catalogues = [db1.get_catalogue(catalogue.uuid) for catalogue in catalogues]
+        sets = [catalogue.events.to_set() for catalogue in _catalogues]
+        assert db1.union(*_catalogues) == set().union(*sets)
+        assert db1.intersection(*_catalogues) == sets[0].intersection(*sets[1:])
+        assert db1.difference(*_catalogues) == sets[0].difference(*sets[1:])
+        assert _catalogues[0].overlap_count(_catalogues[1]) == len(sets[0] & sets[1])
+
+    check()
+    assert db1.union() == db1.intersection() == set()
+
+    # the bitmaps are updated
+    catalogues[0].remove_events(catalogues[0].events[:10])
+    catalogues[1].add_events(events[:30])
+    db0.delete_events(events[30:40])
+    check()
+    catalogues[2].delete()
+    catalogues[2] = db0.create_catalogue(
+        name="cat2", author="John", events=events[40::3]
+    )
+    check()
+    # the bitmaps of replaced catalogues are rebuilt
+    catalogue_dict = catalogues[3].to_dict(True)
+    catalogue_dict["events"] = [str(event.uuid) for event in events[50:70]]
+    db0.import_dict({"events": [], "catalogues": [catalogue_dict]})
+    check()
+    assert db0.union(catalogues[3]) == set(events[50:70])
+    assert db0.intersection(catalogues[0], catalogues[3]) == (
+        catalogues[0].events.to_set() & set(events[50:70])
+    )
+    # the ordinals of the events which are not in any catalogue are reused
+    membership = db1._membership
+    assert len(membership._uuids) <= 100
+    assert len(membership._ordinals) == len(db1.union(*catalogues))
+
+
+def test_catalogue_membership_in_transaction():
+    db = DB()
+    events = db.create_events(
+        [
+            {"start": "2025-01-01", "stop": "2025-01-02", "author": "John"}
+            for _ in range(4)
+        ]
+    )
+    catalogue0 = db.create_catalogue(name="cat0", author="John", events=events[:2])
+    catalogue1 = db.create_catalogue(name="cat1", author="John", events=events[:2])
+
+    # additions and removals are both seen before the transaction is committed
+    with db.transaction():
+        catalogue0.remove_events(events[0])
+        catalogue0.add_events(events[2])
+        assert catalogue0.overlap_count(catalogue1) == 1
+        assert db.intersection(catalogue0, catalogue1) == {events[1]}
+        assert events[0].catalogues == {catalogue1}
+        assert events[2].catalogues == {catalogue0}
+        catalogue1.events = {events[2], events[3]}
+        assert db.intersection(catalogue0, catalogue1) == {events[2]}
+        assert events[1].catalogues == {catalogue0}
+    assert db.intersection(catalogue0, catalogue1) == {events[2]}
+    assert events[0].catalogues == set()
+    assert events[1].catalogues == {catalogue0}
+    assert events[3].catalogues == {catalogue1}
+
+
+def test_catalogue_events_setter_diff():
+    db0 = DB()
+    db1 = DB()
+    db0.sync(db1)
+    events = db0.create_events(
+        [
+            {"start": "2025-01-01", "stop": "2025-01-02", "author": "John"}
+            for _ in range(10)
+        ]
+    )
+    catalogue0 = db0.create_catalogue(name="cat0", author="John", events=events[:5])
+    catalogue1 = db1.get_catalogue(catalogue0.uuid)
+    added = []
+    removed = []
+    catalogue1.on_add_events(added.append)
+    catalogue1.on_remove_events(removed.append)
+
+    state = db0.doc.get_state()
+    catalogue0.events = set(events[:5])
+    assert db0.doc.get_state() == state
+
+    catalogue0.events = set(events[3:8])
+    assert added == [set(events[5:8])]
+    assert removed == [{str(event.uuid) for event in events[:3]}]
+    assert catalogue1.events == set(events[3:8])
+
+
+def test_catalogue_fingerprint():
+    db0 = DB()
+    db1 = DB()
+    db0.sync(db1)
+    events = db0.create_events(
+        [{"start": "2025-01-01", "stop": "2025-01-02", "author": "John"}] * 3
+    )
+    catalogue0 = db0.create_catalogue(name="cat", author="John", events=events[:2])
+    catalogue1 = db1.get_catalogue(catalogue0.uuid)
+    assert catalogue1 == catalogue0
+    other = db0.create_catalogue(name="cat", author="John", events=events[:2])
+    assert other.fingerprint == catalogue0.fingerprint
+    assert other != catalogue0
+
+    # the fingerprint depends on the events
+    fingerprint = catalogue1.fingerprint
+    with db0.transaction():
+        catalogue0.add_events(events[2])
+        assert catalogue0.fingerprint != other.fingerprint
+        catalogue0.remove_events(events[2])
+        assert catalogue0.fingerprint == other.fingerprint
+        events[0].author = "Paul"
+        assert catalogue0.fingerprint != fingerprint
+        assert catalogue0.fingerprint == other.fingerprint
+    assert catalogue1.fingerprint != fingerprint
+    assert catalogue1 == catalogue0
+    catalogue0.name = "cat0"
+    assert catalogue1.fingerprint != other.fingerprint
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from cocat import DB
+from cocat.votable import export_votable_str
+
+
+def create_db() -> DB:
+    db = DB()
+    db.create_events(
+        [
+            {
+                "uuid": "7788cbfa-caed-4f05-892e-26e01e259161",
+                "start": "2025-01-31",
+                "stop": "2026-01-31",
+                "author": "John",
+                "tags": ["b", "a"],
+                "rating": 3,
+                "attributes": {"foo": "bar"},
+            },
+            {
+                "uuid": "7788cbfa-caed-4f05-892e-26e01e259160",
+                "start": datetime(2025, 1, 1, 1, tzinfo=timezone(timedelta(hours=1))),
+                "stop": datetime(2025, 1, 2),
+                "author": "Paul",
+                "products": ["c"],
+            },
+        ]
+    )
+    return db
+
+
+def test_db_columns():
+    db = create_db()
+    columns = db.to_columns()
+
+    assert len(columns) == 2
+    assert columns.uuid.tolist() == [
+        b"7788cbfa-caed-4f05-892e-26e01e259160",
+        b"7788cbfa-caed-4f05-892e-26e01e259161",
+    ]
+    assert columns.start.dtype == np.dtype("datetime64[ns]")
+    assert columns.start.tolist() == [
+        np.datetime64("2025-01-01T00:00", "ns").astype(int),
+        np.datetime64("2025-01-31T00:00", "ns").astype(int),
+    ]
+    assert columns.stop[0] == np.datetime64("2025-01-02T00:00")
+    assert columns.author.tolist() == ["Paul", "John"]
+    assert columns.rating.tolist() == [None, 3]
+    assert columns.tags.tolist() == [[], ["a", "b"]]
+    assert columns.products.tolist() == [["c"], []]
+    assert columns.attributes.tolist() == [{}, {"foo": "bar"}]
+    assert columns.start_offset.tolist() == [3600, None]
+    assert columns.stop_offset.tolist() == [None, None]
+
+    # cached until the next change
+    assert db.to_columns() is columns
+    db.get_event("7788cbfa-caed-4f05-892e-26e01e259160").rating = 1
+    columns = db.to_columns()
+    assert columns.rating.tolist() == [1, 3]
+    assert db.to_columns() is columns
+
+
+def test_catalogue_columns():
+    db = create_db()
+    event = db.get_event("7788cbfa-caed-4f05-892e-26e01e259161")
+    catalogue = db.create_catalogue(name="cat", author="John", events=event)
+    empty_catalogue = db.create_catalogue(name="empty", author="John")
+
+    columns = catalogue.to_columns()
+    assert columns.uuid.tolist() == [b"7788cbfa-caed-4f05-892e-26e01e259161"]
+    assert columns.author.tolist() == ["John"]
+    assert catalogue.to_columns() is columns
+    assert len(empty_catalogue.to_columns()) == 0
+
+    catalogue.add_events(db.get_event("7788cbfa-caed-4f05-892e-26e01e259160"))
+    assert catalogue.to_columns().author.tolist() == ["Paul", "John"]
+
+
+def test_catalogue_columns_dangling_event():
+    db = create_db()
+    catalogue = db.create_catalogue(name="cat", author="John")
+    for uuid in (
+        # before the events, and after them
+        "7788cbfa-caed-4f05-892e-26e01e25915f",
+        "ffffffff-caed-4f05-892e-26e01e259160",
+    ):
+        with db.transaction():
+            catalogue._map["events"].clear()
+            catalogue._map["events"][uuid] = True
+
+        with pytest.raises(KeyError, match=uuid):
+            catalogue.to_columns()
+        with pytest.raises(KeyError, match=uuid):
+            export_votable_str(catalogue)
+
+
+def test_pandas_arrow():
+    columns = create_db().to_columns()
+
+    df = columns.to_pandas()
+    assert list(df.index) == [
+        "7788cbfa-caed-4f05-892e-26e01e259160",
+        "7788cbfa-caed-4f05-892e-26e01e259161",
+    ]
+    assert df["author"].tolist() == ["Paul", "John"]
+    assert df["rating"].isna().tolist() == [True, False]
+    assert df["rating"].iloc[1] == 3
+
+    table = columns.to_arrow()
+    assert table.column("uuid").to_pylist() == [
+        "7788cbfa-caed-4f05-892e-26e01e259160",
+        "7788cbfa-caed-4f05-892e-26e01e259161",
+    ]
+    assert table.column("rating").to_pylist() == [None, 3]
+    assert table.column("tags").to_pylist() == [[], ["a", "b"]]
+    assert table.column("attributes").to_pylist() == ["{}", '{"foo": "bar"}']
+    assert table.column("start").to_pylist()[1] == datetime(2025, 1, 31)
+
+
+@pytest.mark.parametrize("format_version", [None, 2])
+def test_columns_out_of_range(format_version):
+    db = DB(format_version=format_version)
+    start = datetime(2500, 1, 1, 0, 0, 0, 1)
+    stop = datetime(9999, 12, 31, 23, 59, 59, 999999)
+    db.create_event(start="2025-01-31", stop="2026-01-31", author="John")
+    db.create_event(start=start, stop=stop, author="Paul")
+    columns = db.to_columns()
+
+    # the dates don't fit in nanoseconds
+    assert columns.start.dtype == columns.stop.dtype == np.dtype("datetime64[us]")
+    assert sorted(columns.start.tolist()) == [datetime(2025, 1, 31), start]
+    assert sorted(columns.stop.tolist()) == [datetime(2026, 1, 31), stop]
+    assert sorted(columns.to_pandas()["start"].tolist())[1] == start
+    assert sorted(columns.to_arrow().column("stop").to_pylist())[1] == stop
@@ -1,8 +1,19 @@
+import json
+import random
 from datetime import datetime, timedelta
+from io import StringIO
 
+import numpy as np
+import pytest
 from pycrdt import Doc
+from pydantic import ValidationError
 
 from cocat import DB
+from cocat.db import ImportCounts
+from cocat.index import attribute_matches
+from cocat.views import View
+
+UUID = "00000000-0000-0000-0000-000000000001"
 
 
 def test_create_catalogue():
@@ -380,3 +391,762 @@ def test_db_repr():
 }
 """
     )
+
+
+def test_time_queries():
+    db0 = DB()
+    db1 = DB()
+    db1.sync(db0)
+
+    event0 = db0.create_event(start="2025-01-01", stop="2025-01-10", author="John")
+    event1 = db0.create_event(start="2025-01-05", stop="2025-01-20", author="John")
+    event2 = db0.create_event(start="2025-02-01", stop="2025-02-01", author="John")
+
+    for db in (db0, db1):
+        assert db.events_overlapping("2025-01-08", "2025-01-12") == {event0, event1}
+        assert db.events_overlapping("2025-01-10", "2025-01-10") == {event0, event1}
+        assert db.events_overlapping("2025-01-21", "2025-01-31") == set()
+        assert db.events_containing("2025-02-01") == {event2}
+        assert db.events_containing(datetime(2025, 1, 3)) == {event0}
+        assert db.events_within("2025-01-01", "2025-01-31") == {event0, event1}
+        assert db.events_within("2025-01-02", "2025-03-01") == {event1, event2}
+
+    event0.range = "2025-03-01", "2025-03-02"
+    db1.get_event(event1.uuid).delete()
+
+    for db in (db0, db1):
+        assert db.events_overlapping("2025-01-08", "2025-01-12") == set()
+        assert db.events_within("2025-01-01", "2025-12-31") == {event0, event2}
+
+    db2 = DB(doc=db0.doc)
+    assert db2.events_within("2025-01-01", "2025-12-31") == {event0, event2}
+
+
+def test_time_queries_many_events():
+    db = DB()
+    start = datetime(2025, 1, 1)
+    with db.transaction():
+        events = [
+            db.create_event(
+                start=start + timedelta(hours=i),
+                stop=start + timedelta(hours=i + 10),
+                author="John",
+            )
+            for i in range(2000)
+        ]
+
+    assert db.events_containing(start + timedelta(hours=100)) == set(events[90:101])
+    assert db.events_within(start, start + timedelta(hours=20)) == set(events[:11])
+
+    events[95].start = start - timedelta(hours=1)
+    events[96].delete()
+    assert db.events_containing(start + timedelta(hours=100)) == set(events[90:101]) - {
+        events[96]
+    }
+    assert db.events_within(
+        start - timedelta(hours=1), start + timedelta(hours=20)
+    ) == (set(events[:11]))
+
+
+def test_delete_events():
+    db = DB()
+    events = [
+        db.create_event(start="2025-01-31", stop="2026-01-31", author="John")
+        for _ in range(3)
+    ]
+    catalogue = db.create_catalogue(name="cat", author="John", events=events)
+
+    db.delete_events(events[0])
+    assert db.events == catalogue.events == set(events[1:])
+    db.delete_events(events[1:])
+    assert db.events == catalogue.events == set()
+
+
+def test_get_catalogue_by_name():
+    db0 = DB()
+    db1 = DB()
+    db1.sync(db0)
+
+    catalogue0 = db0.create_catalogue(
+        uuid="d3d76dc2-ac66-4909-b2f2-125990fbe991", name="cat0", author="John"
+    )
+    catalogue1 = db0.create_catalogue(
+        uuid="d3d76dc2-ac66-4909-b2f2-125990fbe990", name="cat1", author="John"
+    )
+
+    for db in (db0, db1):
+        assert db.get_catalogue("cat0") == catalogue0
+        assert db.get_catalogue("cat1") == catalogue1
+
+    catalogue1.name = "cat0"
+    for db in (db0, db1):
+        # the lowest UUID wins
+        assert db.get_catalogue("cat0") == catalogue1
+        with pytest.raises(RuntimeError) as excinfo:
+            db.get_catalogue("cat1")
+        assert str(excinfo.value) == "No catalogue found with name or UUID: cat1"
+
+    db1.get_catalogue(catalogue1.uuid).delete()
+    for db in (db0, db1):
+        assert db.get_catalogue("cat0") == catalogue0
+
+    assert DB(doc=db0.doc).get_catalogue("cat0") == catalogue0
+
+    with db0.transaction():
+        catalogue2 = db0.create_catalogue(name="cat2", author="John")
+        assert db0.get_catalogue("cat2") is not None
+        catalogue2.name = "cat3"
+        assert db0.get_catalogue("cat3") is not None
+        catalogue2.delete()
+        with pytest.raises(RuntimeError):
+            db0.get_catalogue("cat3")
+
+
+def test_create_events():
+    db0 = DB()
+    db1 = DB()
+    db1.sync(db0)
+
+    events = db0.create_events(
+        [
+            {"start": "2025-01-31", "stop": "2026-01-31", "author": "John"},
+            {
+                "uuid": "7788cbfa-caed-4f05-892e-26e01e259160",
+                "start": datetime(2026, 1, 31),
+                "stop": datetime(2027, 1, 31),
+                "author": "Paul",
+                "tags": ["foo"],
+                "products": ["bar"],
+                "rating": 3,
+                "attributes": {"baz": 1},
+            },
+        ]
+    )
+
+    assert db0.events == db1.events == set(events)
+    assert events[0].author == "John"
+    assert str(events[1].uuid) == "7788cbfa-caed-4f05-892e-26e01e259160"
+    assert events[1].tags == {"foo"}
+    assert events[1].products == {"bar"}
+    assert events[1].rating == 3
+    assert events[1].attributes == {"baz": 1}
+    assert db1.events_containing("2026-06-01") == {events[1]}
+
+    event = db0.create_event(
+        start="2026-01-31",
+        stop="2027-01-31",
+        author="Paul",
+        tags=["foo"],
+        products=["bar"],
+    )
+    assert event.to_dict() | {"uuid": None} == events[1].to_dict() | {
+        "uuid": None,
+        "rating": None,
+        "attributes": {},
+    }
+
+    with pytest.raises(ValidationError):
+        db0.create_events([{"start": "2025-01-31", "author": "John"}])
+    assert len(db0.events) == 3
+
+
+def test_views():
+    db = DB()
+    uuids = [f"7788cbfa-caed-4f05-892e-26e01e25916{i}" for i in range(5)]
+    events = db.create_events(
+        [
+            {
+                "uuid": uuid,
+                "start": "2025-01-31",
+                "stop": "2026-01-31",
+                "author": "John",
+            }
+            for uuid in reversed(uuids)
+        ]
+    )[::-1]
+    catalogue = db.create_catalogue(name="cat", author="John", events=events[:3])
+
+    view = db.events
+    assert isinstance(view, View)
+    assert repr(view) == "<Event view of length 5>"
+    assert repr(db.catalogues) == "<Catalogue view of length 1>"
+    assert len(view) == 5
+    assert events[0] in view
+    assert catalogue not in view
+    assert catalogue in db.catalogues
+    assert view[0] == events[0]
+    assert view[-1] == events[-1]
+    assert view[:2] == events[:2]
+    assert view[1:3] == events[1:3]
+    assert view[-3:4] == events[-3:4] == events[2:4]
+    assert view[-3:2] == []
+    assert view[::-1] == events[::-1]
+    with pytest.raises(IndexError):
+        view[5]
+    assert view.to_set() == set(events)
+    assert set(view) == set(events)
+
+    catalogue_events = catalogue.events
+    assert len(catalogue_events) == 3
+    assert events[3] not in catalogue_events
+    assert catalogue_events | {events[3]} == set(events[:4])
+    assert catalogue_events & view == set(events[:3])
+    assert view - catalogue_events == set(events[3:])
+    assert catalogue_events.union(events[3:]) == set(events)
+    assert view.intersection(events[2:4]) == set(events[2:4])
+    assert view.difference(events[1:]) == {events[0]}
+
+    # views are live
+    events[0].delete()
+    assert len(view) == 4
+    assert len(catalogue_events) == 2
+
+
+def test_numeric_times():
+    db0 = DB(format_version=2)
+    db1 = DB()
+    db0.sync(db1)
+    assert db0.format_version == db1.format_version == 2
+
+    event0 = db0.create_event(start="2025-01-31", stop="2026-01-31", author="John")
+    event1, event2 = db0.create_events(
+        [
+            {
+                "start": "2025-01-31T12:00:00+02:00",
+                "stop": 1767225600,
+                "author": "Paul",
+            },
+            {"start": "2025-06-01", "stop": "2025-06-02", "author": "Mike"},
+        ]
+    )
+    assert isinstance(event0._map["start"], float)
+    assert event0.range == (datetime(2025, 1, 31), datetime(2026, 1, 31))
+    assert str(event1.start) == "2025-01-31 12:00:00+02:00"
+    assert str(event1.stop) == "2026-01-01 00:00:00+00:00"
+    assert event1.to_dict()["start"] == "2025-01-31 12:00:00+02:00"
+    assert db0.events_containing("2025-01-31T10:00:00") == {event0, event1}
+    columns = db0.to_columns()
+    row = columns.uuid.tolist().index(str(event1.uuid).encode())
+    assert columns.start[row] == np.datetime64("2025-01-31T10:00:00")
+    assert columns.start_offset[row] == 7200
+
+    starts = []
+    db1.get_event(event2.uuid).on_change_start(starts.append)
+    event2.start = "2025-05-31T00:00:00+01:00"
+    assert starts == [datetime.fromisoformat("2025-05-31T00:00:00+01:00")]
+    assert db1.get_event(event2.uuid).start == starts[0]
+    assert db1.events_within("2025-05-30T23:00:00", "2025-06-02") == {event2}
+
+    db2 = DB.from_json(db0.to_json())
+    assert db2.format_version == 1
+    assert isinstance(db2.get_event(event0.uuid)._map["start"], str)
+    assert db2.to_dict() == db0.to_dict()
+    db3 = DB.from_json(db2.to_json(), format_version=2)
+    assert db3.to_dict() == db0.to_dict()
+
+
+def test_numeric_times_range():
+    db = DB(format_version=2)
+    # the dates 2**53 microseconds away from the Unix epoch are stored as numbers
+    first = datetime(1684, 7, 28, 0, 12, 25, 259008)
+    last = datetime(2255, 6, 5, 23, 47, 34, 740992)
+    event = db.create_event(start=first, stop=last, author="John")
+    assert isinstance(event._map["start"], float)
+    assert event.range == (first, last)
+
+    # the other dates are stored as strings, exactly
+    for start, stop in (
+        (first - timedelta(microseconds=1), last + timedelta(microseconds=1)),
+        (
+            datetime.fromisoformat("0001-01-01T00:00:00.000001+01:00"),
+            datetime(9999, 12, 31, 23, 59, 59, 999999),
+        ),
+    ):
+        event.range = (start, stop)
+        assert isinstance(event._map["start"], str)
+        assert isinstance(event._map["stop"], str)
+        assert event.range == (start, stop)
+        assert db.events_containing(start) == {event}
+        db1 = DB.from_json(db.to_json(), format_version=2)
+        assert db1.get_event(event.uuid).range == (start, stop)
+        assert db1.to_dict() == db.to_dict()
+    db.migrate(1)
+    assert event.range == (start, stop)
+
+
+def test_migrate():
+    db0 = DB()
+    db1 = DB()
+    db0.sync(db1)
+    event0 = db0.create_event(
+        start="2025-01-31T12:00:00-05:30", stop="2026-01-31", author="John"
+    )
+    db_dict = db0.to_dict()
+    assert event0.start == datetime.fromisoformat("2025-01-31T12:00:00-05:30")
+
+    db0.migrate(2)
+    assert db0.format_version == db1.format_version == 2
+    assert isinstance(event0._map["stop"], float)
+    assert db0.to_dict() == db1.to_dict() == db_dict
+    assert db1.get_event(event0.uuid).start == event0.start
+    assert db1.events_overlapping("2026-01-31", "2027-01-01") == {event0}
+
+    db1.migrate(1)
+    assert db0.format_version == 1
+    assert event0._map.to_py() == {
+        "uuid": str(event0.uuid),
+        "start": "2025-01-31 12:00:00-05:30",
+        "stop": "2026-01-31 00:00:00",
+        "author": "John",
+        "tags": {},
+        "products": {},
+        "rating": None,
+        "attributes": {},
+    }
+    assert db0.to_dict() == db_dict
+
+    with pytest.raises(ValueError, match="Unknown format version"):
+        db0.migrate(3)
+    with pytest.raises(ValueError, match="Unknown format version"):
+        DB(format_version=3)
+    with pytest.raises(ValueError, match="use DB.migrate"):
+        DB(doc=db0.doc, format_version=2)
+    assert DB(doc=db0.doc, format_version=1).format_version == 1
+
+
+def test_find_events():
+    random.seed(0)
+    db0 = DB()
+    db1 = DB()
+    db0.sync(db1)
+    db1.create_attribute_index("snr", kind="sorted")
+    db1.create_attribute_index("flag")
+    records = []
+    for idx in range(200):
+        start = datetime(2025, 1, 1) + timedelta(hours=idx)
+        records.append(
+            {
+                "start": start,
+                "stop": start + timedelta(hours=1),
+                "author": random.choice(["John", "Paul"]),
+                "tags": random.sample(["a", "b", "c"], random.randrange(3)),
+                "products": random.sample(["x", "y"], random.randrange(2)),
+                "attributes": {
+                    "snr": random.choice([0, 1, 2.5, 3, "n/a", None]),
+                    "flag": random.choice([True, False, 1]),
+                    "mode": random.choice(["fast", "slow"]),
+                },
+            }
+        )
+    events = db0.create_events(records)
+    db1.create_attribute_index("mode")
+
+    def brute_force(tags=(), products=(), author=None, attributes={}):
+        result = set()
+        for event in db1.events:
+            if (
+                set(tags) <= event.tags
+                and set(products) <= event.products
+                and author in (None, event.author)
+                and all(
+                    key in event.attributes
+                    and attribute_matches(event.attributes[key], condition)
+                    for key, condition in attributes.items()
+                )
+            ):
+                result.add(event)
+        return result
+
+    criteria = [
+        {},
+        {"tags": ["a", "b"]},
+        {"tags": "a", "products": "x", "author": "John"},
+        {"attributes": {"snr": 3}},
+        {"attributes": {"snr": (1, None)}},
+        {"attributes": {"snr": (None, 2.5)}, "tags": ["c"]},
+        {"attributes": {"snr": ("a", "z")}},
+        {"attributes": {"snr": None}},
+        {"attributes": {"flag": True}},
+        {"attributes": {"flag": 1}},
+        {"attributes": {"flag": (0, 1)}},
+        {"attributes": {"mode": "fast", "missing": 1}},
+        {"attributes": {"snr": [1]}},
+        {"attributes": {"missing": (None, None)}},
+        {"attributes": {"snr": (None, None)}},
+        {"attributes": {"snr": 42}},
+        {"author": "Mike"},
+    ]
+
+    def check():
+        for kwargs in criteria:
+            result = db1.find_events(**kwargs)
+            assert isinstance(result, View)
+            assert result.to_set() == brute_force(**kwargs)
+
+    check()
+    assert db1.find_events(attributes={"snr": 3}).to_set() == {
+        event for event in db1.events if event.attributes["snr"] == 3
+    }
+    # booleans are not equal to numbers
+    assert db1.find_events(attributes={"flag": 1}).to_set() == {
+        event
+        for event in db1.events
+        if not isinstance(event.attributes["flag"], bool)
+        and event.attributes["flag"] == 1
+    }
+
+    # the indexes are updated
+    events[100].set_attributes(snr=42)
+    check()
+    events[100].set_attributes(snr=[1, 2])
+    for event in events[:50]:
+        event.set_attributes(snr=random.choice([1, 3, "x"]), flag=False)
+        event.add_tags("a")
+    for event in events[50:60]:
+        event.remove_attributes(["snr", "mode"])
+    for event in events[60:70]:
+        event.attributes = {"snr": 2}
+    db0.delete_events(events[70:80])
+    check()
+
+    db1.create_attribute_index("snr")
+    assert not db1._attribute_indexes["snr"].ordered
+    db1.create_attribute_index("snr")
+    check()
+    db1.drop_attribute_index("snr")
+    check()
+
+
+def test_search():
+    db0 = DB()
+    db1 = DB()
+    db0.sync(db1)
+    event0 = db0.create_event(
+        start="2025-01-01",
+        stop="2025-01-02",
+        author="John",
+        tags=["shock"],
+        attributes={
+            "note": "Magnetopause crossing in the magnetosphere, then a shock",
+            "snr": 1,
+        },
+    )
+    event1 = db0.create_event(
+        start="2025-01-01",
+        stop="2025-01-02",
+        author="John",
+        attributes={"note": "Magnetosheath jet"},
+    )
+    catalogue0 = db0.create_catalogue(
+        name="Shocks", author="John", attributes={"mission": "MMS"}
+    )
+    assert db1.search_events("shock") == [event0]
+    assert db1.search_events("MAGNETO*") == [event0, event1]
+    assert db1.search_events("magneto* jet") == [event1]
+    assert db1.search_events("magneto*", limit=1) == [event0]
+    assert db1.search_events("magneto") == []
+    assert db1.search_events("") == []
+    assert db1.search_catalogues("mms shocks") == [catalogue0]
+
+    # the indexes are updated
+    event1.add_tags("shock")
+    event0.set_attributes(note="crossing")
+    event0.remove_tags("shock")
+    assert db1.search_events("shock") == [event1]
+    db0.delete_events(event1)
+    assert db1.search_events("shock") == []
+    event2 = db0.create_event(
+        start="2025-01-01", stop="2025-01-02", author="John", tags=["jet"]
+    )
+    assert db1.search_events("jet") == [event2]
+    catalogue0.name = "Jets"
+    catalogue0.add_tags("foreshock")
+    assert db1.search_catalogues("jets fore*") == [catalogue0]
+    catalogue0.delete()
+    assert db1.search_catalogues("jets") == []
+
+
+def test_text_index_file(tmp_path):
+    db0 = DB()
+    db0.create_event(
+        start="2025-01-01", stop="2025-01-02", author="John", tags=["shock"]
+    )
+    db0.create_catalogue(name="Shocks", author="John")
+    path = tmp_path / "text_index.json"
+    db0.save_text_index(path)
+
+    db1 = DB()
+    db1.doc.apply_update(db0.doc.get_update())
+    assert db1.load_text_index(path)
+    assert db1._event_texts is not None
+    assert db1.search_events("shock") == list(db1.events)
+    assert db1.search_catalogues("shocks") == list(db1.catalogues)
+
+    db1.create_event(start="2025-01-01", stop="2025-01-02", author="John")
+    assert not db1.load_text_index(path)
+
+    # deleting an event doesn't change the state vector
+    event = db0.create_event(
+        start="2025-01-01", stop="2025-01-02", author="John", tags=["magnetopause"]
+    )
+    db0.save_text_index(path)
+    event.delete()
+    db2 = DB()
+    db2.doc.apply_update(db0.doc.get_update())
+    assert not db2.load_text_index(path)
+    assert db2.search_events("magnetopause") == []
+
+    # the postings of unknown records are dropped
+    data = json.loads(path.read_text())
+    data["document"] = db2._document_hash()
+    path.write_text(json.dumps(data))
+    assert db2.load_text_index(path)
+    assert db2.search_events("magnetopause") == []
+
+
+def test_import_dict_upsert():
+    db0 = DB()
+    events = db0.create_events(
+        [
+            {
+                "start": "2025-01-01",
+                "stop": "2025-01-02",
+                "author": "John",
+                "tags": ["a", "b"],
+                "rating": 2,
+                "attributes": {"n": 1, "flag": True, "list": [1, "a"]},
+            },
+            {
+                "start": "2025-02-01T00:00:00+02:00",
+                "stop": "2025-02-02",
+                "author": "Paul",
+            },
+        ]
+    )
+    db0.create_catalogue(
+        name="cat", author="John", tags=["x"], events=events, attributes={"key": 1}
+    )
+    db_dict = json.loads(db0.to_json())
+
+    # importing the same data doesn't change the document
+    db1 = DB.from_dict(json.loads(db0.to_json()))
+    state = db1.doc.get_state()
+    counts = db1.import_dict(json.loads(db0.to_json()), on_conflict="upsert")
+    assert counts == ImportCounts(unchanged=3)
+    assert db1.doc.get_state() == state
+
+    # only the changes are written
+    for record in db_dict["events"]:
+        if record["uuid"] == str(events[0].uuid):
+            record["author"] = "Mike"
+    db_dict["events"].append(
+        {"start": "2025-03-01", "stop": "2025-03-02", "author": "Paul", "uuid": UUID}
+    )
+    db_dict["catalogues"][0]["events"].append(UUID)
+    db_dict["catalogues"][0]["attributes"] = {"key": 2}
+    updates = []
+    db1.doc.observe(lambda event: updates.append(event.update))
+    counts = db1.import_dict(db_dict, on_conflict="upsert")
+    assert counts == ImportCounts(inserted=1, updated=2, unchanged=1)
+    assert len(updates) == 1
+    assert db1.get_event(events[0].uuid).author == "Mike"
+    assert db1.get_event(events[0].uuid).tags == {"a", "b"}
+    assert len(db1.get_catalogue("cat").events) == 3
+    assert db1.get_catalogue("cat").attributes == {"key": 2}
+
+    # the existing records are entirely replaced
+    counts = db1.import_dict(db_dict)
+    assert counts == ImportCounts(updated=4)
+    assert db1.to_dict() == DB.from_dict(db_dict).to_dict()
+
+
+def test_import_dict_duplicates():
+    event = {
+        "start": "2025-01-01",
+        "stop": "2025-01-02",
+        "author": "John",
+        "uuid": UUID,
+    }
+    catalogue = {"name": "cat", "author": "John", "events": [UUID], "uuid": UUID}
+    db_dict = {
+        "events": [event, event, {**event, "author": "Paul"}],
+        "catalogues": [catalogue, catalogue],
+    }
+
+    # a UUID which appears again is counted like in the following imports
+    db0 = DB()
+    counts = db0.import_dict(db_dict)
+    assert counts == ImportCounts(inserted=2, updated=3)
+    assert len(db0.events) == len(db0.catalogues) == 1
+    assert db0.get_event(UUID).author == "Paul"
+    db1 = DB()
+    counts = db1.import_dict(db_dict, on_conflict="upsert")
+    assert counts == ImportCounts(inserted=2, updated=1, unchanged=2)
+    assert db1.to_dict() == db0.to_dict()
+
+    # whatever the batches of a JSON Lines file
+    fp = StringIO()
+    for key in ("events", "catalogues"):
+        for record in db_dict[key]:
+            fp.write(json.dumps({key[:-1]: record}) + "\n")
+    for batch_size in (1, 2, 10):
+        db2 = DB()
+        counts = db2.load_jsonl(
+            StringIO(fp.getvalue()), on_conflict="upsert", batch_size=batch_size
+        )
+        assert counts == ImportCounts(inserted=2, updated=1, unchanged=2)
+        assert db2.to_dict() == db0.to_dict()
+
+
+@pytest.mark.parametrize("format_version", [None, 2])
+def test_jsonl(format_version):
+    db0 = DB(format_version=format_version)
+    events = db0.create_events(
+        [
+            {
+                "start": datetime(2025, 1, 1) + timedelta(days=idx),
+                "stop": datetime(2025, 1, 2) + timedelta(days=idx),
+                "author": "John",
+                "tags": ["a"][: idx % 2],
+                "attributes": {"n": idx},
+            }
+            for idx in range(25)
+        ]
+    )
+    db0.create_catalogue(name="cat0", author="John", events=events[::2])
+    db0.create_catalogue(name="cat1", author="Paul", tags=["x"], events=events[:3])
+    fp = StringIO()
+    db0.dump_jsonl(fp)
+    lines = fp.getvalue().splitlines()
+
+    # the records of to_dict, one per line, with the events first
+    db_dict: dict[str, list] = {"events": [], "catalogues": []}
+    for line in lines:
+        ((key, record),) = json.loads(line).items()
+        db_dict[key + "s"].append(record)
+    assert db_dict == db0.to_dict()
+    assert [next(iter(json.loads(line))) for line in lines] == ["event"] * 25 + [
+        "catalogue"
+    ] * 2
+
+    # one transaction per batch
+    db1 = DB(format_version=format_version)
+    updates = []
+    db1.doc.observe(lambda event: updates.append(event.update))
+    counts = db1.load_jsonl(StringIO(fp.getvalue()), batch_size=7)
+    assert counts == ImportCounts(inserted=27)
+    assert len(updates) == 4
+    assert db1.to_dict() == db0.to_dict()
+    assert db1.get_catalogue("cat1").events == set(events[:3])
+
+    # loading the same data again doesn't change the document
+    counts = db1.load_jsonl(StringIO("\n" + fp.getvalue()), on_conflict="upsert")
+    assert counts == ImportCounts(unchanged=27)
+    assert len(updates) == 4
+
+    with pytest.raises(ValueError, match="line 2"):
+        db1.load_jsonl(StringIO(lines[0] + '\n{"foo": {}}\n'))
+
+
+def test_import_dict_replace_range():
+    db0 = DB()
+    db1 = DB()
+    db0.sync(db1)
+    event = db0.create_event(start="2020-01-01", stop="2020-01-02", author="John")
+    live_event = db1.get_event(event.uuid)
+    db_dict = db0.to_dict()
+    db_dict["events"][0].update(start="2021-01-01", stop="2021-01-02")
+    assert db0.import_dict(db_dict) == ImportCounts(updated=1)
+    for db in (db0, db1):
+        assert db.events_overlapping("2020-01-01", "2020-02-01") == set()
+        assert db.events_overlapping("2021-01-01", "2021-02-01") == {event}
+    assert live_event.start == datetime(2021, 1, 1)
+    assert event.start == datetime(2021, 1, 1)
+
+
+def test_import_dict_replace_terms():
+    db = DB()
+    db.create_attribute_index("key")
+    db.create_attribute_index("other")
+    event = db.create_event(
+        start="2020-01-01",
+        stop="2020-01-02",
+        author="John",
+        tags=["x"],
+        attributes={"key": 1, "other": "a"},
+    )
+    db_dict = db.to_dict()
+    db_dict["events"][0].update(author="Paul", tags=["y"], attributes={"key": 2})
+    db.import_dict(db_dict)
+    assert db.find_events(tags=["x"]) == set()
+    assert db.find_events(tags=["y"], author="Paul") == {event}
+    assert db.find_events(author="John") == set()
+    assert db.find_events(attributes={"key": 1}) == set()
+    assert db.find_events(attributes={"key": 2}) == {event}
+    assert db.find_events(attributes={"other": "a"}) == set()
+
+
+def test_import_dict_replace_catalogue():
+    db0 = DB()
+    db1 = DB()
+    db0.sync(db1)
+    events = db0.create_events(
+        [
+            {"start": "2020-01-01", "stop": "2020-01-02", "author": "John"}
+            for _ in range(3)
+        ]
+    )
+    catalogue = db0.create_catalogue(name="cat", author="John", events=events[:2])
+    live_catalogue = db1.get_catalogue(catalogue.uuid)
+    db_dict = db0.to_dict()
+    db_dict["catalogues"][0]["events"] = [str(events[2].uuid)]
+    assert db0.import_dict(db_dict) == ImportCounts(updated=4)
+    for db in (db0, db1):
+        assert db.get_event(events[0].uuid).catalogues == set()
+        assert db.get_event(events[2].uuid).catalogues == {catalogue}
+    assert live_catalogue.events == {events[2]}
+
+    # the events which left the catalogue can be deleted
+    events[0].delete()
+    assert catalogue.events == {events[2]}
+
+
+def test_import_dict_replace_name():
+    db0 = DB()
+    db1 = DB()
+    db0.sync(db1)
+    catalogue = db0.create_catalogue(name="a", author="John")
+    assert db1.get_catalogue("a") == catalogue
+    db_dict = db0.to_dict()
+    db_dict["catalogues"][0]["name"] = "b"
+    db0.import_dict(db_dict)
+    for db in (db0, db1):
+        assert db.get_catalogue("b") == catalogue
+        with pytest.raises(RuntimeError):
+            db.get_catalogue("a")
+        assert db.search_catalogues("b") == [catalogue]
+        assert db.search_catalogues("a") == []
+
+
+def test_find_duplicates():
+    db = DB()
+    records = [
+        {"start": "2025-01-01", "stop": "2025-01-02", "author": "John"},
+        {"start": "2025-01-01", "stop": "2025-01-02", "author": "Paul"},
+    ]
+    events = db.create_events(records * 3 + records[:1])
+    # the groups are ordered by their lowest UUID
+    expected = sorted(
+        [set(events[0::2]), set(events[1::2])],
+        key=lambda group: min(str(event.uuid) for event in group),
+    )
+    assert [set(group) for group in db.find_duplicates()] == expected
+    catalogue = db.create_catalogue(name="cat", author="John", events=events[:3])
+    assert [set(group) for group in db.find_duplicates(catalogue.events)] == [
+        {events[0], events[2]}
+    ]
+
+    events[2].author = "Mike"
+    assert db.find_duplicates(catalogue.events) == []
+    db.delete_events(events[4])
+    assert sorted(len(group) for group in db.find_duplicates()) == [2, 3]
@@ -193,3 +193,177 @@ def test_iterate_event():
         author="John",
     )
     assert list(event) == [datetime(2025, 1, 31, 0, 0), datetime(2026, 1, 31, 0, 0)]
+
+
+def test_event_catalogues():
+    db0 = DB()
+    db1 = DB()
+    db1.sync(db0)
+
+    event0 = db0.create_event(start="2025-01-31", stop="2026-01-31", author="John")
+    event1 = db0.create_event(start="2025-01-31", stop="2026-01-31", author="John")
+    catalogue0 = db0.create_catalogue(name="cat0", author="John", events=event0)
+    catalogue1 = db0.create_catalogue(
+        name="cat1", author="John", events=[event0, event1]
+    )
+
+    assert event0.catalogues == {catalogue0, catalogue1}
+    assert db1.get_event(event0.uuid).catalogues == {catalogue0, catalogue1}
+    assert event1.catalogues == {catalogue1}
+    assert DB(doc=db0.doc).get_event(event1.uuid).catalogues == {catalogue1}
+
+    catalogue1.remove_events(event0)
+    assert db1.get_event(event0.uuid).catalogues == {catalogue0}
+    catalogue0.delete()
+    assert db1.get_event(event0.uuid).catalogues == set()
+
+    db1.get_event(event1.uuid).delete()
+    assert catalogue1.events == set()
+
+    with db0.transaction():
+        event2 = db0.create_event(start="2025-01-31", stop="2026-01-31", author="Paul")
+        catalogue1.add_events(event2)
+        event2.delete()
+    assert catalogue1.events == set()
+    assert db1.get_catalogue(catalogue1.uuid).events == set()
+
+    with db0.transaction():
+        catalogue2 = db0.create_catalogue(name="cat2", author="John", events=event0)
+        catalogue2.delete()
+        event0.delete()
+    assert db0.events == db1.events == set()
+
+
+def test_event_cached_values():
+    db0 = DB()
+    db1 = DB()
+    db1.sync(db0)
+
+    event0 = db0.create_event(start="2025-01-31", stop="2026-01-31", author="John")
+    event1 = db1.get_event(event0.uuid)
+    assert (
+        event0.range == event1.range == (datetime(2025, 1, 31), datetime(2026, 1, 31))
+    )
+
+    with db0.transaction():
+        event0.start = "2025-01-30"
+        assert event0.start == datetime(2025, 1, 30)
+        event0.author = "Paul"
+        assert event0.author == "Paul"
+    assert event1.start == datetime(2025, 1, 30)
+    assert event1.author == "Paul"
+
+    event1.rating = 2
+    assert event0.rating == 2
+
+    event0.delete()
+    event2 = db0.create_event(
+        uuid=event0.uuid, start="2027-01-31", stop="2028-01-31", author="Mike"
+    )
+    event3 = db1.get_event(event0.uuid)
+    assert (
+        event2.range == event3.range == (datetime(2027, 1, 31), datetime(2028, 1, 31))
+    )
+    assert event3.author == "Mike"
+
+
+def test_event_identity():
+    db0 = DB()
+    db1 = DB()
+    db1.sync(db0)
+    event0 = db0.create_event(start="2025-01-31", stop="2026-01-31", author="John")
+    uuid = str(event0.uuid)
+
+    assert db0.get_event(uuid) is event0
+    assert db0.events[0] is event0
+    assert db0.events_containing("2025-06-01") == {event0}
+    assert next(iter(db0.events_containing("2025-06-01"))) is event0
+    assert db1.get_event(uuid) is db1.get_event(uuid)
+    assert not hasattr(event0, "__dict__")
+
+    # the object is released when it is not used anymore, with its decoded values
+    assert event0.start == datetime(2025, 1, 31)
+    assert "start" in event0._values
+    del event0
+    assert uuid not in db0._events
+    event0 = db0.get_event(uuid)
+    assert event0._values == {}
+    assert event0.author == "John"
+
+    event0.delete()
+    assert uuid not in db0._events
+    with pytest.raises(RuntimeError):
+        db0.get_event(uuid)
+
+
+def test_event_setters_diff():
+    db0 = DB()
+    db1 = DB()
+    db0.sync(db1)
+    event0 = db0.create_event(
+        start="2025-01-01",
+        stop="2025-01-02",
+        author="John",
+        tags=["a", "b"],
+        attributes={"n": 1, "flag": True, "nested": {"x": [1, 2]}},
+    )
+    event1 = db1.get_event(event0.uuid)
+    added_tags = []
+    removed_tags = []
+    set_attributes = []
+    removed_attributes = []
+    event1.on_add_tags(added_tags.append)
+    event1.on_remove_tags(removed_tags.append)
+    event1.on_set_attributes(set_attributes.append)
+    event1.on_remove_attributes(removed_attributes.append)
+
+    # setting the same values doesn't change the document
+    state = db0.doc.get_state()
+    event0.tags = {"a", "b"}
+    event0.attributes = {"n": 1.0, "flag": True, "nested": {"x": [1, 2]}}
+    assert db0.doc.get_state() == state
+
+    # only the differences are written
+    event0.tags = {"b", "c"}
+    assert added_tags == [{"c"}]
+    assert removed_tags == [{"a"}]
+    event0.attributes = {"n": 2, "flag": 1, "nested": {"x": [1, 2]}}
+    assert set_attributes == [{"n": 2, "flag": 1}]
+    assert removed_attributes == []
+    event0.attributes = {"n": 2}
+    assert removed_attributes == [{"flag", "nested"}]
+    assert event1.tags == {"b", "c"}
+    assert event1.attributes == {"n": 2}
+
+
+def test_event_fingerprint():
+    db0 = DB()
+    db1 = DB()
+    db0.sync(db1)
+    record = {
+        "start": "2025-01-01",
+        "stop": "2025-01-02T00:00:00+01:00",
+        "author": "John",
+        "tags": ["b", "a"],
+        "rating": 2,
+        "attributes": {"n": 1, "flag": True},
+    }
+    event0, event1 = db0.create_events([record, record])
+    event2 = DB(format_version=2).create_event(**record)
+    assert event0.fingerprint == event1.fingerprint == event2.fingerprint
+    assert event0 != event1
+    assert db1.get_event(event0.uuid) == event0
+
+    # the fingerprint is invalidated locally, and when remote changes are committed
+    with db0.transaction():
+        event1.set_attributes(flag=1)
+        assert event1.fingerprint != event0.fingerprint
+        event1.set_attributes(flag=True)
+        assert event1.fingerprint == event0.fingerprint
+        event1.stop = datetime.fromisoformat("2025-01-01T23:00:00+00:00")
+        assert event1.fingerprint != event0.fingerprint
+    event1 = db1.get_event(event1.uuid)
+    fingerprint = event1.fingerprint
+    db0.get_event(event1.uuid).tags = {"c"}
+    assert event1.fingerprint != fingerprint
+    assert event1 == db0.get_event(event1.uuid)
@@ -0,0 +1,166 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from utils import evaluate_per_event
+
+from cocat import DB
+from cocat.query import Query, compile_query, evaluate_queries
+
+CONDITIONS = [
+    "event.start > datetime(2025, 3, 1)",
+    "datetime(2025, 3, 1) <= event.start < datetime(2025, 6, 1)",
+    "event.stop <= datetime(2025, 6, 1) and 'a' in event.tags",
+    "event.stop < datetime(2025, 3, 1)",
+    "event.stop >= datetime(2025, 6, 1) and event.author == 'John'",
+    "event.start == datetime(2025, 1, 1)",
+    "'b' not in event.tags and 'John' == event.author",
+    "event.author != 'Paul' and 'x' in event.products",
+    "event in catalogue('cat0') and event not in catalogue('cat1')",
+    "event.rating is not None and event.rating > 2 and event.start > datetime(2025, 2, 1)",
+    "event.attributes['foo'] == 1 or 'c' in event.tags",
+    "event.start != datetime(2025, 1, 1) and event.rating == 1",
+    "event.author == event.author and event.author in 'Paul'",
+]
+
+
+def create_db(count):
+    random.seed(0)
+    db = DB()
+    records = []
+    for idx in range(count):
+        start = datetime(2025, 1, 1) + timedelta(hours=random.randrange(24 * 200))
+        records.append(
+            {
+                "start": start,
+                "stop": start + timedelta(hours=random.randrange(24 * 30)),
+                "author": random.choice(["John", "Paul"]),
+                "tags": random.sample(["a", "b", "c"], random.randrange(3)),
+                "products": random.sample(["x", "y"], random.randrange(2)),
+                "rating": random.choice([None, 1, 2, 3]),
+                "attributes": {"foo": idx % 3},
+            }
+        )
+    events = db.create_events(records)
+    db.create_catalogue(name="cat0", author="John", events=events[::2])
+    db.create_catalogue(name="cat1", author="John", events=events[::3])
+    return db, events
+
+
+@pytest.mark.parametrize("count", [100, 2000])
+def test_query_parity(count):
+    db, events = create_db(count)
+    uuids = {str(event.uuid) for event in events[::7]}
+    for condition in CONDITIONS:
+        expected = evaluate_per_event(db, condition)
+        assert Query(condition).evaluate(db) == expected
+        assert Query(condition).evaluate(db, uuids) == expected & uuids
+
+    # the indexes are updated
+    for event in events[:50]:
+        event.start -= timedelta(days=1)
+        event.author = "Paul" if event.author == "John" else "John"
+        event.add_tags("a")
+        event.products = {"y"}
+    db.delete_events(events[50:60])
+    for condition in CONDITIONS:
+        assert Query(condition).evaluate(db) == evaluate_per_event(db, condition)
+
+
+def test_query_plan():
+    query = Query(
+        "event.start > datetime(2025, 3, 1) and 'a' in event.tags "
+        "and event not in catalogue('cat0') and event.author == 'John'"
+    )
+    assert not query._residuals
+    assert len(query._lookups) == 4
+    query = Query("event.rating > 2 or event.start > datetime(2025, 3, 1)")
+    assert not query._lookups
+    assert compile_query("event.rating > 2") is compile_query("event.rating > 2")
+    assert Query("event.rating > 2").references == set()
+    query = Query("event in catalogue('cat0') or event not in catalogue('cat1')")
+    assert query.references == {"cat0", "cat1"}
+    assert Query("event in catalogue(event.author)").references is None
+
+
+def test_evaluate_queries(monkeypatch):
+    db, events = create_db(100)
+    queries = [Query(condition) for condition in CONDITIONS]
+    queries.append(Query("event.start > '2025-01-01'"))
+    results = evaluate_queries(db, queries)
+    for condition, result in zip(CONDITIONS, results):
+        assert result == evaluate_per_event(db, condition)
+    assert isinstance(results[-1], TypeError)
+    uuids = {str(event.uuid) for event in events[::7]}
+    for condition, result in zip(CONDITIONS, evaluate_queries(db, queries, uuids)):
+        assert result == evaluate_per_event(db, condition) & uuids
+
+    # the sub-expressions in common are only evaluated once
+    calls = []
+    get_catalogue = db.get_catalogue
+
+    def _get_catalogue(name):
+        calls.append(name)
+        return get_catalogue(name)
+
+    monkeypatch.setattr(db, "get_catalogue", _get_catalogue)
+    evaluate_queries(
+        db,
+        [
+            Query("event in catalogue('cat0') and event.rating == 1"),
+            Query("event in catalogue('cat0') and event.author == 'John'"),
+        ],
+    )
+    assert calls == ["cat0"]
+
+
+def test_query_empty():
+    db = DB()
+    assert Query("event in catalogue('foo')").evaluate(db) == set()
+
+
+def test_query_dangling_event():
+    db, events = create_db(10)
+    catalogue = db.get_catalogue("cat0")
+    uuid = "ffffffff-caed-4f05-892e-26e01e259160"
+    with db.transaction():
+        catalogue._map["events"][uuid] = True
+
+    expected = {str(event.uuid) for event in events[::2]}
+    assert Query("event in catalogue('cat0')").evaluate(db) == expected
+    query = Query("event in catalogue('cat0') and event.rating != 0")
+    assert query.evaluate(db) == expected
+
+
+def test_query_type_error():
+    db, _ = create_db(10)
+    with pytest.raises(TypeError):
+        Query("event.start > '2025-01-01'").evaluate(db)
+    with pytest.raises(RuntimeError):
+        Query("event in catalogue('foo')").evaluate(db)
+    assert Query("1 in event.tags").evaluate(db) == set()
+    with pytest.raises(TypeError):
+        Query("event in 'abc'").evaluate(db)
+
+
+def test_query_remote():
+    db0 = DB()
+    db1 = DB()
+    db0.sync(db1)
+    event0 = db0.create_event(
+        start="2025-01-31", stop="2026-01-31", author="John", tags=["a"]
+    )
+    query = Query("'b' in event.tags and event.author == 'Paul'")
+    assert query.evaluate(db1) == set()
+
+    event0.add_tags("b")
+    event0.author = "Paul"
+    assert query.evaluate(db1) == {str(event0.uuid)}
+
+    event0.remove_tags("b")
+    assert query.evaluate(db1) == set()
+    event0.tags = {"b"}
+    assert query.evaluate(db1) == {str(event0.uuid)}
+
+    event0.delete()
+    assert query.evaluate(db1) == set()
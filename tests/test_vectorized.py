@@ -0,0 +1,165 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from simpleeval import SimpleEval  # type: ignore[import-untyped]
+from utils import evaluate_per_event
+
+from cocat import DB, query
+from cocat.query import Query
+from cocat.vectorized import Unsupported, evaluate_mask, is_vectorizable
+
+CONDITIONS = [
+    "event.rating is not None and event.rating >= 2",
+    "event.rating == 3 or event.author == 'Paul'",
+    "not (event.rating is None) and event.rating < 2",
+    "event.rating is not None and event.rating != 1 and 2 > event.rating",
+    "event.start < event.stop and event.author < 'M'",
+    "event.attributes['foo'] > 1 and event.attributes['bar'] != 'x'",
+    "event.attributes['baz'] <= 0.5 or event.attributes['bar'] is None",
+    "event.attributes['bar'] == 'y' and event.attributes['bar'] >= 'y'",
+    "datetime(2025, 3, 1) <= event.start and event.stop < datetime(2025, 6, 1)",
+    "event.start == datetime(2025, 1, 1) or event.stop != datetime(2025, 1, 2)",
+    "1 < 2 and event.author != 'John'",
+    "1 is None or 'John' == event.author",
+    "event in catalogue('cat0') or event.rating == 1",
+    "event not in catalogue('cat0') and not event.author == 'John'",
+    "event.rating is None or event.rating > 2",
+    "True",
+]
+
+UNSUPPORTED = [
+    # None is not ordered
+    "event.rating > 2",
+    "event.attributes['bar'] < 'y'",
+    # key errors
+    "event.attributes['missing'] == 1",
+    # mixed types
+    "event.attributes['mixed'] == 1",
+    "event.start > '2025-01-01'",
+    "event.rating is 3",
+    "event.start == event.author",
+    "event.rating == event.attributes['bar']",
+    "event.rating == event.attributes['foo']",
+    "event in 'abc'",
+]
+
+
+@pytest.fixture()
+def db():
+    random.seed(0)
+    db = DB()
+    records = []
+    for idx in range(300):
+        start = datetime(2025, 1, 1) + timedelta(hours=random.randrange(24 * 200))
+        records.append(
+            {
+                "start": start,
+                "stop": start + timedelta(hours=random.randrange(24 * 30)),
+                "author": random.choice(["John", "Paul", "Mike"]),
+                "rating": random.choice([None, 1, 2, 3]),
+                "attributes": {
+                    "foo": idx % 3,
+                    "bar": random.choice([None, "x", "y"]),
+                    "baz": random.random(),
+                    "mixed": random.choice([1, "1"]),
+                },
+            }
+        )
+    records[0]["start"] = datetime(2025, 1, 1)
+    events = db.create_events(records)
+    db.create_catalogue(name="cat0", author="John", events=events[::2])
+    return db
+
+
+def evaluate_columns(db, condition):
+    evaluator = SimpleEval()
+    evaluator.functions = {"datetime": datetime, "catalogue": db.get_catalogue}
+    node = SimpleEval.parse(condition).value
+    assert is_vectorizable(node)
+    columns = db.to_columns()
+    mask = evaluate_mask([node], columns, evaluator)
+    return set(columns.uuid[mask].astype(str).tolist())
+
+
+@pytest.mark.parametrize("condition", CONDITIONS)
+def test_parity(db, condition, monkeypatch):
+    expected = evaluate_per_event(db, condition)
+    assert evaluate_columns(db, condition) == expected
+    monkeypatch.setattr(query, "VECTORIZE_MIN_EVENTS", 0)
+    assert Query(condition).evaluate(db) == expected
+
+
+@pytest.mark.parametrize("condition", UNSUPPORTED)
+def test_unsupported(db, condition, monkeypatch):
+    with pytest.raises(Unsupported):
+        evaluate_columns(db, condition)
+
+    # the per-event evaluation is used
+    monkeypatch.setattr(query, "VECTORIZE_MIN_EVENTS", 0)
+    try:
+        expected = evaluate_per_event(db, condition)
+    except Exception as exception:
+        with pytest.raises(type(exception)):
+            Query(condition).evaluate(db)
+    else:
+        assert Query(condition).evaluate(db) == expected
+
+
+def test_not_vectorizable():
+    for condition in [
+        "event.rating + 1 > 2",
+        "'a' in event.tags or event.rating == 1",
+        "-event.rating",
+        "event.attributes",
+    ]:
+        assert not is_vectorizable(SimpleEval.parse(condition).value)
+
+
+def test_outdated_snapshot(db, monkeypatch):
+    monkeypatch.setattr(query, "VECTORIZE_MIN_EVENTS", 0)
+    condition = "event.rating == 1"
+    with db.transaction():
+        db.to_columns()
+        db.create_event(start="2025-01-01", stop="2025-01-02", author="John", rating=1)
+        assert Query(condition).evaluate(db) == evaluate_per_event(db, condition)
+
+
+def test_cold_snapshot(db, monkeypatch):
+    monkeypatch.setattr(query, "VECTORIZE_MIN_EVENTS", 0)
+    calls = []
+    evaluate_columns = Query._evaluate_columns
+
+    def _evaluate_columns(self, *args):
+        calls.append(self)
+        return evaluate_columns(self, *args)
+
+    monkeypatch.setattr(Query, "_evaluate_columns", _evaluate_columns)
+    condition = "event.rating == 1"
+    expected = evaluate_per_event(db, condition)
+
+    # the snapshot is not built only to evaluate a filter
+    assert Query(condition).evaluate(db) == expected
+    assert not calls
+    assert not db._has_columns()
+
+    db.to_columns()
+    assert Query(condition).evaluate(db) == expected
+    assert len(calls) == 1
+
+    # the snapshot is outdated
+    db.create_catalogue(name="cat1", author="John")
+    assert Query(condition).evaluate(db) == expected
+    assert len(calls) == 1
+
+
+def test_out_of_range(db, monkeypatch):
+    monkeypatch.setattr(query, "VECTORIZE_MIN_EVENTS", 0)
+    event = db.create_event(start="2500-01-01", stop="2500-01-02", author="John")
+    condition = "event.start > datetime(2400, 1, 1) or event.rating == 5"
+
+    # the dates don't fit in nanoseconds, the events are evaluated one by one
+    with pytest.raises(Unsupported):
+        evaluate_columns(db, condition)
+    assert db._has_columns()
+    assert Query(condition).evaluate(db) == {str(event.uuid)}
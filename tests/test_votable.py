@@ -1,14 +1,28 @@
+import base64
 import re
+import struct
+from datetime import datetime, timezone
+from io import BytesIO
 from pathlib import Path
+from uuid import uuid4
 
 import pytest
+from astropy.io.votable import parse  # type: ignore[import-untyped]
 
 from cocat import DB
+from cocat.db import ImportCounts
 from cocat.votable import (
+    _astropy_tables,
+    _read_votable,
+    _TabledataFilter,
+    _UnsupportedVOTable,
     export_votable_file,
     export_votable_str,
+    import_votable,
     import_votable_file,
+    import_votable_files,
     import_votable_str,
+    write_votable,
 )
 
 HERE = Path(__file__).parent
@@ -165,3 +179,468 @@ def test_import_file():
         )
         == 95
     )
+
+
+def test_import_file_upsert():
+    table = HERE / "data" / "Dst_Li2020.xml"
+    db = DB()
+    counts = import_votable_file(table, db, on_conflict="upsert")
+    assert counts == ImportCounts(inserted=96)
+    state = db.doc.get_state()
+
+    # the events are matched by content with the ones of the existing catalogue
+    counts = import_votable_file(table, db, on_conflict="upsert")
+    assert counts == ImportCounts(unchanged=96)
+    assert db.doc.get_state() == state
+    assert len(db.catalogues) == 1
+    assert len(db.events) == 95
+
+    event = sorted(db.events, key=lambda event: event.start)[0]
+    event.rating = 3
+    counts = import_votable_file(table, db, on_conflict="upsert")
+    assert counts == ImportCounts(inserted=1, updated=1, unchanged=94)
+    assert len(db.events) == 96
+    assert event not in db.get_catalogue("Dst_Li2020").events
+
+    # the catalogue is imported again
+    counts = import_votable_file(table, db)
+    assert counts == ImportCounts(inserted=96)
+    assert len(db.catalogues) == 2
+
+
+VOTABLE = (
+    '<?xml version="1.0" encoding="utf-8"?>'
+    '<VOTABLE version="1.3" xmlns="http://www.ivoa.net/xml/VOTable/v1.3">'
+    "<DESCRIPTION>Contact:John;Name:cat</DESCRIPTION><RESOURCE><TABLE>"
+    '<FIELD name="Start Time" ID="TimeIntervalStart" ucd="time.start" datatype="char" '
+    'xtype="dateTime" utype="" arraysize="*"/>'
+    '<FIELD name="Stop Time" ID="TimeIntervalStop" ucd="time.end" datatype="char" '
+    'xtype="dateTime" utype="" arraysize="*"/>'
+    '<FIELD name="uuid" datatype="char" arraysize="*"/>'
+    '<FIELD name="tags" datatype="char" arraysize="*"/>'
+    "<DATA><TABLEDATA>{rows}</TABLEDATA></DATA></TABLE></RESOURCE></VOTABLE>"
+)
+ROW = "<TR><TD>{start}</TD><TD>2025-01-02T00:00:00</TD><TD>{uuid}</TD><TD>{tags}</TD></TR>"
+
+
+def test_import_columns():
+    uuid0 = "00000000-0000-0000-0000-000000000000"
+    uuid1 = "00000000-0000-0000-0000-000000000001"
+    rows = [
+        ROW.format(start="2025-01-01T00:00:00", uuid=uuid0, tags="[&quot;a&quot;]"),
+        ROW.format(start="2025-01-01T01:00:00", uuid=uuid1, tags="[]"),
+        # the same event in the table twice
+        ROW.format(start="2025-01-01T00:00:00", uuid=uuid0, tags="[&quot;a&quot;]"),
+    ]
+    db = DB()
+    counts = import_votable_str(VOTABLE.format(rows="".join(rows)), db)
+    assert counts == ImportCounts(inserted=3)
+    assert db.get_event(uuid0).tags == {"a"}
+    assert db.get_event(uuid1).start == datetime(2025, 1, 1, 1)
+    assert len(db.get_catalogue("cat").events) == 2
+
+    # dates which are not in ISO 8601 format are left to the validation of the events
+    row = ROW.format(start="1735689600", uuid=uuid0, tags="[]")
+    db = DB()
+    import_votable_str(VOTABLE.format(rows=row), db)
+    assert db.get_event(uuid0).start == datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    row = ROW.format(start="2025-01-01T00:00:00", uuid=uuid0, tags="[")
+    with pytest.raises(ValueError):
+        import_votable_str(VOTABLE.format(rows=row), DB())
+
+
+@pytest.mark.parametrize("format", ["tabledata", "binary2"])
+@pytest.mark.parametrize("chunk_size", [None, 1, 1000])
+def test_export_columns(tmp_path, chunk_size, format):
+    db = DB(format_version=2)
+    event0 = db.create_event(
+        start="2025-01-01T00:00:00+01:00",
+        stop="2025-01-02",
+        author="A&B",
+        tags=["x"],
+        rating=2,
+        attributes={"k": 1, "s": "a<b", "b": True, "l": [1, 2]},
+    )
+    event1 = db.create_event(
+        start="2025-01-03",
+        stop="2025-01-04T00:00:00-05:00",
+        author="C",
+        attributes={"k": 2, "s": '"q"', "b": False, "l": []},
+    )
+    event2 = db.create_event(
+        start="2025-01-05", stop="2025-01-06", author="D", attributes={"other": 1}
+    )
+    catalogue0 = db.create_catalogue(name="cat 0", author="J", events=[event0, event1])
+    catalogue1 = db.create_catalogue(name="cat1", author="J", events=[event2])
+    empty = db.create_catalogue(name="empty", author="J")
+
+    votable_path = tmp_path / "votable.xml"
+    export_votable_file(catalogue0, votable_path, chunk_size, format)
+    db1 = DB()
+    import_votable_file(votable_path, db1)
+    assert db1.events == {event0, event1}
+    assert db1.get_catalogue("cat 0").author == "J"
+
+    # the tables have their own attributes
+    export_votable_file(
+        [catalogue0, catalogue1, empty], votable_path, chunk_size, format
+    )
+    db1 = DB()
+    import_votable_file(votable_path, db1)
+    assert db1.events == {event0, event1, event2}
+    assert sorted(len(catalogue.events) for catalogue in db1.catalogues) == [0, 1, 2]
+
+
+@pytest.mark.parametrize("format", ["tabledata", "binary2"])
+def test_export_out_of_range(tmp_path, format):
+    # dates which don't fit in datetime64[ns]
+    db = DB()
+    event0 = db.create_event(
+        start="2500-01-01", stop="9999-12-31T23:59:59.999999", author="A"
+    )
+    event1 = db.create_event(
+        start="1000-01-01T00:00:00.000001+02:00", stop="2025-01-01", author="B"
+    )
+    catalogue = db.create_catalogue(name="cat", author="J", events=[event0, event1])
+    if format == "tabledata":
+        content = export_votable_str(catalogue)
+        assert "<TD>2500-01-01T00:00:00</TD>" in content
+
+    votable_path = tmp_path / "votable.xml"
+    export_votable_file(catalogue, votable_path, format=format)
+    db1 = DB()
+    import_votable_file(votable_path, db1)
+    assert db1.events == {event0, event1}
+
+
+@pytest.mark.parametrize("chunk_size", [None, 10])
+@pytest.mark.parametrize("format", ["binary", "binary2"])
+def test_export_binary(tmp_path, chunk_size, format):
+    db = DB()
+    import_votable_file(HERE / "data" / "Dst_Li2020.xml", db)
+    catalogue = db.get_catalogue("Dst_Li2020")
+    event = db.create_event(
+        start="2025-01-01T00:00:00+01:00",
+        stop="2025-01-02",
+        author="A",
+        tags=["x"],
+        rating=2,
+        attributes=dict(catalogue.events[0].attributes),
+    )
+    catalogue.add_events(event)
+
+    votable_path = tmp_path / "votable.xml"
+    export_votable_file(catalogue, votable_path, chunk_size, format)
+    assert f"<{format.upper()}>" in votable_path.read_text()
+    db1 = DB()
+    import_votable_file(votable_path, db1)
+    assert len(db1.events) == 96
+    assert db1.events == db.events
+
+    event.author = "é"
+    with pytest.raises(ValueError):
+        export_votable_file(catalogue, votable_path, chunk_size, format)
+
+
+FIELDS = (
+    '<FIELD name="s" datatype="char" arraysize="*"/><FIELD name="d" datatype="double"/>'
+    '<FIELD name="l" datatype="long"/><FIELD name="b" datatype="boolean"/>'
+)
+TABLEDATA = (
+    "<TR><TD> a &amp; b </TD><TD> 1.5 </TD><TD>-3</TD><TD>true</TD></TR>"
+    "<TR><TD/><TD></TD><TD></TD><TD>?</TD></TR>"
+    "<TR><TD>c</TD><TD>NaN</TD><TD>4</TD><TD>F</TD></TR>"
+)
+# the second row only has null values
+BINARY2 = base64.b64encode(
+    b"\x00\x00\x00\x00\x01a"
+    + struct.pack(">dq", 1.5, -3)
+    + b"T\xf0\x00\x00\x00\x01b"
+    + struct.pack(">dq", 2.5, 4)
+    + b"T"
+).decode()
+
+
+def _votable(tables, resource="<RESOURCE>{tables}</RESOURCE>"):
+    return VOTABLE.replace(
+        VOTABLE[VOTABLE.index("<RESOURCE>") :],
+        resource.format(tables=tables) + "</VOTABLE>",
+    )
+
+
+def _table(fields=FIELDS, data=f"<DATA><TABLEDATA>{TABLEDATA}</TABLEDATA></DATA>"):
+    return f"<TABLE>{fields}{data}</TABLE>"
+
+
+def _read_astropy(source):
+    return _astropy_tables(parse(source))
+
+
+def _create_catalogue():
+    db = DB()
+    events = [
+        db.create_event(
+            start="2025-01-01T00:00:00+01:00",
+            stop="2025-01-02",
+            author="John",
+            tags=["a"],
+            rating=idx % 3,
+            attributes={"d": idx / 3, "l": idx, "b": idx % 2 == 0, "s": "x" * idx},
+        )
+        for idx in range(5)
+    ]
+    return db.create_catalogue(name="cat", author="John", events=events)
+
+
+def _write_votable(**kwargs):
+    content = BytesIO()
+    write_votable(_create_catalogue(), content, **kwargs)
+    return content.getvalue().decode()
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        (HERE / "data" / "Dst_Li2020.xml").read_text(),
+        _votable(_table()),
+        _votable(_table() + _table(data="")),
+        _votable(
+            _table(
+                data="<DATA><TABLEDATA>\r\n<TR>\t<TD>&lt;a&gt;\r\n&#233;&#x41;</TD><TD>  </TD>"
+                "<TD>\n</TD><TD> T </TD></TR>\r\n</TABLEDATA></DATA>"
+            )
+        ),
+        _votable(
+            _table(data=f"<DATA><TABLEDATA>{TABLEDATA * 1000}</TABLEDATA></DATA>")
+        ),
+        _votable(
+            _table(
+                data=f'<DATA><BINARY2><STREAM encoding="base64">{BINARY2}</STREAM></BINARY2></DATA>'
+            )
+        ),
+        export_votable_str(_create_catalogue(), format="binary"),
+        export_votable_str(_create_catalogue(), format="binary2"),
+        _write_votable(),
+        _write_votable(chunk_size=2, format="binary"),
+        _write_votable(chunk_size=2, format="binary2"),
+    ],
+    ids=[
+        "file",
+        "tabledata",
+        "tables",
+        "texts",
+        "rows",
+        "binary2",
+        "astropy-binary",
+        "astropy-binary2",
+        "write-tabledata",
+        "write-binary",
+        "write-binary2",
+    ],
+)
+def test_read_votable(content):
+    # the same values as with astropy, whose ID defaults to the name
+    description, tables, single_table = _read_votable(BytesIO(content.encode()))
+    expected = _read_astropy(BytesIO(content.encode()))
+    for table, expected_table in zip(tables, expected[1]):
+        for field, expected_field in zip(table.fields, expected_table.fields):
+            field.ID = field.ID or expected_field.ID
+    assert repr((description, tables, single_table)) == repr(expected)
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "<VOTABLE><RESOURCE>",
+        "<TABLE/>",
+        _votable("<TABLE/>", "<RESOURCE><RESOURCE>{tables}</RESOURCE></RESOURCE>"),
+        _votable('<TABLE ref="t"/>'),
+        _votable(_table(data="<DATA><FITS/></DATA>")),
+        _votable(_table(fields='<FIELD datatype="long"/>')),
+        _votable(_table(fields='<FIELD name="i" datatype="int"/>')),
+        _votable(_table(fields='<FIELD name="c" datatype="char"/>')),
+        _votable(_table(fields='<FIELD name="l" datatype="long" arraysize="2"/>')),
+        _votable(
+            _table(data="<DATA><TABLEDATA><TR><TD>a</TD></TR></TABLEDATA></DATA>")
+        ),
+        _votable(
+            _table(
+                data=f"<DATA><TABLEDATA>{TABLEDATA}<!-- -->{TABLEDATA}</TABLEDATA></DATA>"
+            )
+        ),
+        _votable(_table(data=f"<DATA><TABLEDATA>{TABLEDATA}x</TABLEDATA></DATA>")),
+        _votable(
+            _table(
+                data='<DATA><v:TABLEDATA xmlns:v="http://www.ivoa.net/xml/VOTable/v1.3">'
+                "</v:TABLEDATA></DATA>"
+            )
+        ),
+        _votable(
+            _table(
+                fields='<FIELD name="s" datatype="char" arraysize="*"/>',
+                data='<DATA><TABLEDATA><TR><TD encoding="base64">YQ==</TD></TR></TABLEDATA></DATA>',
+            )
+        ),
+        _votable(
+            _table(
+                fields='<FIELD name="l" datatype="long"/>',
+                data="<DATA><TABLEDATA><TR><TD>1.5</TD></TR></TABLEDATA></DATA>",
+            )
+        ),
+        _votable(
+            _table(
+                fields='<FIELD name="b" datatype="boolean"/>',
+                data="<DATA><TABLEDATA><TR><TD>yes</TD></TR></TABLEDATA></DATA>",
+            )
+        ),
+        _votable(
+            _table(data='<DATA><BINARY2><STREAM href="file.bin"/></BINARY2></DATA>')
+        ),
+        _votable(
+            _table(
+                data=f'<DATA><BINARY2><STREAM encoding="base64">{BINARY2[:-8]}</STREAM></BINARY2></DATA>'
+            )
+        ),
+        _votable(
+            _table(
+                data=f'<DATA><BINARY><STREAM encoding="base64">{BINARY2}</STREAM></BINARY></DATA>'
+            )
+        ),
+        _votable(
+            _table(
+                fields='<FIELD name="s" datatype="char" arraysize="*"/>',
+                data='<DATA><BINARY><STREAM encoding="base64">AAAAAcM=</STREAM></BINARY></DATA>',
+            )
+        ),
+        _votable(
+            _table(
+                fields='<FIELD name="s" datatype="char" arraysize="*"/>',
+                data='<DATA><BINARY><STREAM encoding="base64">AAAABWE=</STREAM></BINARY></DATA>',
+            )
+        ),
+        _votable(
+            _table(
+                data='<DATA><BINARY><STREAM encoding="base64">A</STREAM></BINARY></DATA>'
+            )
+        ),
+    ],
+)
+def test_read_votable_unsupported(content):
+    with pytest.raises(_UnsupportedVOTable):
+        _read_votable(BytesIO(content.encode()))
+
+
+def test_tabledata_filter():
+    # the tags can be split between reads
+    content = _votable(_table() + _table()).encode()
+    source = _TabledataFilter(BytesIO(content))
+    data = b"".join(iter(lambda: source.read(5), b""))
+    assert data == content.replace(TABLEDATA.encode(), b"")
+    assert ["".join(parts) for parts in source.blocks] == [TABLEDATA, TABLEDATA]
+
+
+def test_read_votable_encoding():
+    content = _votable(_table(data=f"<DATA><TABLEDATA>{TABLEDATA}</TABLEDATA></DATA>"))
+    content = content.replace("utf-8", "ISO-8859-1").replace("a &amp; b", "\u00e9")
+    _, tables, _ = _read_votable(BytesIO(content.encode("latin-1")))
+    assert tables[0].columns[0] == ["\u00e9", "", "c"]
+
+    for data in [
+        content.replace("ISO-8859-1", "unknown").encode("latin-1"),
+        content.replace("ISO-8859-1", "utf-8").encode("latin-1"),
+    ]:
+        with pytest.raises(_UnsupportedVOTable):
+            _read_votable(BytesIO(data))
+
+
+def test_import_votable_fallback(tmp_path):
+    # the nested resources are read by astropy
+    rows = ROW.format(start="2025-01-01T00:00:00", uuid=uuid4(), tags="[]")
+    content = (
+        VOTABLE.format(rows=rows)
+        .replace("<RESOURCE>", "<RESOURCE><RESOURCE>")
+        .replace("</RESOURCE>", "</RESOURCE></RESOURCE>")
+    )
+    db = DB()
+    assert import_votable_str(content, db) == ImportCounts(inserted=2)
+    assert db.get_catalogue("cat_0").author == "John"
+
+    path = tmp_path / "votable.xml"
+    path.write_text(content)
+    db = DB()
+    assert import_votable_file(path, db) == ImportCounts(inserted=2)
+    assert import_votable(parse(path), DB()) == ImportCounts(inserted=2)
+
+
+def _content(db):
+    return (
+        sorted(event.fingerprint for event in db.events),
+        sorted(
+            (
+                catalogue.name,
+                catalogue.author,
+                sorted(event.fingerprint for event in catalogue.events),
+            )
+            for catalogue in db.catalogues
+        ),
+        sorted(
+            (catalogue.name, sorted(str(event.uuid) for event in catalogue.events))
+            for catalogue in db.catalogues
+            if catalogue.name != "Dst_Li2020"
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    "workers,on_conflict,format_version",
+    [(1, "replace", None), (2, "replace", 2), (1, "upsert", 2), (2, "upsert", None)],
+)
+def test_import_files(tmp_path, workers, on_conflict, format_version):
+    rows = "".join(
+        ROW.format(start=f"2025-01-0{idx}T00:00:00", uuid=uuid4(), tags="[]")
+        for idx in range(1, 4)
+    )
+    contents = {
+        "a": export_votable_str(_create_catalogue()),
+        # without a name
+        "b": VOTABLE.format(rows=rows).replace("Name:cat", ""),
+        "c": (HERE / "data" / "Dst_Li2020.xml").read_text(),
+    }
+    # the same events and catalogue name as in a.xml
+    contents["d"] = contents["a"]
+    paths = []
+    for name, content in contents.items():
+        paths.append(tmp_path / f"{name}.xml")
+        paths[-1].write_text(content)
+
+    # a database which already has the catalogue of c.xml
+    base = DB(format_version=format_version)
+    import_votable_file(paths[2], base)
+
+    def _create_db():
+        db = DB()
+        db.doc.apply_update(base.doc.get_update())
+        return db
+
+    expected_db = _create_db()
+    expected = [
+        import_votable_file(path, expected_db, path.stem, on_conflict) for path in paths
+    ]
+    db = _create_db()
+    counts = import_votable_files(paths, db, on_conflict=on_conflict, workers=workers)
+    assert counts == sum(expected, ImportCounts())
+    assert _content(db) == _content(expected_db)
+    assert db.get_catalogue("b") is not None
+    assert len(db.events) == len(expected_db.events)
+
+
+def test_import_files_error(tmp_path):
+    path = tmp_path / "a.xml"
+    path.write_text(export_votable_str(_create_catalogue()))
+    db = DB()
+    with pytest.raises(FileNotFoundError):
+        import_votable_files([path, tmp_path / "missing.xml"], db, workers=2)
+    assert len(db.events) == 0
+    assert import_votable_files([path], db, "foo") == ImportCounts(inserted=6)
+    assert db.get_catalogue("cat") is not None
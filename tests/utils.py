@@ -1,5 +1,8 @@
 import subprocess
 from dataclasses import dataclass
+from datetime import datetime
+
+from simpleeval import SimpleEval  # type: ignore[import-untyped]
 
 
 @dataclass
@@ -45,3 +48,15 @@ def get_credential(service_name: str, username: str | None) -> Credentials | Non
 
 def set_password(service_name: str, username: str, password: str) -> None:
     WALLET[service_name] = Credentials(username, password)
+
+
+def evaluate_per_event(db, condition: str) -> set[str]:
+    # the reference evaluation of a dynamic filter, event by event
+    evaluator = SimpleEval()
+    evaluator.functions = {"datetime": datetime, "catalogue": db.get_catalogue}
+    uuids = set()
+    for event in db.events:
+        evaluator.names = {"event": event}
+        if evaluator.eval(condition):
+            uuids.add(str(event.uuid))
+    return uuids